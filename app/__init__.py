@@ -14,7 +14,7 @@ migrate = Migrate()
 def create_app():
     load_dotenv()
 
-    setup_logging("INFO")
+    setup_logging()  # LOG_LEVEL / LOG_FORMAT
     log = get_logger("bootstrap")
 
 
@@ -23,6 +23,33 @@ def create_app():
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "dev-secret")
     app.config["TOKEN_TTL_MIN"] = int(os.getenv("TOKEN_TTL_MIN", "120"))
+    app.config["PAYSLIP_MODE"] = os.getenv("PAYSLIP_MODE", "serial")  # 'serial' | 'parallel'
+    app.config["PAYSLIP_WORKERS"] = int(os.getenv("PAYSLIP_WORKERS", str(os.cpu_count() or 1)))
+    app.config["PAYSLIP_SYNC_MAX"] = int(os.getenv("PAYSLIP_SYNC_MAX", "200"))  # peste -> job in fundal; 0 = mereu sync
+    app.config["TASK_CONCURRENCY"] = int(os.getenv("TASK_CONCURRENCY", "2"))
+    app.config["PAYROLL_RUN_CONCURRENCY"] = int(os.getenv("PAYROLL_RUN_CONCURRENCY", "4"))
+    app.config["PAYROLL_RUN_MODE"] = os.getenv("PAYROLL_RUN_MODE", "local")  # 'local' | 'queue'
+    app.config["PAYROLL_WORKER_CONCURRENCY"] = int(os.getenv("PAYROLL_WORKER_CONCURRENCY", "2"))
+    app.config["PAYROLL_WORKER_POLL_SEC"] = float(os.getenv("PAYROLL_WORKER_POLL_SEC", "2"))
+    app.config["PAYROLL_JOB_LEASE_SEC"] = int(os.getenv("PAYROLL_JOB_LEASE_SEC", "120"))
+    app.config["PAYROLL_JOB_MAX_ATTEMPTS"] = int(os.getenv("PAYROLL_JOB_MAX_ATTEMPTS", "3"))
+    app.config["PAYROLL_JOB_RETRY_SEC"] = int(os.getenv("PAYROLL_JOB_RETRY_SEC", "30"))
+    app.config["EMAIL_DISPATCH_CONCURRENCY"] = int(os.getenv("EMAIL_DISPATCH_CONCURRENCY", "4"))
+    app.config["EMAIL_RATE_PER_SEC"] = float(os.getenv("EMAIL_RATE_PER_SEC", "10"))  # 0 = nelimitat
+    app.config["EMAIL_MAX_ATTEMPTS"] = int(os.getenv("EMAIL_MAX_ATTEMPTS", "5"))
+    app.config["EMAIL_RETRY_BASE_SEC"] = int(os.getenv("EMAIL_RETRY_BASE_SEC", "30"))
+    app.config["EMAIL_DISPATCH_POLL_SEC"] = float(os.getenv("EMAIL_DISPATCH_POLL_SEC", "5"))
+    app.config["EMAIL_LEASE_SEC"] = int(os.getenv("EMAIL_LEASE_SEC", "300"))
+    app.config["EMAIL_SYNC_TIMEOUT_SEC"] = float(os.getenv("EMAIL_SYNC_TIMEOUT_SEC", "120"))  # ?mode=sync
+    app.config["SERVER_TIMING"] = os.getenv("SERVER_TIMING", "1") == "1"
+    app.config["PROFILE_ENABLED"] = os.getenv("PROFILE_ENABLED", "0") == "1"
+    app.config["PROFILE_MODE"] = os.getenv("PROFILE_MODE", "cprofile")  # 'cprofile' | 'sample'
+    app.config["PROFILE_SAMPLE_RATE"] = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))  # 0..1, pe langa header-ul X-Profile
+    app.config["PROFILE_SAMPLE_INTERVAL_MS"] = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+    app.config["PROFILE_DIR"] = os.getenv("PROFILE_DIR", os.path.join(os.getcwd(), "profiles"))
+    app.config["PROFILE_MAX_FILES"] = int(os.getenv("PROFILE_MAX_FILES", "200"))  # cele mai vechi se sterg
+    app.config["PROFILE_SECRET"] = os.getenv("PROFILE_SECRET", "")  # X-Profile: <secret>, fara token de admin
+    app.config["SQL_REPEATED_QUERY_WARN"] = int(os.getenv("SQL_REPEATED_QUERY_WARN", "10"))  # 0 = dezactivat
 
     db.init_app(app)
     migrate.init_app(app, db)
@@ -32,10 +59,30 @@ def create_app():
     from app.api.routers.auth import bp as auth_bp
     from app.api.routers.payroll import bp as payroll_bp
     from app.api.routers.payslips import bp as payslips_bp
+    from app.api.routers.outbox import bp as outbox_bp
+    from app.api.routers.admin import bp as admin_bp
+    from app.api.routers.jobs import bp as jobs_bp
+    from app.api.routers.metrics import bp as metrics_bp
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(payroll_bp)
     app.register_blueprint(payslips_bp)
+    app.register_blueprint(outbox_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(metrics_bp)
+
+    from app.core.outbox import init_outbox
+    init_outbox(app)
+
+    from app.core.payroll_run import init_payroll_runs
+    init_payroll_runs(app)
+
+    from app.core.tasks import init_tasks
+    init_tasks(app)
+
+    from app.cli import payroll_cli
+    app.cli.add_command(payroll_cli)
 
     install_http_logging(app)
 
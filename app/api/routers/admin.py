@@ -0,0 +1,117 @@
+import csv
+import io
+
+from flask import Blueprint, request, jsonify, current_app
+
+from app.core.auth import admin_required
+from app.core.bulk_import import SPECS, BulkImportError, import_rows
+from app.core.payroll import parse_month
+from app.core.payroll_jobs import active_run, enqueue_run, run_summary
+from app.core.payroll_run import scheduler
+
+bp = Blueprint("admin", __name__, url_prefix="/admin")
+
+
+# /admin/payrollRuns
+
+@bp.route("/payrollRuns", methods=["POST"])
+@admin_required()
+def start_payroll_run():
+    """
+    ruleaza payroll-ul (CSV + payslip-uri) pt toti managerii activi, pe luna ?month=YYYY-MM
+    (implicit luna curenta), in archive/YYYY-MM/manager_<id>/. Ce s-a generat deja nu se refece.
+    ?mode (implicit PAYROLL_RUN_MODE):
+      - local: in fundal, in procesul curent (202 + run_id)
+      - sync:  in procesul curent, asteapta terminarea
+      - queue: unitati in payroll_jobs, executate de `flask payroll worker` pe orice nod;
+               ?unit=manager|employee, ?send=1 trimite payslip-urile dupa generare
+    """
+    body = request.get_json(silent=True) or {}
+    try:
+        month = parse_month(request.args.get("month") or body.get("month"))
+    except ValueError:
+        return jsonify({"error": "month must be YYYY-MM"}), 400
+
+    mode = request.args.get("mode") or current_app.config["PAYROLL_RUN_MODE"]
+    unit = request.args.get("unit", "manager")
+    if mode == "queue" and unit not in ("manager", "employee"):
+        return jsonify({"error": "unit must be manager or employee"}), 400
+
+    sched = scheduler()
+    # doua POST-uri simultane nu pot porni amandoua o rulare pt aceeasi luna (rularile locale:
+    # doar in acelasi proces - vezi PayrollScheduler.starting)
+    with sched.starting(month):
+        running = sched.active(month)
+        running_id = running.run_id if running else active_run(month)
+        if running_id:
+            return jsonify({"error": "A payroll run for this month is in progress",
+                            "run_id": running_id}), 409
+
+        if mode == "queue":
+            send = request.args.get("send", "0").lower() in ("1", "true", "yes")
+            run_id, units = enqueue_run(month, unit=unit, send=send)
+            return jsonify({"run_id": run_id, "month": month.strftime("%Y-%m"), "status": "QUEUED",
+                            "mode": "queue", "units": units}), 202
+
+        run = sched.create(month)
+
+    if mode == "sync":
+        sched.execute(run)
+        return jsonify(run.summary()), 200
+
+    sched.start(run)
+    return jsonify(run.summary(with_managers=False)), 202
+
+
+@bp.route("/payrollRuns/<run_id>", methods=["GET"])
+@admin_required()
+def payroll_run_status(run_id: str):
+    """progresul unei rulari: stare per manager, throughput, erori"""
+    run = scheduler().get(run_id)
+    if run is not None:
+        return jsonify(run.summary()), 200
+
+    summary = run_summary(run_id)
+    if summary is None:
+        return jsonify({"error": "Run not found"}), 404
+    return jsonify(summary), 200
+
+
+# /admin/bulkImport/<kind>
+
+def _import_format(content_type: str) -> str:
+    if "ndjson" in content_type or "jsonl" in content_type or "json-seq" in content_type:
+        return "ndjson"
+    return "csv"
+
+
+@bp.route("/bulkImport/<kind>", methods=["POST"])
+@admin_required()
+def bulk_import(kind: str):
+    """
+    import in masa pt bonuses / vacations: CSV (cu header) sau NDJSON, ca body sau ca fisier
+    multipart (`file`); ?format=csv|ndjson (implicit din Content-Type), ?atomic=1 -> nimic nu se
+    incarca daca exista randuri invalide. Raspunsul: randuri inserate / actualizate / respinse,
+    erorile per linie si throughput-ul.
+      bonuses:   emp_id, name, amount, effective_month (YYYY-MM)
+      vacations: emp_id, start_date, end_date, type (PAID | UNPAID, implicit PAID)
+    """
+    if kind not in SPECS:
+        return jsonify({"error": f"kind must be one of: {', '.join(SPECS)}"}), 404
+
+    upload = request.files.get("file")
+    raw = upload.stream if upload is not None else request.stream
+    content_type = (upload.mimetype if upload is not None else request.mimetype) or ""
+    fmt = request.args.get("format") or _import_format(content_type)
+    atomic = request.args.get("atomic", "0").lower() in ("1", "true", "yes")
+
+    stream = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+    try:
+        result = import_rows(kind, stream, fmt=fmt, atomic=atomic)
+    except (BulkImportError, UnicodeDecodeError, csv.Error) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        current_app.logger.exception("Error in bulkImport")
+        return jsonify({"error": "Internal error", "detail": str(e)}), 500
+
+    return jsonify(result), 200 if result["status"] == "ok" else 422
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify, current_app
 from app.database.models import Employee
-from app.core.auth import generate_token, manager_required, current_user
+from app.core.auth import generate_token, manager_required, current_user, principal_cache, token_cache
 import hashlib
 import jwt
 
@@ -63,4 +63,14 @@ def debug_jwt():
             info["decode_ok"] = False
             info["error"] = str(e)
 
-    return info, 200
\ No newline at end of file
+    return info, 200
+
+
+@bp.route("/cache-stats", methods=["GET"])
+@manager_required()
+def cache_stats():
+    # hit/miss pt cache-urile de autentificare (per proces)
+    return jsonify({
+        "principal_cache": principal_cache.stats(),
+        "token_cache": token_cache.stats(),
+    }), 200
@@ -0,0 +1,140 @@
+import json
+import time
+
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+
+from app import db
+from app.core.auth import manager_required, current_user
+from app.core.outbox import job_summary
+from app.core.tasks import Task, progress_stats, tasks
+
+bp = Blueprint("jobs", __name__, url_prefix="/")
+
+# la cat timp se trimite un comentariu SSE cand nu e progres (altfel proxy-urile inchid conexiunea)
+SSE_KEEPALIVE_SEC = 15
+# cat de des se reciteste din outbox progresul unui job de email
+EMAIL_POLL_SEC = 1.0
+# cel mult un eveniment `progress` la atatea secunde (evenimentele `item` nu sunt limitate)
+PROGRESS_MIN_INTERVAL_SEC = 0.5
+
+
+# --- helpers ---
+def _sse(event: str, data: dict, event_id: int | None = None) -> str:
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"event: {event}", f"data: {json.dumps(data, default=str)}"]
+    return "\n".join(lines) + "\n\n"
+
+
+def _find_task(job_id: str, manager_id: int) -> Task | None:
+    task = tasks().get(job_id)
+    return task if task is not None and task.manager_id == manager_id else None
+
+
+def _email_progress(summary: dict) -> dict:
+    """progresul unui job din outbox (ceasul bazei de date: created_at -> ultimul email trimis)"""
+    done = summary["counts"].get("SENT", 0) + summary["counts"].get("FAILED", 0)
+    last = summary["last_sent_at"]
+    elapsed = (last - summary["created_at"]).total_seconds() if last else 0.0
+    return {
+        "job_id": summary["job_id"],
+        "kind": "email",
+        "status": "DONE" if summary["done"] else "RUNNING",
+        "failed": summary["counts"].get("FAILED", 0),
+    } | progress_stats(summary["total"], done, elapsed)
+
+
+def _task_stream(task: Task, cursor: int):
+    last_progress = 0.0
+    while True:
+        task.wait(cursor, timeout=SSE_KEEPALIVE_SEC)
+        new = task.events[cursor:]
+        for i, item in enumerate(new, start=cursor + 1):
+            yield _sse("item", item, i)
+        cursor += len(new)
+
+        now = time.monotonic()
+        if task.finished or (new and now - last_progress >= PROGRESS_MIN_INTERVAL_SEC):
+            yield _sse("progress", task.progress())
+            last_progress = now
+        elif not new:
+            yield ": keepalive\n\n"
+
+        if task.finished and cursor >= len(task.events):
+            summary = task.summary()
+            summary.pop("items")
+            yield _sse("done", summary)
+            return
+
+
+def _email_stream(job_id: str, manager_id: int):
+    reported = set()
+    last_beat = time.monotonic()
+    while True:
+        summary = job_summary(job_id, manager_id)
+        db.session.commit()  # tranzactie noua (si obiecte re-citite) la fiecare poll
+        if summary is None:
+            yield _sse("error", {"error": "Job not found"})
+            return
+
+        new = [m for m in summary["messages"]
+               if m["status"] in ("SENT", "FAILED") and m["msg_id"] not in reported]
+        for m in new:
+            reported.add(m["msg_id"])
+            yield _sse("item", {"emp_id": m["emp_id"], "file": m["file"], "ok": m["status"] == "SENT",
+                                "error": m["last_error"]}, m["msg_id"])
+
+        if new or summary["done"]:
+            yield _sse("progress", _email_progress(summary))
+            last_beat = time.monotonic()
+        elif time.monotonic() - last_beat >= SSE_KEEPALIVE_SEC:
+            yield ": keepalive\n\n"
+            last_beat = time.monotonic()
+
+        if summary["done"]:
+            yield _sse("done", _email_progress(summary))
+            return
+        time.sleep(EMAIL_POLL_SEC)
+
+
+# --- endpoints ---
+@bp.route("/jobs/<job_id>", methods=["GET"])
+@manager_required()
+def job_status(job_id: str):
+    """
+    starea unui job pornit in fundal: generarea payslip-urilor (createPdfForEmployees)
+    sau trimiterea lor (sendPdfToEmployees) - progres, throughput, ETA, rezultate per angajat
+    """
+    manager_id = current_user().emp_id
+    task = _find_task(job_id, manager_id)
+    if task is not None:
+        return jsonify(task.summary()), 200
+
+    summary = job_summary(job_id, manager_id)
+    if summary is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(_email_progress(summary) | {"messages": summary["messages"]}), 200
+
+
+@bp.route("/jobs/<job_id>/events", methods=["GET"])
+@manager_required()
+def job_events(job_id: str):
+    """
+    Server-Sent Events pt un job: `item` pt fiecare angajat terminat, `progress`
+    (procent, items/s, ETA) dupa fiecare lot, `done` la final.
+    Pt payslip-uri, Last-Event-ID reia fluxul de unde a ramas.
+    """
+    manager_id = current_user().emp_id
+    task = _find_task(job_id, manager_id)
+    if task is not None:
+        try:
+            cursor = int(request.headers.get("Last-Event-ID", "0"))
+        except ValueError:
+            cursor = 0
+        stream = _task_stream(task, max(0, cursor))
+    elif job_summary(job_id, manager_id) is not None:
+        stream = _email_stream(job_id, manager_id)
+    else:
+        return jsonify({"error": "Job not found"}), 404
+
+    return Response(stream_with_context(stream), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
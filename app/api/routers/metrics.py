@@ -0,0 +1,11 @@
+from flask import Blueprint, Response
+
+from app.core.metrics import CONTENT_TYPE, render_latest
+
+bp = Blueprint("metrics", __name__, url_prefix="/")
+
+
+@bp.route("/metrics", methods=["GET"])
+def metrics():
+    """ metricile procesului (sau ale tuturor worker-ilor, cu PROMETHEUS_MULTIPROC_DIR) in format Prometheus """
+    return Response(render_latest(), content_type=CONTENT_TYPE)
@@ -0,0 +1,16 @@
+from flask import Blueprint, jsonify
+
+from app.core.auth import manager_required, current_user
+from app.core.outbox import job_summary
+
+bp = Blueprint("outbox", __name__, url_prefix="/")
+
+
+@bp.route("/emailJobs/<job_id>", methods=["GET"])
+@manager_required()
+def email_job_status(job_id: str):
+    """ starea unui job de trimitere (doar pt managerul care l-a creat) """
+    summary = job_summary(job_id, current_user().emp_id)
+    if summary is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(summary), 200
@@ -1,18 +1,18 @@
 import csv
 import os
-from datetime import date, datetime, timedelta
+import tempfile
+import zlib
+from datetime import date
 from io import StringIO
-from flask import Blueprint, request, jsonify, current_app
-import glob
-import smtplib
-from email.message import EmailMessage
-import shutil
-import time
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 
-from app import db
-from app.database.models import Employee
+from app.database.models import EmailOutbox
 
 from app.core.auth import manager_required, current_user
+from app.core.payroll import month_bounds, business_days_in_month, iter_team_month_rows, team_month_rows
+from app.core.archive import index_files, latest_csv
+from app.core.generation import CSV_HEADER, csv_archive_path, csv_row, write_team_csv
+from app.core.outbox import OutboxMessage, dispatcher, enqueue, job_summary
 
 from app.core.logging import get_logger
 log = get_logger("payroll")
@@ -22,33 +22,9 @@ bp = Blueprint("payroll", __name__, url_prefix="/")
 # /createAggregatedEmployeeData
 
 # --- helpers ---
-def month_bounds(d: date) -> tuple[date, date]:
-    # m0 - prima zi din luna
-    # m1 - ultima zi din luna
-    m0 = d.replace(day=1)
-    if m0.month == 12:
-        m1 = date(m0.year + 1, 1, 1) - timedelta(days=1)
-    else:
-        m1 = date(m0.year, m0.month + 1, 1) - timedelta(days=1)
-    return m0, m1
-
-def business_days_in_month(d: date, holidays: set[date] | None = None) -> int:
-    """numara zilele lucratoare (luni - vineri) din luna lui d (nu se tine cont de sarbatori legale)"""
-    holidays = holidays or set()
-    m0, m1 = month_bounds(d)
-    days = 0
-    cur = m0
-    while cur <= m1:
-        if cur.weekday() < 5 and cur not in holidays:  # 0 = luni, 4 = vineri
-            days += 1
-        cur += timedelta(days=1)
-    return days
-
-def fetch_manager_or_404(manager_id: int) -> Employee:
-    mngr = Employee.query.filter_by(emp_id=manager_id, role="MANAGER", is_active=True).first()
-    if not mngr:
-        raise ValueError("Inexistent or inactive manager_id")
-    return mngr
+# cat text CSV se strange inainte de a trimite un chunk clientului
+STREAM_CHUNK_SIZE = 64 * 1024
+
 
 # --- endpoint ---
 @bp.route("/createAggregatedEmployeeData", methods=["POST", "GET"])
@@ -73,71 +49,12 @@ def create_aggregated_employee_data():
         m0, m1 = month_bounds(today)
         working_days_month = business_days_in_month(today)
 
-        # bonusuri & concedii (luna curenta)
-        bonuses_sql = db.text("""
-            SELECT emp_id, COALESCE(SUM(amount), 0) AS bonus_total
-            FROM bonuses
-            WHERE effective_month = :m0
-            GROUP BY emp_id
-        """)
-        bonus_rows = {row.emp_id: float(row.bonus_total)
-                      for row in db.session.execute(bonuses_sql, {"m0": m0}).fetchall()}
-
-        vacations_sql = db.text("""
-            SELECT emp_id,
-                   SUM(GREATEST(0, LEAST(end_date, :m1) - GREATEST(start_date, :m0) + 1)) AS vac_days
-            FROM vacations
-            WHERE end_date >= :m0 AND start_date <= :m1
-            GROUP BY emp_id
-        """)
-        vac_rows = {row.emp_id: int(row.vac_days)
-                    for row in db.session.execute(vacations_sql, {"m0": m0, "m1": m1}).fetchall()}
-
-        # angajatii manager autentif
-        employees = (
-            Employee.query
-            .filter_by(manager_id=manager_id, is_active=True)
-            .order_by(Employee.emp_id.asc())
-            .all()
-        )
-
-        # CSV
-        out = StringIO()
-        writer = csv.writer(out)
-        writer.writerow([
-            "Employee name",
-            "Salary to be paid (current month)",
-            "Working days in month",
-            "Vacation days (taken)",
-            "Additional bonuses (current month)"
-        ])
-
-        rows_count = 0
-        for e in employees:
-            bonus_total = bonus_rows.get(e.emp_id, 0.0)
-            vacation_days = vac_rows.get(e.emp_id, 0)
-            salary_to_pay = float(e.base_salary) + float(bonus_total)
-
-            writer.writerow([
-                f"{e.first_name} {e.last_name}",
-                f"{salary_to_pay:.2f}",
-                working_days_month,
-                vacation_days,
-                f"{bonus_total:.2f}"
-            ])
-            rows_count += 1
-
-        csv_content = out.getvalue()
-
-        # arhivare
-        ym = today.strftime("%Y-%m")
-        y_m = today.strftime("%Y_%m")
-        base_dir = os.path.join(os.getcwd(), "archive", ym, f"manager_{manager_id}")
-        os.makedirs(base_dir, exist_ok=True)
-        file_path = os.path.join(base_dir, f"aggregated_{y_m}.csv")
+        # salariu + bonusuri + concedii (luna curenta), doar pt echipa managerului
+        rows = team_month_rows(manager_id, today)
 
-        with open(file_path, "w", newline="", encoding="utf-8") as f:
-            f.write(csv_content)
+        # CSV + arhivare in archive/YYYY-MM/manager_<id>/ (+ index)
+        file_path = write_team_csv(manager_id, today, rows)
+        rows_count = len(rows)
 
         return jsonify({
             "status": "ok",
@@ -153,76 +70,101 @@ def create_aggregated_employee_data():
         return jsonify({"error": "Internal error.", "detail": str(e)}), 500
     
 
-# /sendAggregatedEmployeeData
+# /exportAggregatedEmployeeData
 
-# --- helpers ---
-def _find_latest_csv_for_manager(manager_id: int) -> str | None:
-    """cauta cel mai recent fisier CSV generat pt manager_id
-    archive/YYYY-MM/manager_<id>/aggregated_YYYY_MM.csv
+def _csv_chunks(manager_id: int, d: date, archive_path: str | None):
     """
-    archive_root = os.path.join(os.getcwd(), "archive")
-    pattern = os.path.join(archive_root, "*", f"manager_{manager_id}", "aggregated_*.csv")
-    candidates = glob.glob(pattern)
-    if not candidates:
-        return None
-    candidates.sort(key=lambda p: os.path.getmtime(p), reverse=True) # cel mai recent
-    return candidates[0]
-
-def _send_email_with_attachment(
-        to_email: str, 
-        subject: str, 
-        body_text: str, 
-        attachment_path: str,
-        from_email: str,
-        smtp_host: str,
-        smtp_port: int,
-        username: str | None = None,
-        password: str | None = None,
-        use_tls: bool = True
-):
-    
+    CSV-ul echipei, in bucati de ~STREAM_CHUNK_SIZE, citit cu cursor pe server;
+    optional scris in paralel si in arhiva (fisier temporar + rename la final)
     """
-    construieste mesaj cu atasament si trimite prin smtp
-    """
-    msg = EmailMessage()
-    msg["From"] = from_email
-    msg["To"] = to_email
-    msg["Subject"] = subject
-    msg.set_content(body_text)
-
-    with open(attachment_path, "rb") as f:
-        data = f.read()
-    msg.add_attachment(data, maintype="text", subtype="csv", filename=os.path.basename(attachment_path))
-
-    if use_tls:
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            server.starttls()
-            if username and password:
-                server.login(username, password)
-            server.send_message(msg)
-    else:
-        with smtplib.SMTP_SSL(smtp_host, smtp_port) as server:
-            if username and password:
-                server.login(username, password)
-            server.send_message(msg)
+    working_days_month = business_days_in_month(d)
+    out = StringIO()
+    writer = csv.writer(out)
+    writer.writerow(CSV_HEADER)
 
+    tee = tmp_path = None
+    if archive_path:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(archive_path), suffix=".tmp")
+        tee = os.fdopen(fd, "w", newline="", encoding="utf-8")
 
-def _archive_sent_file(file_path: str) -> str:
-    folder = os.path.dirname(file_path)
-    sent_dir = os.path.join(folder, "sent")
-    os.makedirs(sent_dir, exist_ok=True)
+    rows_count = 0
+    try:
+        for r in iter_team_month_rows(manager_id, d):
+            writer.writerow(csv_row(r, working_days_month))
+            rows_count += 1
+            if out.tell() >= STREAM_CHUNK_SIZE:
+                chunk = out.getvalue()
+                out.seek(0)
+                out.truncate()
+                if tee:
+                    tee.write(chunk)
+                yield chunk
+
+        chunk = out.getvalue()
+        if tee:
+            tee.write(chunk)
+            tee.close()
+            os.replace(tmp_path, archive_path)
+            tmp_path = None
+            index_files(manager_id, month_bounds(d)[0], "CSV", [(archive_path, None)])
+        log.info("csv_export", manager_id=manager_id, rows=rows_count, archived=bool(archive_path))
+        yield chunk
+    finally:
+        # clientul s-a deconectat / eroare -> nu las fisiere partiale in arhiva
+        if tee and not tee.closed:
+            tee.close()
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def _gzip_chunks(chunks):
+    comp = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> format gzip
+    for chunk in chunks:
+        data = comp.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield comp.flush()
+
+
+def _wants_gzip() -> bool:
+    flag = request.args.get("gzip")
+    if flag is not None:
+        return flag.lower() in ("1", "true", "yes")
+    return request.accept_encodings["gzip"] > 0
+
+
+@bp.route("/exportAggregatedEmployeeData", methods=["GET"])
+@manager_required()
+def export_aggregated_employee_data():
+    """
+    Acelasi CSV ca /createAggregatedEmployeeData, dar trimis direct clientului pe masura
+    ce randurile sunt citite (memorie constanta, indiferent de marimea echipei).
+      ?archive=1  -> il scrie si in archive/YYYY-MM/manager_<id>/ (+ index)
+      ?gzip=1     -> Content-Encoding: gzip (implicit, daca clientul trimite Accept-Encoding: gzip)
+    Query-urile ruleaza in timpul stream-ului: apar in log-ul http_request la inchiderea
+    raspunsului, fara header Server-Timing.
+    """
+    manager_id = current_user().emp_id
+    today = date.today()
+    archive = request.args.get("archive", "0").lower() in ("1", "true", "yes")
+    archive_path = csv_archive_path(manager_id, today) if archive else None
 
-    base = os.path.basename(file_path)
-    dest = os.path.join(sent_dir, base)
+    body = _csv_chunks(manager_id, today, archive_path)
+    headers = {
+        "Content-Disposition": f"attachment; filename=aggregated_{today.strftime('%Y_%m')}.csv",
+        "Vary": "Accept-Encoding",
+        "X-Accel-Buffering": "no",
+    }
+    if _wants_gzip():
+        body = _gzip_chunks(body)
+        headers["Content-Encoding"] = "gzip"
 
-    if os.path.exists(dest):
-        name, ext = os.path.splitext(base)
-        dest = os.path.join(sent_dir, f"{name}_{int(time.time())}{ext}")
+    return Response(stream_with_context(body), mimetype="text/csv", headers=headers)
 
-    shutil.move(file_path, dest)
-    return dest
 
+# /sendAggregatedEmployeeData
 
+# --- helpers ---
 # --- endpoint ---
 @bp.route("/sendAggregatedEmployeeData", methods=["POST", "GET"])
 @manager_required()
@@ -232,17 +174,17 @@ def send_aggregated_employee_data():
     manager_id = manager.emp_id
 
     # caut cel mai recent CSV pt acest manager
-    csv_path = _find_latest_csv_for_manager(manager_id)
+    csv_path = latest_csv(manager_id)
     if not csv_path:
         return jsonify({"error": "No aggregated CSV found for manager"}), 404
 
-    # setari SMTP
-    smtp_host = os.getenv("SMTP_HOST", "smtp.gmail.com")
-    smtp_port = int(os.getenv("SMTP_PORT", "587"))
-    smtp_user = os.getenv("SMTP_USERNAME")
-    smtp_pass = os.getenv("SMTP_PASSWORD")
-    from_email = os.getenv("FROM_EMAIL", smtp_user)
-    use_tls = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
+    queued = EmailOutbox.query.filter(
+        EmailOutbox.manager_id == manager_id,
+        EmailOutbox.attachment_path == csv_path,
+        EmailOutbox.status.in_(("PENDING", "SENDING")),
+    ).first()
+    if queued:
+        return jsonify({"error": "CSV already queued for sending", "job_id": queued.job_id}), 409
 
     # subiect + continut
     subject = f"Aggregated Employee Data for Manager {manager.first_name} {manager.last_name}"
@@ -254,33 +196,36 @@ def send_aggregated_employee_data():
         f"Slip Salary App"
     )
 
-    # trimitere e-mail
-    _send_email_with_attachment(
+    # trimitere e-mail prin outbox (in fundal; ?mode=sync asteapta trimiterea)
+    job_id = enqueue(manager_id, [OutboxMessage(
         to_email=manager.email,
         subject=subject,
         body_text=body_text,
         attachment_path=csv_path,
-        from_email=from_email,
-        smtp_host=smtp_host,
-        smtp_port=smtp_port,
-        username=smtp_user,
-        password=smtp_pass,
-        use_tls=use_tls,
-    )
+        maintype="text",
+        subtype="csv",
+    )])
 
-    log.info("csv_send", to=manager.email, file=os.path.basename(csv_path))
+    log.info("csv_send", to=manager.email, file=os.path.basename(csv_path), job_id=job_id)
 
-    # arhivare dupa trimitere
-    archived_path = _archive_sent_file(csv_path)
+    if request.args.get("mode") == "sync":
+        # asteapta si daca mesajul a fost luat intre timp de dispatcher-ul din fundal
+        dispatcher().dispatch_job(job_id)
+        message = (job_summary(job_id, manager_id) or {"messages": [{}]})["messages"][0]
+        status = {"SENT": "sent", "FAILED": "failed"}.get(message.get("status"), "pending")
+        return jsonify({
+            "status": status,
+            "to": manager.email,
+            "job_id": job_id,
+            "file": csv_path,
+            "archived_to": message.get("archived_to"),
+            "error": message.get("last_error"),
+        }), 200
 
+    dispatcher().notify()
     return jsonify({
-        "status": "sent",
+        "status": "queued",
         "to": manager.email,
+        "job_id": job_id,
         "file": csv_path,
-        "archived_to": archived_path
-    }), 200
-
-
-    
-
-
+    }), 202
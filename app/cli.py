@@ -0,0 +1,107 @@
+import json
+
+import click
+from flask.cli import AppGroup
+
+from app.core.payroll import parse_month
+
+payroll_cli = AppGroup("payroll", help="Comenzi de intretinere pt payroll.")
+
+
+@payroll_cli.command("refresh-snapshot")
+@click.option("--month", help="Luna in format YYYY-MM (implicit luna curenta).")
+@click.option("--emp-id", "emp_ids", type=int, multiple=True, help="Doar pt acesti angajati.")
+def refresh_snapshot(month, emp_ids):
+    """Recalculeaza payroll_month_snapshot pt o luna."""
+    from app.core.payroll import refresh_month_snapshot
+
+    count = refresh_month_snapshot(parse_month(month), list(emp_ids) or None)
+    click.echo(f"refreshed {count} snapshot rows")
+
+
+@payroll_cli.command("seed-holidays")
+@click.option("--from-year", type=int, required=True)
+@click.option("--to-year", type=int, required=True)
+def seed_holidays_cmd(from_year, to_year):
+    """Adauga sarbatorile legale din Romania pt anii dati in tabela holidays."""
+    from app.core.work_calendar import seed_holidays
+
+    count = seed_holidays(range(from_year, to_year + 1))
+    click.echo(f"added {count} holidays")
+
+
+@payroll_cli.command("import")
+@click.argument("kind", type=click.Choice(["bonuses", "vacations"]))
+@click.argument("file", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(["csv", "ndjson"]),
+              help="Implicit din extensia fisierului (.ndjson / .jsonl -> ndjson, altfel csv).")
+@click.option("--atomic", is_flag=True, help="Nu incarca nimic daca exista randuri invalide.")
+def import_file(kind, file, fmt, atomic):
+    """Importa bonusuri / concedii dintr-un fisier CSV sau NDJSON."""
+    from app.core.bulk_import import import_rows
+
+    fmt = fmt or ("ndjson" if file.endswith((".ndjson", ".jsonl")) else "csv")
+    with open(file, encoding="utf-8-sig", newline="") as f:
+        result = import_rows(kind, f, fmt=fmt, atomic=atomic)
+    click.echo(json.dumps(result, indent=2))
+    if result["status"] != "ok":
+        raise SystemExit(1)
+
+
+@payroll_cli.command("dispatch-emails")
+def dispatch_emails():
+    """Ruleaza dispatcher-ul de email (outbox) in prim-plan."""
+    from app.core.outbox import dispatcher
+
+    click.echo("email dispatcher running (Ctrl+C to stop)")
+    dispatcher().run_forever()
+
+
+@payroll_cli.command("rebuild-archive-index")
+def rebuild_archive_index():
+    """Reconstruieste indexul archive_files din folderul archive/."""
+    from app.core.archive import rebuild_index
+
+    counts = rebuild_index()
+    click.echo(f"archive index rebuilt: {counts}")
+
+
+@payroll_cli.command("run-month")
+@click.option("--month", help="Luna in format YYYY-MM (implicit luna curenta).")
+def run_month(month):
+    """Genereaza CSV-urile si payslip-urile tuturor managerilor pt o luna."""
+    from app.core.payroll_run import scheduler
+
+    sched = scheduler()
+    run = sched.execute(sched.create(parse_month(month)))
+    click.echo(json.dumps(run.summary(with_managers=False), indent=2))
+
+
+@payroll_cli.command("enqueue-run")
+@click.option("--month", help="Luna in format YYYY-MM (implicit luna curenta).")
+@click.option("--unit", type=click.Choice(["manager", "employee"]), default="manager",
+              help="Granularitatea unitatilor PDF.")
+@click.option("--send", is_flag=True, help="Trimite payslip-urile dupa generare.")
+def enqueue_payroll_run(month, unit, send):
+    """Pune rularea pe o luna in payroll_jobs, pt `flask payroll worker`."""
+    from app.core.payroll_jobs import enqueue_run
+
+    run_id, units = enqueue_run(parse_month(month), unit=unit, send=send)
+    click.echo(f"run {run_id}: {units} units queued")
+
+
+@payroll_cli.command("worker")
+@click.option("--concurrency", type=int, help="Unitati procesate simultan (implicit PAYROLL_WORKER_CONCURRENCY).")
+@click.option("--exit-when-idle", is_flag=True, help="Iese cand nu mai sunt unitati de revendicat.")
+def payroll_worker(concurrency, exit_when_idle):
+    """Ruleaza un worker pt payroll_jobs (se pot porni oricati, pe orice nod)."""
+    from flask import current_app
+
+    from app.core.payroll_jobs import PayrollWorker
+
+    worker = PayrollWorker(current_app._get_current_object(), concurrency=concurrency)
+    click.echo(f"payroll worker {worker.worker_id} running (Ctrl+C to stop)")
+    try:
+        worker.run(exit_when_idle=exit_when_idle)
+    except KeyboardInterrupt:
+        worker.stop()
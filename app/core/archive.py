@@ -0,0 +1,203 @@
+import fcntl
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from datetime import date, datetime
+
+from sqlalchemy.dialects.postgresql import insert
+
+from app import db
+from app.core.metrics import stage
+from app.database.models import ArchiveFile, Employee
+
+
+# mutam fisierele trimise intr un subdirector sent
+def archive_sent_file(path: str) -> str:
+    folder = os.path.dirname(path)
+    sent_dir = os.path.join(folder, "sent")
+    os.makedirs(sent_dir, exist_ok=True)
+
+    base = os.path.basename(path)
+    dest = os.path.join(sent_dir, base)
+
+    if os.path.exists(dest):
+        name, ext = os.path.splitext(base)
+        dest = os.path.join(sent_dir, f"{name}_{int(time.time())}{ext}")
+
+    with stage("archive_move"):
+        shutil.move(path, dest)
+    return dest
+
+
+# manifestul din folderul pdfs/: fisier -> {emp_id, email}
+MANIFEST_NAME = "manifest.json"
+
+
+def read_manifest(folder: str) -> dict[str, dict]:
+    try:
+        with open(os.path.join(folder, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def update_manifest(folder: str, entries: dict[str, dict]) -> dict[str, dict]:
+    """
+    adauga/actualizeaza intrari in manifest; scriere atomica (temp + rename). Citirea si
+    scrierea se fac sub flock pe manifest.json.lock: unitatile per angajat ale aceluiasi
+    manager (alte thread-uri / procese) nu isi mai suprascriu intrarile
+    """
+    with open(os.path.join(folder, MANIFEST_NAME + ".lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        manifest = read_manifest(folder)
+        manifest.update(entries)
+
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, os.path.join(folder, MANIFEST_NAME))
+    return manifest
+
+
+# --- index (tabela archive_files) ---
+def archive_root() -> str:
+    return os.path.join(os.getcwd(), "archive")
+
+
+def index_files(manager_id: int, month: date, kind: str, files: list[tuple[str, int | None]],
+                fingerprints: dict[str, str] | None = None):
+    """inregistreaza fisiere noi (sau regenerate) ca PENDING; fingerprints: path -> amprenta"""
+    if not files:
+        return
+    fingerprints = fingerprints or {}
+    stmt = insert(ArchiveFile).values([
+        {"manager_id": manager_id, "month": month, "kind": kind, "path": path,
+         "emp_id": emp_id, "status": "PENDING", "fingerprint": fingerprints.get(path)}
+        for path, emp_id in files
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ArchiveFile.path],
+        set_={"emp_id": stmt.excluded.emp_id, "status": "PENDING", "fingerprint": stmt.excluded.fingerprint,
+              "created_at": db.func.now(), "sent_at": None},
+    )
+    db.session.execute(stmt)
+    db.session.commit()
+
+
+def mark_sent(path: str, archived_to: str):
+    """fisierul a fost trimis si mutat in sent/"""
+    db.session.execute(
+        db.update(ArchiveFile)
+        .where(ArchiveFile.path == path)
+        .values(path=archived_to, status="SENT", sent_at=db.func.now())
+    )
+    db.session.commit()
+
+
+def latest_csv(manager_id: int) -> str | None:
+    """cel mai recent CSV netrimis al managerului"""
+    return (
+        db.session.query(ArchiveFile.path)
+        .filter_by(manager_id=manager_id, kind="CSV", status="PENDING")
+        .order_by(ArchiveFile.month.desc(), ArchiveFile.created_at.desc())
+        .limit(1)
+        .scalar()
+    )
+
+
+def pending_pdfs(manager_id: int, month: date | None = None) -> list[tuple[str, int | None]]:
+    """PDF-urile netrimise (path, emp_id), optional doar pt o luna"""
+    q = db.session.query(ArchiveFile.path, ArchiveFile.emp_id).filter_by(
+        manager_id=manager_id, kind="PDF", status="PENDING"
+    )
+    if month is not None:
+        q = q.filter(ArchiveFile.month == month)
+    return [tuple(r) for r in q.order_by(ArchiveFile.month, ArchiveFile.path)]
+
+
+def latest_csv_fingerprint(manager_id: int, month: date) -> str | None:
+    """amprenta ultimului CSV agregat al managerului pt luna data (trimis sau nu); None daca lipseste"""
+    return (
+        db.session.query(ArchiveFile.fingerprint)
+        .filter_by(manager_id=manager_id, month=month, kind="CSV")
+        .order_by(ArchiveFile.created_at.desc())
+        .limit(1)
+        .scalar()
+    )
+
+
+def payslip_fingerprints(manager_id: int, month: date) -> dict[int, tuple[str | None, str]]:
+    """ultimul PDF generat pt fiecare angajat in luna data: emp_id -> (amprenta, path)"""
+    rows = (
+        db.session.query(ArchiveFile.emp_id, ArchiveFile.fingerprint, ArchiveFile.path)
+        .filter(ArchiveFile.manager_id == manager_id, ArchiveFile.month == month,
+                ArchiveFile.kind == "PDF", ArchiveFile.emp_id.isnot(None))
+        .distinct(ArchiveFile.emp_id)
+        .order_by(ArchiveFile.emp_id, ArchiveFile.created_at.desc())
+    )
+    return {emp_id: (fingerprint, path) for emp_id, fingerprint, path in rows}
+
+
+def _file_sha256(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+_MANAGER_DIR = re.compile(r"^(\d{4})-(\d{2})/manager_(\d+)$")
+
+
+def rebuild_index(root: str | None = None) -> dict:
+    """reconstruieste archive_files din arborele archive/ existent"""
+    root = root or archive_root()
+    rows = []
+    for manager_dir in glob.glob(os.path.join(root, "*", "manager_*")):
+        m = _MANAGER_DIR.match(os.path.relpath(manager_dir, root).replace(os.sep, "/"))
+        if not m:
+            continue
+        month = date(int(m.group(1)), int(m.group(2)), 1)
+        manager_id = int(m.group(3))
+        pdf_dir = os.path.join(manager_dir, "pdfs")
+        manifest = read_manifest(pdf_dir)
+
+        found = [
+            ("CSV", "PENDING", p, {}) for p in glob.glob(os.path.join(manager_dir, "aggregated_*.csv"))
+        ] + [
+            ("CSV", "SENT", p, {}) for p in glob.glob(os.path.join(manager_dir, "sent", "aggregated_*.csv"))
+        ] + [
+            ("PDF", "PENDING", p, manifest.get(os.path.basename(p), {}))
+            for p in glob.glob(os.path.join(pdf_dir, "*.pdf"))
+        ] + [
+            ("PDF", "SENT", p, manifest.get(os.path.basename(p), {}))
+            for p in glob.glob(os.path.join(pdf_dir, "sent", "*.pdf"))
+        ]
+        for kind, status, path, entry in found:
+            mtime = datetime.fromtimestamp(os.path.getmtime(path))
+            fingerprint = entry.get("fingerprint") if kind == "PDF" else _file_sha256(path)
+            rows.append({
+                "manager_id": manager_id, "month": month, "kind": kind, "path": path,
+                "emp_id": entry.get("emp_id"), "status": status, "fingerprint": fingerprint,
+                "created_at": mtime, "sent_at": mtime if status == "SENT" else None,
+            })
+
+    # folderele managerilor stersi din employees nu mai pot fi indexate (FK)
+    known = {emp_id for (emp_id,) in db.session.query(Employee.emp_id)}
+    rows = [
+        r | {"emp_id": r["emp_id"] if r["emp_id"] in known else None}
+        for r in rows if r["manager_id"] in known
+    ]
+
+    db.session.execute(db.delete(ArchiveFile))
+    if rows:
+        db.session.execute(db.insert(ArchiveFile), rows)
+    db.session.commit()
+
+    counts = {}
+    for r in rows:
+        key = f"{r['kind']}_{r['status']}".lower()
+        counts[key] = counts.get(key, 0) + 1
+    return counts
@@ -1,8 +1,12 @@
+import hashlib
 import os
 import time
 import jwt
 from functools import wraps
+from typing import NamedTuple
 from flask import request, jsonify, g, current_app
+from sqlalchemy import event, inspect
+from app.core.cache import TTLCache
 from app.database.models import Employee
 
 def _secret() -> str:
@@ -24,12 +28,108 @@ def generate_token(employee: Employee) -> str:
     }
     return jwt.encode(payload, _secret(), algorithm="HS256")
 
+
+# tokenuri deja verificate: sha256(token) -> (amprenta SECRET_KEY, claims), pana la `exp`
+token_cache = TTLCache(max_size=int(os.getenv("TOKEN_CACHE_SIZE", "50000")))
+
+
+def _secret_fingerprint(secret: str) -> bytes:
+    return hashlib.sha256(secret.encode()).digest()
+
+
 def _decode_token(token: str) -> dict:
-    return jwt.decode(token, _secret(), algorithms=["HS256"], leeway=10)
+    """
+    verifica semnatura + claims; rezultatul e pastrat pana la `exp`-ul tokenului.
+    Dupa `exp` (sau daca s-a schimbat SECRET_KEY) tokenul trece din nou prin jwt.decode.
+    """
+    secret = _secret()
+    fingerprint = _secret_fingerprint(secret)
+    key = hashlib.sha256(token.encode()).digest()
+
+    cached = token_cache.get(key)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+
+    data = jwt.decode(token, secret, algorithms=["HS256"], leeway=10)
+    exp = data.get("exp")
+    if isinstance(exp, (int, float)) and exp > time.time():
+        token_cache.put(key, (fingerprint, data), expires_at=exp)
+    return data
+
+class Principal(NamedTuple):
+    """userul autentificat (fara obiect ORM), pus pe g.current_user"""
+    emp_id: int
+    role: str
+    is_active: bool
+    first_name: str
+    last_name: str
+    email: str
+
+
+# userii autentificati: emp_id -> Principal, cu TTL. Invalidat explicit cand se schimba
+# rolul / is_active / datele angajatului; TTL-ul limiteaza cat de vechi pot fi datele
+# pt modificari facute din alt proces
+principal_cache = TTLCache(max_size=int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000")))
+PRINCIPAL_CACHE_TTL_SEC = float(os.getenv("PRINCIPAL_CACHE_TTL_SEC", "60"))
+
+_PRINCIPAL_FIELDS = ("role", "is_active", "first_name", "last_name", "email")
+
+
+@event.listens_for(Employee, "after_update")
+def _invalidate_on_update(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in _PRINCIPAL_FIELDS):
+        principal_cache.invalidate(target.emp_id)
+
+
+@event.listens_for(Employee, "after_delete")
+def _invalidate_on_delete(mapper, connection, target):
+    principal_cache.invalidate(target.emp_id)
+
+
+def load_principal(emp_id: int) -> Principal | None:
+    """userul activ cu emp_id, din cache sau (la miss) din baza de date"""
+    principal = principal_cache.get(emp_id)
+    if principal is not None:
+        return principal
+
+    emp = Employee.query.filter_by(emp_id=emp_id, is_active=True).first()
+    if not emp:
+        return None
+    principal = Principal(emp.emp_id, emp.role, emp.is_active, emp.first_name, emp.last_name, emp.email)
+    principal_cache.put(emp_id, principal, expires_at=time.time() + PRINCIPAL_CACHE_TTL_SEC)
+    return principal
+
 
 def current_user():
     return getattr(g, "current_user", None)
 
+def _authenticate():
+    """
+    Bearer token -> (Principal, None) sau (None, raspuns de eroare 401)
+    """
+    auth = request.headers.get("Authorization", "")
+    if not auth.startswith("Bearer "):
+        return None, (jsonify({"error": "Missing Bearer token"}), 401)
+    token = auth.split(" ", 1)[1].strip()
+
+    try:
+        data = _decode_token(token)
+    except jwt.ExpiredSignatureError:
+        return None, (jsonify({"error": "Token has expired"}), 401)
+    except jwt.InvalidSignatureError:
+        return None, (jsonify({"error": "Invalid token", "detail": "signature failed"}), 401)
+    except jwt.DecodeError:
+        return None, (jsonify({"error": "Invalid token", "detail": "malformed"}), 401)
+    except jwt.InvalidTokenError as e:
+        return None, (jsonify({"error": "Invalid token", "detail": str(e)}), 401)
+
+    emp_id = int(data.get("sub"))
+    emp = load_principal(emp_id)
+    if not emp:
+        return None, (jsonify({"error": "User not found or inactive"}), 401)
+    return emp, None
+
 def manager_required(require_match_with_param: bool = True):
     """
     verifica:
@@ -41,26 +141,9 @@ def manager_required(require_match_with_param: bool = True):
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
-            auth = request.headers.get("Authorization", "")
-            if not auth.startswith("Bearer "):
-                return jsonify({"error": "Missing Bearer token"}), 401
-            token = auth.split(" ", 1)[1].strip()
-
-            try:
-                data = _decode_token(token)
-            except jwt.ExpiredSignatureError:
-                return jsonify({"error": "Token has expired"}), 401
-            except jwt.InvalidSignatureError:
-                return jsonify({"error": "Invalid token", "detail": "signature failed"}), 401
-            except jwt.DecodeError:
-                return jsonify({"error": "Invalid token", "detail": "malformed"}), 401
-            except jwt.InvalidTokenError as e:
-                return jsonify({"error": "Invalid token", "detail": str(e)}), 401
-
-            emp_id = int(data.get("sub"))
-            emp = Employee.query.filter_by(emp_id=emp_id, is_active=True).first()
-            if not emp:
-                return jsonify({"error": "User not found or inactive"}), 401
+            emp, error = _authenticate()
+            if error:
+                return error
             if emp.role != "MANAGER":
                 return jsonify({"error": "Manager role required"}), 403
 
@@ -75,4 +158,20 @@ def manager_required(require_match_with_param: bool = True):
         return wrapper
     return decorator
 
+def admin_required():
+    """
+    ca manager_required, dar pt rolul ADMIN (operatii la nivel de companie)
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            emp, error = _authenticate()
+            if error:
+                return error
+            if emp.role != "ADMIN":
+                return jsonify({"error": "Admin role required"}), 403
 
+            g.current_user = emp
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
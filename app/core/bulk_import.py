@@ -0,0 +1,349 @@
+import csv
+import io
+import json
+import time
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Callable, Iterable, Iterator, NamedTuple, TextIO
+
+from app import db
+from app.core.logging import get_logger
+
+log = get_logger("bulk_import")
+
+# import in masa pt bonuses / vacations (CSV sau NDJSON):
+#   1. fisierul e citit si validat pe loturi de BATCH_SIZE randuri (memorie constanta)
+#   2. fiecare lot valid intra cu COPY intr-o tabela temporara (staging)
+#   3. verificarile care au nevoie de baza (angajat inexistent, concedii suprapuse) -> un query
+#   4. merge-ul in tabela finala - un singur statement (UPDATE + INSERT in CTE-uri)
+# Triggerele existente invalideaza randurile din payroll_month_snapshot afectate.
+
+BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+
+
+class BulkImportError(ValueError):
+    """fisier de import invalid in ansamblu (format necunoscut, coloane lipsa)"""
+
+
+class ImportSpec(NamedTuple):
+    kind: str
+    columns: tuple[str, ...]                          # coloanele din fisier (si din staging, dupa `line`)
+    parse: Callable[[dict], tuple[tuple, list[str]]]  # rand brut -> (valori, erori)
+    stage_ddl: str
+    checks: tuple[tuple[str, str], ...]               # (SELECT line FROM import_stage ..., mesaj)
+    merge_sql: str                                    # intoarce (updated, inserted)
+
+
+# --- validare ---
+def _emp_id(value, errors: list[str]) -> int | None:
+    try:
+        emp_id = int(str(value).strip())
+    except (TypeError, ValueError):
+        errors.append("emp_id must be an integer")
+        return None
+    if emp_id <= 0:
+        errors.append("emp_id must be positive")
+    return emp_id
+
+
+def _date(value, field: str, errors: list[str]) -> date | None:
+    try:
+        return date.fromisoformat(str(value).strip())
+    except (TypeError, ValueError):
+        errors.append(f"{field} must be YYYY-MM-DD")
+        return None
+
+
+def _month(value, errors: list[str]) -> date | None:
+    """YYYY-MM sau YYYY-MM-DD -> prima zi din luna"""
+    text = str(value or "").strip()
+    try:
+        if len(text) == 7:
+            return datetime.strptime(text, "%Y-%m").date()
+        return date.fromisoformat(text).replace(day=1)
+    except ValueError:
+        errors.append("effective_month must be YYYY-MM or YYYY-MM-DD")
+        return None
+
+
+def _parse_bonus(raw: dict) -> tuple[tuple, list[str]]:
+    errors: list[str] = []
+    emp_id = _emp_id(raw.get("emp_id"), errors)
+
+    name = str(raw.get("name") or "").strip()
+    if not name or len(name) > 100:
+        errors.append("name is required (max 100 characters)")
+
+    amount = None
+    try:
+        amount = Decimal(str(raw.get("amount")).strip()).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        if not Decimal(0) <= amount < Decimal(10) ** 10:
+            errors.append("amount must be between 0 and 9999999999.99")
+    except (InvalidOperation, ValueError):
+        errors.append("amount must be a number")
+
+    month = _month(raw.get("effective_month"), errors)
+    return (emp_id, name, amount, month), errors
+
+
+def _parse_vacation(raw: dict) -> tuple[tuple, list[str]]:
+    errors: list[str] = []
+    emp_id = _emp_id(raw.get("emp_id"), errors)
+    start = _date(raw.get("start_date"), "start_date", errors)
+    end = _date(raw.get("end_date"), "end_date", errors)
+    if start and end and end < start:
+        errors.append("end_date must not be before start_date")
+
+    vac_type = str(raw.get("type") or "PAID").strip().upper()
+    if vac_type not in ("PAID", "UNPAID"):
+        errors.append("type must be PAID or UNPAID")
+    return (emp_id, start, end, vac_type), errors
+
+
+_MISSING_EMPLOYEE = ("""
+    SELECT s.line FROM import_stage s
+    WHERE NOT EXISTS (SELECT 1 FROM employees e WHERE e.emp_id = s.emp_id)
+""", "employee not found")
+
+BONUSES = ImportSpec(
+    kind="bonuses",
+    columns=("emp_id", "name", "amount", "effective_month"),
+    parse=_parse_bonus,
+    stage_ddl="""
+        CREATE TEMP TABLE import_stage (
+            line integer PRIMARY KEY, emp_id integer NOT NULL, name varchar(100) NOT NULL,
+            amount numeric(12, 2) NOT NULL, effective_month date NOT NULL, rejected boolean NOT NULL DEFAULT false
+        ) ON COMMIT DROP
+    """,
+    checks=(_MISSING_EMPLOYEE,),
+    # cheia unui bonus: (angajat, luna, nume); acelasi rand de mai multe ori in fisier -> ultimul castiga
+    merge_sql="""
+        WITH src AS (
+            SELECT DISTINCT ON (emp_id, effective_month, name) emp_id, name, amount, effective_month
+            FROM import_stage WHERE NOT rejected
+            ORDER BY emp_id, effective_month, name, line DESC
+        ),
+        updated AS (
+            UPDATE bonuses b SET amount = src.amount
+            FROM src
+            WHERE b.emp_id = src.emp_id AND b.effective_month = src.effective_month AND b.name = src.name
+              AND b.amount <> src.amount
+            RETURNING 1
+        ),
+        inserted AS (
+            INSERT INTO bonuses (emp_id, name, amount, effective_month)
+            SELECT src.emp_id, src.name, src.amount, src.effective_month FROM src
+            WHERE NOT EXISTS (
+                SELECT 1 FROM bonuses b
+                WHERE b.emp_id = src.emp_id AND b.effective_month = src.effective_month AND b.name = src.name
+            )
+            RETURNING 1
+        )
+        SELECT (SELECT count(*) FROM updated), (SELECT count(*) FROM inserted)
+    """,
+)
+
+VACATIONS = ImportSpec(
+    kind="vacations",
+    columns=("emp_id", "start_date", "end_date", "type"),
+    parse=_parse_vacation,
+    stage_ddl="""
+        CREATE TEMP TABLE import_stage (
+            line integer PRIMARY KEY, emp_id integer NOT NULL, start_date date NOT NULL,
+            end_date date NOT NULL, type varchar(12) NOT NULL, rejected boolean NOT NULL DEFAULT false
+        ) ON COMMIT DROP
+    """,
+    checks=(
+        _MISSING_EMPLOYEE,
+        # acelasi interval exact = actualizare; orice alta suprapunere ar numara zilele de doua ori
+        ("""
+            SELECT s.line FROM import_stage s
+            WHERE EXISTS (
+                SELECT 1 FROM vacations v
+                WHERE v.emp_id = s.emp_id
+                  AND daterange(v.start_date, v.end_date, '[]') && daterange(s.start_date, s.end_date, '[]')
+                  AND (v.start_date, v.end_date) <> (s.start_date, s.end_date)
+            )
+        """, "overlaps an existing vacation"),
+        ("""
+            SELECT s.line FROM import_stage s
+            WHERE EXISTS (
+                SELECT 1 FROM import_stage o
+                WHERE o.emp_id = s.emp_id AND o.line <> s.line AND NOT o.rejected
+                  AND daterange(o.start_date, o.end_date, '[]') && daterange(s.start_date, s.end_date, '[]')
+                  AND (o.start_date, o.end_date) <> (s.start_date, s.end_date)
+            )
+        """, "overlaps another vacation in this file"),
+    ),
+    merge_sql="""
+        WITH src AS (
+            SELECT DISTINCT ON (emp_id, start_date, end_date) emp_id, start_date, end_date, type
+            FROM import_stage WHERE NOT rejected
+            ORDER BY emp_id, start_date, end_date, line DESC
+        ),
+        updated AS (
+            UPDATE vacations v SET type = src.type
+            FROM src
+            WHERE v.emp_id = src.emp_id AND v.start_date = src.start_date AND v.end_date = src.end_date
+              AND v.type <> src.type
+            RETURNING 1
+        ),
+        inserted AS (
+            INSERT INTO vacations (emp_id, start_date, end_date, type)
+            SELECT src.emp_id, src.start_date, src.end_date, src.type FROM src
+            WHERE NOT EXISTS (
+                SELECT 1 FROM vacations v
+                WHERE v.emp_id = src.emp_id AND v.start_date = src.start_date AND v.end_date = src.end_date
+            )
+            RETURNING 1
+        )
+        SELECT (SELECT count(*) FROM updated), (SELECT count(*) FROM inserted)
+    """,
+)
+
+SPECS = {spec.kind: spec for spec in (BONUSES, VACATIONS)}
+
+
+# --- citire ---
+def _read_csv(stream: TextIO, required: tuple[str, ...]) -> Iterator[tuple[int, dict]]:
+    reader = csv.DictReader(stream)
+    missing = [c for c in required if c not in (reader.fieldnames or ())]
+    if missing:
+        raise BulkImportError(f"missing CSV columns: {', '.join(missing)}")
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _read_ndjson(stream: TextIO) -> Iterator[tuple[int, dict | None]]:
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_no, row if isinstance(row, dict) else None
+
+
+def read_rows(stream: TextIO, fmt: str, required: tuple[str, ...] = ()) -> Iterator[tuple[int, dict | None]]:
+    """(numarul liniei, rand brut) din CSV (cu header) sau NDJSON; None = linie NDJSON invalida"""
+    if fmt == "csv":
+        return _read_csv(stream, required)
+    if fmt == "ndjson":
+        return _read_ndjson(stream)
+    raise BulkImportError("format must be csv or ndjson")
+
+
+def _batches(rows: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# --- import ---
+class _Report:
+    def __init__(self):
+        self.total = 0
+        self.rejected = 0
+        self.errors: list[dict] = []
+
+    def reject(self, line: int, errors: list[str]):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "errors": errors})
+
+
+def _copy(cursor, spec: ImportSpec, rows: list[tuple]):
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    buf.seek(0)
+    cursor.copy_expert(f"COPY import_stage (line, {', '.join(spec.columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+
+
+def import_rows(kind: str, stream: TextIO, fmt: str = "csv", atomic: bool = False) -> dict:
+    """
+    importa bonusuri / concedii din stream; randurile invalide sunt raportate (linie + motive),
+    cele valide sunt incarcate. atomic=True -> la orice eroare nu se incarca nimic.
+    """
+    spec = SPECS.get(kind)
+    if spec is None:
+        raise BulkImportError(f"unknown import kind: {kind}")
+
+    report = _Report()
+    timings = {"validate_ms": 0.0, "copy_ms": 0.0, "check_ms": 0.0, "merge_ms": 0.0}
+    t_start = time.perf_counter()
+
+    db.session.execute(db.text(spec.stage_ddl))
+    cursor = db.session.connection().connection.driver_connection.cursor()
+    try:
+        required = tuple(c for c in spec.columns if c != "type")  # type: implicit PAID
+        for batch in _batches(read_rows(stream, fmt, required), BATCH_SIZE):
+            t0 = time.perf_counter()
+            valid = []
+            for line, raw in batch:
+                report.total += 1
+                if raw is None:
+                    report.reject(line, ["invalid JSON object"])
+                    continue
+                values, errors = spec.parse(raw)
+                if errors:
+                    report.reject(line, errors)
+                else:
+                    valid.append((line, *values))
+            t1 = time.perf_counter()
+            if valid:
+                _copy(cursor, spec, valid)
+            timings["validate_ms"] += (t1 - t0) * 1000
+            timings["copy_ms"] += (time.perf_counter() - t1) * 1000
+
+        t0 = time.perf_counter()
+        for sql, message in spec.checks:
+            lines = db.session.execute(db.text(
+                f"UPDATE import_stage SET rejected = true WHERE NOT rejected AND line IN ({sql}) RETURNING line"
+            )).scalars().all()
+            for line in sorted(lines):
+                report.reject(line, [message])
+        timings["check_ms"] = (time.perf_counter() - t0) * 1000
+
+        updated = inserted = 0
+        if not (atomic and report.rejected):
+            t0 = time.perf_counter()
+            updated, inserted = db.session.execute(db.text(spec.merge_sql)).one()
+            timings["merge_ms"] = (time.perf_counter() - t0) * 1000
+    except BaseException:
+        db.session.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    if atomic and report.rejected:
+        db.session.rollback()
+    else:
+        db.session.commit()
+
+    elapsed = time.perf_counter() - t_start
+    merged = not (atomic and report.rejected)
+    report.errors.sort(key=lambda e: e["line"])
+    result = {
+        "kind": kind,
+        "status": "ok" if merged else "rejected",
+        "rows": report.total,
+        "rejected": report.rejected,
+        "inserted": inserted,
+        "updated": updated,
+        # neschimbate = identice cu ce era deja in baza sau duplicate in fisier
+        "unchanged": report.total - report.rejected - inserted - updated if merged else 0,
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "rows_per_sec": round(report.total / elapsed, 1) if elapsed > 0 else None,
+        "timings": {k: round(v, 1) for k, v in timings.items()},
+        "errors": report.errors,
+        "errors_truncated": report.rejected > len(report.errors),
+    }
+    log.info("bulk_import", **{k: v for k, v in result.items() if k not in ("errors", "timings")})
+    return result
@@ -0,0 +1,163 @@
+import csv
+import hashlib
+import os
+import tempfile
+from datetime import date
+from io import StringIO
+from typing import Callable
+
+from app.core.archive import index_files, payslip_fingerprints, read_manifest, update_manifest
+from app.core.metrics import stage
+from app.core.payroll import business_days_in_month
+from app.core.payroll_row import PayrollRow
+from app.core.payslip_pdf import payslip_fingerprint, render_payslips
+from app.core.payslip_zip import ZipEntry, zip_entry
+
+# fisierele lunare ale unui manager, in archive/YYYY-MM/manager_<id>/:
+#   aggregated_YYYY_MM.csv  +  pdfs/<first>_<last>_<emp_id>_YYYY_MM.pdf (+ manifest.json)
+
+CSV_HEADER = [
+    "Employee name",
+    "Salary to be paid (current month)",
+    "Working days in month",
+    "Vacation days (taken)",
+    "Additional bonuses (current month)"
+]
+
+
+def csv_row(r: PayrollRow, working_days: int) -> list:
+    return [
+        f"{r.first_name} {r.last_name}",
+        f"{r.salary_to_pay:.2f}",
+        working_days,
+        r.vacation_days,
+        f"{r.bonus_total:.2f}"
+    ]
+
+
+def manager_dir(manager_id: int, d: date) -> str:
+    """archive/YYYY-MM/manager_<id> (creat daca lipseste)"""
+    path = os.path.join(os.getcwd(), "archive", d.strftime("%Y-%m"), f"manager_{manager_id}")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def csv_archive_path(manager_id: int, d: date) -> str:
+    return os.path.join(manager_dir(manager_id, d), f"aggregated_{d.strftime('%Y_%m')}.csv")
+
+
+def payslip_dir(manager_id: int, d: date) -> str:
+    path = os.path.join(manager_dir(manager_id, d), "pdfs")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def payslip_name(r: PayrollRow, d: date) -> str:
+    # emp_id in nume -> fara coliziuni intre angajati cu acelasi nume
+    return f"{r.first_name}_{r.last_name}_{r.emp_id}_{d.strftime('%Y_%m')}.pdf"
+
+
+def team_csv(d: date, rows: list[PayrollRow]) -> str:
+    """continutul CSV-ului agregat al echipei pt luna lui d"""
+    working_days_month = business_days_in_month(d)
+    out = StringIO()
+    writer = csv.writer(out)
+    writer.writerow(CSV_HEADER)
+    for r in rows:
+        writer.writerow(csv_row(r, working_days_month))
+    return out.getvalue()
+
+
+def csv_fingerprint(content: str) -> str:
+    """amprenta CSV-ului = sha256 pe bytes-ii fisierului (se poate recalcula si din arhiva)"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def write_team_csv(manager_id: int, d: date, rows: list[PayrollRow], content: str | None = None) -> str:
+    """scrie CSV-ul agregat al echipei pt luna lui d (temp + rename) si il indexeaza, cu amprenta"""
+    if content is None:
+        content = team_csv(d, rows)
+
+    file_path = csv_archive_path(manager_id, d)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    index_files(manager_id, d.replace(day=1), "CSV", [(file_path, None)],
+                {file_path: csv_fingerprint(content)})
+    return file_path
+
+
+def plan_payslips(manager_id: int, d: date, rows: list[PayrollRow],
+                  force: bool = False) -> tuple[list[PayrollRow], list[PayrollRow]]:
+    """
+    (de generat, neschimbate): un payslip e neschimbat daca ultimul PDF al angajatului
+    din luna lui d are aceeasi amprenta a input-urilor si fisierul inca exista
+    """
+    if force:
+        return rows, []
+    current = payslip_fingerprints(manager_id, d.replace(day=1))
+    todo, unchanged = [], []
+    for r in rows:
+        fingerprint, path = current.get(r.emp_id, (None, None))
+        if fingerprint == payslip_fingerprint(r) and os.path.exists(path):
+            unchanged.append(r)
+        else:
+            todo.append(r)
+    return todo, unchanged
+
+
+def render_team_payslips(manager_id: int, d: date, rows: list[PayrollRow], workers: int = 1,
+                         progress: Callable[[PayrollRow, dict], None] | None = None,
+                         ) -> tuple[list[tuple[PayrollRow, str]], list[dict]]:
+    """
+    randeaza payslip-urile pt rows (luna lui d), apoi actualizeaza manifestul si indexul arhivei;
+    intoarce (jobs, timings) - jobs = [(row, path)], timings in aceeasi ordine (cu `error` pt
+    payslip-urile care au esuat; acestea nu ajung in manifest / index).
+    progress(row, timing) e apelat dupa fiecare payslip randat (sau esuat)
+    """
+    pdf_dir = payslip_dir(manager_id, d)
+    jobs = [(r, os.path.join(pdf_dir, payslip_name(r, d))) for r in rows]
+    on_done = (lambda i, t: progress(jobs[i][0], t)) if progress else None
+    with stage("pdf_batch"):
+        timings = render_payslips(jobs, workers, on_done)
+
+    # manifest (fisier -> angajat, amprenta) + indexul arhivei, folosite la trimitere / regenerare
+    done = [(r, path, t) for (r, path), t in zip(jobs, timings) if "error" not in t]
+    fingerprints = {path: payslip_fingerprint(r) for r, path, _ in done}
+    if done:
+        update_manifest(pdf_dir, {
+            os.path.basename(path): {"emp_id": r.emp_id, "email": r.email, "fingerprint": fingerprints[path],
+                                     "size": t["size"], "crc32": t["crc32"]}
+            for r, path, t in done
+        })
+    index_files(manager_id, d.replace(day=1), "PDF", [(path, r.emp_id) for r, path, _ in done], fingerprints)
+    return jobs, timings
+
+
+def render_failures(jobs: list[tuple[PayrollRow, str]], timings: list[dict]) -> list[dict]:
+    """payslip-urile care au esuat in render_team_payslips: [{emp_id, error}]"""
+    return [{"emp_id": r.emp_id, "error": t["error"]} for (r, _), t in zip(jobs, timings) if "error" in t]
+
+
+def payslip_zip_entries(manager_id: int, d: date) -> list[ZipEntry]:
+    """ultimul payslip al fiecarui angajat din luna lui d (din pdfs/ sau pdfs/sent/), ca intrari ZIP"""
+    manifests: dict[str, dict] = {}
+    entries = []
+    for emp_id, (_, path) in sorted(payslip_fingerprints(manager_id, d.replace(day=1)).items()):
+        if not os.path.exists(path):
+            continue
+        pdf_dir = os.path.dirname(path)
+        if os.path.basename(pdf_dir) == "sent":
+            pdf_dir = os.path.dirname(pdf_dir)
+        if pdf_dir not in manifests:
+            manifests[pdf_dir] = read_manifest(pdf_dir)
+        meta = manifests[pdf_dir].get(os.path.basename(path), {})
+        entries.append(zip_entry(path, crc=meta.get("crc32"), size=meta.get("size")))
+    return entries
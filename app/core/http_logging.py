@@ -1,24 +1,79 @@
 import time
 from flask import request
 from .logging import get_logger
+from .metrics import observe_request
+from .profiling import discard_profile, finish_profile, start_profile
+from .request_stats import begin_request_stats, current_stats, install_sql_stats, server_timing
 
 log = get_logger("http")
 
 def install_http_logging(app):
+    install_sql_stats()
+
     @app.before_request
     def _t0():
         request._t0 = time.time()
+        begin_request_stats()
+        start_profile()
 
     @app.after_request
     def _log(resp):
+        profile_id = None
         try:
-            dur = int((time.time() - getattr(request, "_t0", time.time())) * 1000)
-            log.info("http_request",
-                     method=request.method,
-                     path=request.path,
-                     status=resp.status_code,
-                     duration_ms=dur,
-                     manager_id=request.args.get("manager_id"))
+            profile_id = finish_profile()
+            if profile_id:
+                resp.headers["X-Profile-Id"] = profile_id
+        except Exception:
+            log.exception("profile_write_failed", path=request.path)
+
+        try:
+            t0 = getattr(request, "_t0", time.time())
+            route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+            fields = {"method": request.method,
+                      "path": request.path,
+                      "status": resp.status_code,
+                      "manager_id": request.args.get("manager_id"),
+                      "profile_id": profile_id}
+            stats = current_stats()
+            if resp.is_streamed:
+                # corpul (si query-urile din generator) ruleaza dupa after_request: log-ul si
+                # latenta se scriu la inchiderea raspunsului; Server-Timing nu mai poate fi trimis
+                resp.call_on_close(lambda: _finish(app, route, fields, stats, time.time() - t0, streamed=True))
+            else:
+                elapsed = time.time() - t0
+                if stats is not None and app.config["SERVER_TIMING"]:
+                    resp.headers["Server-Timing"] = server_timing(stats, elapsed)
+                _finish(app, route, fields, stats, elapsed)
         except Exception:
             pass
         return resp
+
+    @app.teardown_request
+    def _discard_profile(exc):
+        discard_profile()
+
+
+def _finish(app, route, fields, stats, elapsed, streamed=False):
+    """latenta + log-ul http_request (fara request context: pt raspunsurile streamed ruleaza la close)"""
+    try:
+        observe_request(fields["method"], route, fields["status"], elapsed)
+
+        db_fields = {}
+        if stats is not None:
+            db_fields = {"db_queries": stats.queries,
+                         "db_ms": round(stats.db_sec * 1000, 1),
+                         "db_rows_reported": stats.rows_reported}
+            db_fields |= {f"{name}_ms": round(sec * 1000, 1) for name, sec in stats.spans.items()}
+
+            for statement, count in stats.repeated(app.config["SQL_REPEATED_QUERY_WARN"]):
+                log.warning("sql_repeated_query",
+                            method=fields["method"],
+                            path=fields["path"],
+                            count=count,
+                            statement=" ".join(statement.split())[:300])
+
+        if streamed:
+            db_fields["streamed"] = True
+        log.info("http_request", duration_ms=int(elapsed * 1000), **fields, **db_fields)
+    except Exception:
+        pass
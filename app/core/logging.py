@@ -1,25 +1,221 @@
+import atexit
+import json
 import logging
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
 import structlog
 
-def setup_logging(level: str = "INFO"):
-    logging.basicConfig(
-        level=getattr(logging, level.upper(), logging.INFO),
-        format="%(message)s",
+try:
+    import orjson
+except ImportError:  # optional - fara el se foloseste json din stdlib
+    orjson = None
+
+# LOG_FORMAT=console (implicit, pt dezvoltare): ConsoleRenderer colorat, scris direct din thread
+# LOG_FORMAT=json (productie): o linie JSON per eveniment; thread-ul care logheaza doar pune
+# event_dict-ul intr-o coada - serializarea si scrierea (in loturi) se fac in thread-ul _LogWriter.
+# Coada are cel mult LOG_QUEUE_SIZE evenimente; peste, evenimentele noi se pierd (numarate si
+# raportate de writer ca `log_dropped`), ca un stdout blocat sa nu umple memoria
+
+
+def _dumps(obj) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj, default=str).decode("utf-8")
+    return json.dumps(obj, default=str, ensure_ascii=False)
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class _LogWriter:
+    """goleste coada: event_dict-uri (structlog) si LogRecord-uri (stdlib) -> linii JSON in stream"""
+
+    _STOP = object()
+
+    def __init__(self, stream, max_size: int, batch: int = 1000):
+        self.queue = queue.Queue(maxsize=max_size)
+        self.stream = stream
+        self.batch = batch
+        self.dropped = 0  # aproximativ (incrementat fara lock din mai multe thread-uri)
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            items = [self.queue.get()]
+            try:
+                while len(items) < self.batch:
+                    items.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            stop = any(item is self._STOP for item in items)
+            lines = [self._render_safe(item) for item in items if item is not self._STOP]
+            dropped = self.dropped
+            if dropped:
+                self.dropped -= dropped
+                lines.append(self._render_safe({"event": "log_dropped", "level": "warning", "logger": __name__,
+                                           "count": dropped, "timestamp": time.time()}))
+            if lines:
+                try:
+                    self.stream.write("\n".join(lines) + "\n")
+                    self.stream.flush()
+                except Exception:  # stream inchis / plin: lotul se pierde, thread-ul continua
+                    pass
+            if stop:
+                return
+
+    @classmethod
+    def _render_safe(cls, item) -> str:
+        """un eveniment care nu se poate formata (argumente gresite, obiecte neserializabile)
+        devine o linie log_render_error, in loc sa opreasca thread-ul si sa piarda lotul"""
+        try:
+            return cls._render(item)
+        except Exception as e:
+            try:
+                detail = repr(item.__dict__ if isinstance(item, logging.LogRecord) else item)
+            except Exception:
+                detail = object.__repr__(item)
+            return json.dumps({"event": "log_render_error", "level": "error", "logger": __name__,
+                               "error": repr(e), "item": detail[:2000], "timestamp": _iso(time.time())})
+
+    @staticmethod
+    def _render(item) -> str:
+        if isinstance(item, logging.LogRecord):
+            item = {
+                "event": item.getMessage(),
+                "level": item.levelname.lower(),
+                "logger": item.name,
+                "timestamp": item.created,
+            } | ({"exception": logging.Formatter().formatException(item.exc_info)} if item.exc_info else {})
+        item["timestamp"] = _iso(item["timestamp"])
+        return _dumps(item)
+
+    def stop(self, timeout: float = 5.0):
+        try:
+            self.queue.put(self._STOP, timeout=timeout)
+        except queue.Full:  # writer-ul nu mai goleste coada - nu blocam iesirea procesului
+            return
+        self._thread.join(timeout)
+
+
+def _enqueue(item):
+    # writer-ul curent, nu cel de la crearea logger-ului: loggerii cache-uiti de structlog
+    # (cache_logger_on_first_use) raman valizi si dupa un nou setup_logging
+    writer = _writer
+    if writer is not None:
+        writer.put(item)
+
+
+class _QueueLogger:
+    """logger-ul structlog in modul json: doar pune evenimentul in coada"""
+
+    def __init__(self, name: str | None):
+        self.name = name
+
+    def msg(self, event: dict):
+        _enqueue(event)
+
+    debug = info = warning = warn = error = err = critical = fatal = exception = failure = log = msg
+
+
+class _RecordQueueHandler(logging.Handler):
+    """log-urile stdlib (werkzeug, flask) - in aceeasi coada, neformatate"""
+
+    def emit(self, record: logging.LogRecord):
+        _enqueue(record)
+
+
+def _add_logger_name(logger, method_name, event_dict):
+    event_dict["logger"] = logger.name
+    return event_dict
+
+
+def _add_timestamp(logger, method_name, event_dict):
+    event_dict["timestamp"] = time.time()  # formatat ISO in _LogWriter
+    return event_dict
+
+
+def _to_queue(logger, method_name, event_dict):
+    return (event_dict,), {}
+
+
+_writer: _LogWriter | None = None
+
+
+@atexit.register
+def _stop_writer():
+    global _writer
+    if _writer is not None:
+        _writer.stop()  # scrie ce a ramas in coada inainte de iesire
+        _writer = None
+
+
+def _setup_json(level: int, queue_size: int):
+    global _writer
+    # un nou setup (ex. create_app apelat din nou) refoloseste writer-ul si coada existente
+    if _writer is None:
+        _writer = _LogWriter(sys.stdout, queue_size)
+
+    root = logging.getLogger()
+    root.handlers[:] = [_RecordQueueHandler()]
+    root.setLevel(level)
+
+    structlog.configure(
+        processors=[
+            structlog.processors.add_log_level,
+            _add_logger_name,
+            _add_timestamp,
+            # traceback-ul se formateaza aici, cat exceptia e inca activa in thread
+            structlog.processors.format_exc_info,
+            _to_queue,
+        ],
+        logger_factory=lambda name=None, *args: _QueueLogger(name),
+        wrapper_class=structlog.make_filtering_bound_logger(level),
+        cache_logger_on_first_use=True,
     )
 
+
+def setup_logging(level: str | None = None, fmt: str | None = None):
+    """
+    nivel si format din argumente sau din LOG_LEVEL / LOG_FORMAT (implicit INFO, console);
+    in modul json, LOG_QUEUE_SIZE = cate evenimente pot astepta scrierea (implicit 100000)
+    """
+    level_name = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    level_no = getattr(logging, level_name, logging.INFO)
+    fmt = (fmt or os.getenv("LOG_FORMAT", "console")).lower()
+
     logging.getLogger("werkzeug").setLevel(logging.INFO)
 
     logging.getLogger("werkzeug.access").setLevel(logging.WARNING)
 
+    if fmt == "json":
+        _setup_json(level_no, int(os.getenv("LOG_QUEUE_SIZE", "100000")))
+        return
+
+    logging.basicConfig(
+        level=level_no,
+        format="%(message)s",
+    )
+
     structlog.configure(
         processors=[
             structlog.processors.add_log_level,
-            structlog.processors.TimeStamper(fmt="%H:%M:%S"), 
+            structlog.processors.TimeStamper(fmt="%H:%M:%S"),
             structlog.dev.ConsoleRenderer(colors=True),
         ],
-        wrapper_class=structlog.make_filtering_bound_logger(
-            getattr(logging, level.upper(), logging.INFO)
-        ),
+        wrapper_class=structlog.make_filtering_bound_logger(level_no),
         cache_logger_on_first_use=True,
     )
 
@@ -0,0 +1,153 @@
+import atexit
+import os
+import queue
+import smtplib
+import threading
+from email.message import EmailMessage
+from typing import NamedTuple
+
+from app.core.logging import get_logger
+
+log = get_logger("mailer")
+
+
+class SmtpSettings(NamedTuple):
+    host: str
+    port: int
+    username: str | None
+    password: str | None
+    from_email: str | None
+    use_tls: bool
+    use_ssl: bool
+    pool_size: int
+    max_messages_per_conn: int
+
+
+def smtp_settings_from_env() -> SmtpSettings:
+    user = os.getenv("SMTP_USERNAME")
+    return SmtpSettings(
+        host=os.getenv("SMTP_HOST", "smtp.gmail.com"),
+        port=int(os.getenv("SMTP_PORT", "587")),
+        username=user,
+        password=os.getenv("SMTP_PASSWORD"),
+        from_email=os.getenv("FROM_EMAIL", user),
+        use_tls=os.getenv("SMTP_USE_TLS", "true").lower() == "true",
+        use_ssl=os.getenv("SMTP_USE_SSL", "false").lower() == "true",
+        pool_size=int(os.getenv("SMTP_POOL_SIZE", "4")),
+        max_messages_per_conn=int(os.getenv("SMTP_MAX_MESSAGES_PER_CONN", "100")),
+    )
+
+
+def build_message(to_email: str, subject: str, body_text: str, attachment_path: str,
+                  from_email: str, maintype: str, subtype: str) -> EmailMessage:
+    """ construieste mesaj cu atasament """
+    msg = EmailMessage()
+    msg["From"] = from_email
+    msg["To"] = to_email
+    msg["Subject"] = subject
+    msg.set_content(body_text)
+
+    with open(attachment_path, "rb") as f:
+        msg.add_attachment(
+            f.read(),
+            maintype=maintype,
+            subtype=subtype,
+            filename=os.path.basename(attachment_path),
+        )
+    return msg
+
+
+class SmtpPool:
+    """
+    pool de sesiuni SMTP autentificate, refolosite intre mesaje:
+      - cel mult `pool_size` conexiuni deschise simultan
+      - o conexiune e inchisa dupa `max_messages_per_conn` mesaje
+      - la o sesiune picata se reconecteaza si retrimite o data
+    """
+
+    def __init__(self, settings: SmtpSettings):
+        self.settings = settings
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max(1, settings.pool_size))
+        self.connects = 0
+        self.sent = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        s = self.settings
+        if s.use_ssl:
+            server = smtplib.SMTP_SSL(s.host, s.port)
+        else:
+            server = smtplib.SMTP(s.host, s.port)
+            if s.use_tls:
+                server.starttls()
+        if s.username and s.password:
+            server.login(s.username, s.password)
+        self.connects += 1
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    def send(self, msg: EmailMessage):
+        with self._slots:
+            try:
+                server, count = self._idle.get_nowait()
+            except queue.Empty:
+                server, count = self._connect(), 0
+
+            try:
+                server.send_message(msg)
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                # sesiunea a expirat pe server intre mesaje - reconectare + o singura reincercare
+                log.info("smtp_reconnect", host=self.settings.host)
+                server.close()
+                server, count = self._connect(), 0
+                try:
+                    server.send_message(msg)
+                except BaseException:
+                    server.close()
+                    raise
+            except BaseException:
+                self._close(server)
+                raise
+
+            count += 1
+            self.sent += 1
+            if count >= self.settings.max_messages_per_conn:
+                self._close(server)
+            else:
+                self._idle.put((server, count))
+
+    def close(self):
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(server)
+
+
+_pools: dict[SmtpSettings, SmtpPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(settings: SmtpSettings | None = None) -> SmtpPool:
+    """ pool-ul procesului pt setarile date (implicit din env) """
+    settings = settings or smtp_settings_from_env()
+    with _pools_lock:
+        pool = _pools.get(settings)
+        if pool is None:
+            pool = _pools[settings] = SmtpPool(settings)
+        return pool
+
+
+@atexit.register
+def close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
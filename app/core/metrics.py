@@ -0,0 +1,69 @@
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY, \
+    generate_latest, multiprocess
+
+from app.core.request_stats import current_stats
+
+# metrici Prometheus, colectate in proces. Sub un server cu fork (gunicorn) se seteaza
+# PROMETHEUS_MULTIPROC_DIR: fiecare worker scrie in fisiere mmap, /metrics le agrega;
+# gunicorn.conf.py goleste folderul la pornire si apeleaza mark_process_dead(worker.pid) in child_exit
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+# etapele pipeline-ului de payroll (calcul, lotul de pdf-uri, randare, criptare, trimitere, arhivare)
+STAGES = ("sql_aggregation", "pdf_batch", "pdf_render", "pdf_encrypt", "smtp_send", "archive_move")
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency per route",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+STAGE_LATENCY = Histogram(
+    "payroll_stage_duration_seconds", "Duration of one payroll pipeline stage (per call / per payslip)",
+    ["stage"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+PAYSLIPS_GENERATED = Counter("payslips_generated_total", "Payslip PDFs rendered and encrypted")
+EMAILS = Counter("payslip_emails_total", "Outbox delivery attempts by result", ["result"])  # sent | retry | failed
+
+
+def multiprocess_mode() -> bool:
+    return bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def observe_stage(name: str, sec: float):
+    STAGE_LATENCY.labels(name).observe(sec)
+
+
+@contextmanager
+def stage(name: str):
+    """masoara blocul ca etapa `name`: histograma + (in request) Server-Timing / log-ul http_request"""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        sec = time.perf_counter() - t0
+        observe_stage(name, sec)
+        stats = current_stats()
+        if stats is not None:
+            stats.add_span(name, sec)
+
+
+def observe_request(method: str, route: str, status: int, sec: float):
+    REQUEST_LATENCY.labels(method, route, str(status)).observe(sec)
+
+
+def render_latest() -> bytes:
+    if multiprocess_mode():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def mark_process_dead(pid: int):
+    if multiprocess_mode():
+        multiprocess.mark_process_dead(pid)
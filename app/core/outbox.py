@@ -0,0 +1,315 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from flask import current_app
+
+from app import db
+from app.core.archive import archive_sent_file, mark_sent
+from app.core.logging import get_logger
+from app.core.mailer import build_message, get_pool
+from app.core.metrics import EMAILS, stage
+from app.database.models import EmailOutbox
+
+log = get_logger("outbox")
+
+
+class OutboxMessage(NamedTuple):
+    to_email: str
+    subject: str
+    body_text: str
+    attachment_path: str
+    emp_id: int | None = None
+    maintype: str = "application"
+    subtype: str = "pdf"
+
+
+# revendica mesaje scadente; SKIP LOCKED -> mai multe procese/noduri pot rula dispatcher
+_CLAIM_SQL = db.text("""
+    UPDATE email_outbox
+    SET status = 'SENDING', locked_at = now(), attempts = attempts + 1
+    WHERE msg_id IN (
+        SELECT msg_id FROM email_outbox
+        WHERE status = 'PENDING' AND next_attempt_at <= now()
+          AND (CAST(:job_id AS varchar) IS NULL OR job_id = :job_id)
+        ORDER BY next_attempt_at, msg_id
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING msg_id, to_email, subject, body, attachment_path, maintype, subtype, attempts
+""")
+
+# mesaje ramase in SENDING dupa un crash -> inapoi in coada
+_RECOVER_SQL = db.text("""
+    UPDATE email_outbox
+    SET status = 'PENDING', locked_at = NULL
+    WHERE status = 'SENDING' AND locked_at < now() - make_interval(secs => :lease)
+""")
+
+# mesaje ale jobului inca netrimise (PENDING - eventual cu reincercare amanata - sau SENDING)
+_JOB_OPEN_SQL = db.text("""
+    SELECT EXISTS (
+        SELECT 1 FROM email_outbox WHERE job_id = :job_id AND status IN ('PENDING', 'SENDING')
+    )
+""")
+
+# cat de des verifica dispatch_job mesajele revendicate de alt dispatcher
+_SYNC_POLL_SEC = 0.2
+
+# trimise, dar fisierul n-a mai fost mutat in sent/ (crash intre cele doua)
+_UNARCHIVED_SQL = db.text("""
+    SELECT msg_id, attachment_path FROM email_outbox
+    WHERE status = 'SENT' AND archived_to IS NULL AND sent_at < now() - make_interval(secs => :lease)
+    LIMIT 100
+""")
+
+
+class RateLimiter:
+    """token bucket - cel mult `rate` mesaje pe secunda (<= 0 = nelimitat)"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        # rate < 1 (ex. 0.5/s): bucket-ul trebuie sa poata tine macar un token
+        self.capacity = max(rate, 1.0)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class Dispatcher:
+    """
+    trimite mesajele din email_outbox in fundal:
+      - concurenta limitata (EMAIL_DISPATCH_CONCURRENCY) + rate limit (EMAIL_RATE_PER_SEC)
+      - reincercari cu backoff exponential (EMAIL_RETRY_BASE_SEC, EMAIL_MAX_ATTEMPTS)
+      - mesajul e marcat SENT si abia apoi fisierul e mutat in sent/
+    """
+
+    def __init__(self, app):
+        cfg = app.config
+        self.app = app
+        self.concurrency = cfg["EMAIL_DISPATCH_CONCURRENCY"]
+        self.max_attempts = cfg["EMAIL_MAX_ATTEMPTS"]
+        self.retry_base = cfg["EMAIL_RETRY_BASE_SEC"]
+        self.poll = cfg["EMAIL_DISPATCH_POLL_SEC"]
+        self.lease = cfg["EMAIL_LEASE_SEC"]
+        self.sync_timeout = cfg["EMAIL_SYNC_TIMEOUT_SEC"]
+        self.limiter = RateLimiter(cfg["EMAIL_RATE_PER_SEC"])
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="email")
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self.run_forever, name="email-dispatcher", daemon=True)
+            self._thread.start()
+
+    def notify(self):
+        self.start()
+        self._wake.set()
+
+    def run_forever(self):
+        """bucla dispatcher-ului (thread de fundal sau `flask payroll dispatch-emails`)"""
+        while True:
+            try:
+                with self.app.app_context():
+                    self._recover()
+                    delivered = self._dispatch_batch(job_id=None)
+                    db.session.remove()
+            except Exception:
+                log.exception("dispatcher_error")
+                delivered = 0
+            if not delivered:
+                self._wake.wait(self.poll)
+                self._wake.clear()
+
+    def dispatch_job(self, job_id: str, timeout: float | None = None) -> bool:
+        """
+        trimite acum (in thread-ul curent + pool) mesajele scadente ale unui job, apoi asteapta
+        si mesajele revendicate intre timp de dispatcher-ul din fundal (sau de alt nod) si
+        reincercarile amanate, pana cand toate sunt SENT / FAILED. False daca dupa `timeout`
+        secunde (implicit EMAIL_SYNC_TIMEOUT_SEC) au ramas mesaje nefinalizate
+        """
+        deadline = time.monotonic() + (self.sync_timeout if timeout is None else timeout)
+        while True:
+            if self._dispatch_batch(job_id=job_id):
+                continue
+            if not self._job_open(job_id):
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(_SYNC_POLL_SEC)
+
+    def _job_open(self, job_id: str) -> bool:
+        open_ = db.session.execute(_JOB_OPEN_SQL, {"job_id": job_id}).scalar()
+        db.session.commit()
+        return open_
+
+    def _dispatch_batch(self, job_id: str | None) -> int:
+        rows = db.session.execute(
+            _CLAIM_SQL, {"job_id": job_id, "limit": self.concurrency * 4}
+        ).fetchall()
+        db.session.commit()
+        if rows:
+            list(self._executor.map(self._deliver_in_context, rows))
+        return len(rows)
+
+    def _deliver_in_context(self, row):
+        with self.app.app_context():
+            try:
+                self._deliver(row)
+            finally:
+                db.session.remove()
+
+    def _deliver(self, row):
+        try:
+            self.limiter.acquire()
+            msg = build_message(row.to_email, row.subject, row.body, row.attachment_path,
+                                get_pool().settings.from_email, row.maintype, row.subtype)
+            with stage("smtp_send"):
+                get_pool().send(msg)
+        except Exception as e:
+            self._mark_failed(row, e)
+            return
+        EMAILS.labels("sent").inc()
+
+        # intai livrat (commit), abia apoi mutam fisierul
+        db.session.execute(
+            db.update(EmailOutbox)
+            .where(EmailOutbox.msg_id == row.msg_id)
+            .values(status="SENT", sent_at=db.func.now(), locked_at=None, last_error=None)
+        )
+        db.session.commit()
+        log.info("email_sent", msg_id=row.msg_id, to=row.to_email,
+                 file=os.path.basename(row.attachment_path))
+        self._archive(row.msg_id, row.attachment_path)
+
+    def _mark_failed(self, row, error: Exception):
+        final = row.attempts >= self.max_attempts
+        delay = self.retry_base * 2 ** (row.attempts - 1)
+        db.session.execute(
+            db.update(EmailOutbox)
+            .where(EmailOutbox.msg_id == row.msg_id)
+            .values(
+                status="FAILED" if final else "PENDING",
+                locked_at=None,
+                last_error=str(error)[:1000],
+                next_attempt_at=db.func.now() + db.func.make_interval(0, 0, 0, 0, 0, 0, delay),
+            )
+        )
+        db.session.commit()
+        EMAILS.labels("failed" if final else "retry").inc()
+        log.warning("email_failed", msg_id=row.msg_id, to=row.to_email,
+                    attempts=row.attempts, final=final, error=str(error))
+
+    def _archive(self, msg_id: int, path: str):
+        archived_to = ""
+        if os.path.exists(path):
+            archived_to = archive_sent_file(path)
+            mark_sent(path, archived_to)
+        db.session.execute(
+            db.update(EmailOutbox).where(EmailOutbox.msg_id == msg_id).values(archived_to=archived_to)
+        )
+        db.session.commit()
+
+    def _recover(self):
+        db.session.execute(_RECOVER_SQL, {"lease": self.lease})
+        db.session.commit()
+        for msg_id, path in db.session.execute(_UNARCHIVED_SQL, {"lease": self.lease}).fetchall():
+            self._archive(msg_id, path)
+
+
+def init_outbox(app):
+    dispatcher = Dispatcher(app)
+    app.extensions["email_dispatcher"] = dispatcher
+
+    # pornit la primul request (nu si pt comenzile CLI / migrari)
+    @app.before_request
+    def _start_dispatcher():
+        dispatcher.start()
+
+
+def dispatcher() -> Dispatcher:
+    return current_app.extensions["email_dispatcher"]
+
+
+def enqueue(manager_id: int, messages: list[OutboxMessage]) -> str:
+    """salveaza mesajele in outbox (un job) si trezeste dispatcher-ul; intoarce job_id"""
+    job_id = uuid.uuid4().hex
+    if messages:
+        db.session.execute(db.insert(EmailOutbox), [
+            {
+                "job_id": job_id,
+                "manager_id": manager_id,
+                "emp_id": m.emp_id,
+                "to_email": m.to_email,
+                "subject": m.subject,
+                "body": m.body_text,
+                "attachment_path": m.attachment_path,
+                "maintype": m.maintype,
+                "subtype": m.subtype,
+                "status": "PENDING",
+                "attempts": 0,
+            }
+            for m in messages
+        ])
+        db.session.commit()
+    return job_id
+
+
+def job_summary(job_id: str, manager_id: int) -> dict | None:
+    rows = (
+        EmailOutbox.query
+        .filter_by(job_id=job_id, manager_id=manager_id)
+        .order_by(EmailOutbox.msg_id.asc())
+        .all()
+    )
+    if not rows:
+        return None
+
+    counts = {}
+    for r in rows:
+        counts[r.status] = counts.get(r.status, 0) + 1
+
+    sent_at = [r.sent_at for r in rows if r.sent_at]
+    return {
+        "job_id": job_id,
+        "manager_id": manager_id,
+        "total": len(rows),
+        "counts": counts,
+        "done": counts.get("SENT", 0) + counts.get("FAILED", 0) == len(rows),
+        "created_at": min(r.created_at for r in rows),
+        "last_sent_at": max(sent_at) if sent_at else None,
+        "messages": [
+            {
+                "msg_id": r.msg_id,
+                "emp_id": r.emp_id,
+                "email": r.to_email,
+                "file": os.path.basename(r.attachment_path),
+                "status": r.status,
+                "attempts": r.attempts,
+                "last_error": r.last_error,
+                "archived_to": r.archived_to,
+            }
+            for r in rows
+        ],
+    }
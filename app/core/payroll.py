@@ -0,0 +1,193 @@
+from datetime import date, datetime, timedelta
+from typing import Iterator
+
+from app import db
+from app.core.metrics import stage
+from app.core.payroll_row import PayrollRow
+from app.core.work_calendar import business_day_mask, clear_calendar_cache, month_calendar
+
+
+# --- helpers ---
+def month_bounds(d: date) -> tuple[date, date]:
+    # m0 - prima zi din luna
+    # m1 - ultima zi din luna
+    m0 = d.replace(day=1)
+    if m0.month == 12:
+        m1 = date(m0.year + 1, 1, 1) - timedelta(days=1)
+    else:
+        m1 = date(m0.year, m0.month + 1, 1) - timedelta(days=1)
+    return m0, m1
+
+def parse_month(value: str | None) -> date:
+    """YYYY-MM -> prima zi din luna (implicit luna curenta); ValueError pt alt format"""
+    if not value:
+        return date.today().replace(day=1)
+    return datetime.strptime(value, "%Y-%m").date()
+
+def business_days_in_month(d: date, holidays: set[date] | None = None) -> int:
+    """zilele lucratoare (luni - vineri, fara sarbatori) din luna lui d;
+    implicit sarbatorile din tabela holidays (calendarul cache-uit al lunii)"""
+    if holidays is None:
+        return month_calendar(d).working_days
+    return business_day_mask(d, holidays).bit_count()
+
+
+# agregatul lunar calculat din bonuses + vacations, per angajat (LATERAL),
+# folosit doar ca sa (re)completeze payroll_month_snapshot
+_AGGREGATE_SELECT = """
+    SELECT e.emp_id, CAST(:m0 AS date), e.base_salary, b.bonus_total, v.vac_days, :working_days
+    FROM employees e
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(SUM(amount), 0) AS bonus_total
+        FROM bonuses
+        WHERE emp_id = e.emp_id AND effective_month = :m0
+    ) b
+    CROSS JOIN LATERAL (
+        -- doar zilele lucratoare: intervalul concediului (biti zi_start..zi_sfarsit din luna)
+        -- AND bitmap-ul zilelor lucratoare ale lunii, apoi numarul de biti setati
+        SELECT COALESCE(SUM(length(replace(CAST(CAST(
+            ((CAST(1 AS bigint) << (LEAST(end_date, :m1) - CAST(:m0 AS date) + 1))
+             - (CAST(1 AS bigint) << (GREATEST(start_date, :m0) - CAST(:m0 AS date))))
+            & :business_mask AS bit(64)) AS text), '0', ''))), 0) AS vac_days
+        FROM vacations
+        WHERE emp_id = e.emp_id
+          AND daterange(start_date, end_date, '[]') && daterange(:m0, :m1, '[]')
+    ) v
+"""
+
+_SNAPSHOT_COLUMNS = "(emp_id, month, base_salary, bonus_total, vacation_days, working_days)"
+
+# advisory lock-uri pe angajat (SNAPSHOT_LOCK, emp_id), luate si de triggerul de invalidare
+# (partajat, pana la commit-ul scrierii) si de refill (exclusiv, inainte de calcul): fara ele,
+# un refill care calculeaza agregatul in timp ce o scriere inca nu e comisa ar salva un rand
+# vechi, pe care triggerul scrierii nu il mai sterge
+SNAPSHOT_LOCK = 7301
+
+# angajatii din echipa managerului (sau doar emp_ids din echipa, daca nu e NULL) fara snapshot
+_SNAPSHOT_MISSING_SQL = db.text("""
+    SELECT e.emp_id
+    FROM employees e
+    WHERE e.manager_id = :manager_id AND e.is_active
+      AND (CAST(:emp_ids AS integer[]) IS NULL OR e.emp_id = ANY(:emp_ids))
+      AND NOT EXISTS (
+          SELECT 1 FROM payroll_month_snapshot s
+          WHERE s.emp_id = e.emp_id AND s.month = :m0
+      )
+    ORDER BY e.emp_id
+""")
+
+# lock-urile care se pot lua imediat (fara asteptare -> fara deadlock cu scrierile in curs)
+_SNAPSHOT_TRY_LOCK_SQL = db.text(f"""
+    SELECT id FROM unnest(CAST(:emp_ids AS integer[])) AS id
+    WHERE pg_try_advisory_xact_lock({SNAPSHOT_LOCK}, id)
+""")
+
+_SNAPSHOT_LOCK_SQL = db.text(f"SELECT pg_advisory_xact_lock({SNAPSHOT_LOCK}, :emp_id)")
+
+# completeaza randurile lipsa (invalidate de triggere) pt emp_ids, sub lock-urile de mai sus;
+# statement separat de lock -> vede toate scrierile comise pana la obtinerea lock-ului
+_SNAPSHOT_FILL_SQL = db.text(f"""
+    INSERT INTO payroll_month_snapshot {_SNAPSHOT_COLUMNS}
+    {_AGGREGATE_SELECT}
+    WHERE e.emp_id = ANY(CAST(:emp_ids AS integer[]))
+      AND NOT EXISTS (
+          SELECT 1 FROM payroll_month_snapshot s
+          WHERE s.emp_id = e.emp_id AND s.month = :m0
+      )
+    ON CONFLICT (emp_id, month) DO NOTHING
+""")
+
+# recalculare fortata pt o lista de angajati (sau toata firma)
+_SNAPSHOT_REFRESH_SQL = db.text(f"""
+    INSERT INTO payroll_month_snapshot {_SNAPSHOT_COLUMNS}
+    {_AGGREGATE_SELECT}
+    WHERE e.is_active AND (CAST(:emp_ids AS integer[]) IS NULL OR e.emp_id = ANY(:emp_ids))
+    ON CONFLICT (emp_id, month) DO UPDATE
+    SET base_salary = EXCLUDED.base_salary,
+        bonus_total = EXCLUDED.bonus_total,
+        vacation_days = EXCLUDED.vacation_days,
+        working_days = EXCLUDED.working_days,
+        refreshed_at = now()
+""")
+
+# raportul echipei = o singura citire pe index (employees partial + PK snapshot)
+_TEAM_MONTH_SQL = db.text("""
+    SELECT e.emp_id, e.first_name, e.last_name, e.cnp, e.email, e.grade, e.hire_date,
+           s.base_salary, s.bonus_total, s.vacation_days, s.working_days
+    FROM employees e
+    JOIN payroll_month_snapshot s ON s.emp_id = e.emp_id AND s.month = :m0
+    WHERE e.manager_id = :manager_id AND e.is_active
+      AND (CAST(:emp_ids AS integer[]) IS NULL OR e.emp_id = ANY(:emp_ids))
+    ORDER BY e.emp_id
+""")
+
+
+def _month_params(d: date) -> dict:
+    m0, m1 = month_bounds(d)
+    cal = month_calendar(d)
+    return {"m0": m0, "m1": m1, "working_days": cal.working_days, "business_mask": cal.mask}
+
+
+# --- api ---
+def refresh_month_snapshot(d: date, emp_ids: list[int] | None = None) -> int:
+    """recalculeaza snapshot-ul lunii lui d pt emp_ids (None = toti angajatii activi)"""
+    # zilele lucratoare se recalculeaza din tabela holidays, nu din calendarul cache-uit
+    clear_calendar_cache(d)
+    params = _month_params(d) | {"emp_ids": emp_ids}
+    result = db.session.execute(_SNAPSHOT_REFRESH_SQL, params)
+    db.session.commit()
+    return result.rowcount
+
+def _fill_snapshot(params: dict) -> int:
+    """
+    recalculeaza randurile lipsa din snapshot: intai, intr-o singura tranzactie, angajatii al
+    caror lock e liber; apoi, cate unul (asteptand commit-ul scrierii in curs), ceilalti
+    """
+    missing = db.session.execute(_SNAPSHOT_MISSING_SQL, params).scalars().all()
+    if not missing:
+        return 0
+
+    locked = db.session.execute(_SNAPSHOT_TRY_LOCK_SQL, {"emp_ids": missing}).scalars().all()
+    filled = db.session.execute(_SNAPSHOT_FILL_SQL, params | {"emp_ids": locked}).rowcount if locked else 0
+    db.session.commit()
+
+    # un singur lock tinut in asteptare -> nu poate face ciclu cu lock-urile scrierilor
+    for emp_id in sorted(set(missing) - set(locked)):
+        db.session.execute(_SNAPSHOT_LOCK_SQL, {"emp_id": emp_id})
+        filled += db.session.execute(_SNAPSHOT_FILL_SQL, params | {"emp_ids": [emp_id]}).rowcount
+        db.session.commit()
+    return filled
+
+
+def iter_team_month_rows(manager_id: int, d: date, batch_size: int = 1000,
+                         emp_ids: list[int] | None = None) -> Iterator[PayrollRow]:
+    """
+    salariu de baza + bonusuri + zile de concediu pt echipa managerului (sau doar emp_ids din
+    echipa), in luna lui d. Se citesc din payroll_month_snapshot (cursor pe server, cate
+    batch_size randuri); se recalculeaza doar angajatii ale caror randuri au fost invalidate
+    de la ultima citire.
+    """
+    params = _month_params(d) | {"manager_id": manager_id, "emp_ids": emp_ids}
+    _fill_snapshot(params)
+
+    result = db.session.execute(
+        _TEAM_MONTH_SQL.execution_options(stream_results=True, yield_per=batch_size), params
+    )
+    for r in result:
+        yield PayrollRow(
+            emp_id=r.emp_id,
+            first_name=r.first_name,
+            last_name=r.last_name,
+            cnp=r.cnp,
+            email=r.email,
+            grade=r.grade,
+            hire_date=r.hire_date,
+            base_salary=float(r.base_salary),
+            bonus_total=float(r.bonus_total),
+            vacation_days=int(r.vacation_days),
+            working_days=int(r.working_days),
+        )
+
+def team_month_rows(manager_id: int, d: date, emp_ids: list[int] | None = None) -> list[PayrollRow]:
+    with stage("sql_aggregation"):
+        return list(iter_team_month_rows(manager_id, d, emp_ids=emp_ids))
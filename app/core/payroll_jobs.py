@@ -0,0 +1,355 @@
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from app import db
+from app.core.logging import get_logger
+from app.core.outbox import dispatcher, enqueue, job_summary
+from app.core.payroll_run import generate_manager_month
+from app.core.payslip_mail import payslip_messages
+from app.database.models import Employee, PayrollJob
+
+log = get_logger("payroll_jobs")
+
+# revendica unitati scadente; SKIP LOCKED -> oricati workeri (procese / noduri) in paralel
+_CLAIM_SQL = db.text("""
+    UPDATE payroll_jobs
+    SET status = 'RUNNING', worker_id = :worker_id, attempts = attempts + 1,
+        started_at = now(), heartbeat_at = now(),
+        lease_until = now() + make_interval(secs => :lease)
+    WHERE job_id IN (
+        SELECT job_id FROM payroll_jobs
+        WHERE status = 'PENDING' AND next_attempt_at <= now()
+        ORDER BY next_attempt_at, job_id
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING job_id, run_id, kind, manager_id, emp_id, month, send_after, attempts
+""")
+
+# prelungeste lease-ul unitatilor in lucru; cele care nu mai sunt ale workerului nu apar in RETURNING
+_HEARTBEAT_SQL = db.text("""
+    UPDATE payroll_jobs
+    SET heartbeat_at = now(), lease_until = now() + make_interval(secs => :lease)
+    WHERE job_id = ANY(CAST(:job_ids AS integer[])) AND worker_id = :worker_id AND status = 'RUNNING'
+    RETURNING job_id
+""")
+
+# lease expirat = workerul a murit (sau a pierdut conexiunea) -> unitatea revine in coada
+_RECOVER_SQL = db.text("""
+    UPDATE payroll_jobs
+    SET status = CASE WHEN attempts >= :max_attempts THEN 'FAILED' ELSE 'PENDING' END,
+        finished_at = CASE WHEN attempts >= :max_attempts THEN now() END,
+        last_error = 'lease expired (worker ' || COALESCE(worker_id, '?') || ')',
+        worker_id = NULL, lease_until = NULL
+    WHERE status = 'RUNNING' AND lease_until < now()
+    RETURNING job_id, kind, manager_id, emp_id
+""")
+
+# rezultatul se scrie doar daca unitatea e inca a acestui worker (altfel a fost deja re-revendicata)
+_COMPLETE_SQL = db.text("""
+    UPDATE payroll_jobs
+    SET status = 'DONE', finished_at = now(), lease_until = NULL,
+        items = :items, result = :result, last_error = NULL
+    WHERE job_id = :job_id AND worker_id = :worker_id AND status = 'RUNNING'
+""")
+
+_FAIL_SQL = db.text("""
+    UPDATE payroll_jobs
+    SET status = :status, lease_until = NULL, worker_id = NULL, last_error = :error,
+        next_attempt_at = now() + make_interval(secs => :delay),
+        finished_at = CASE WHEN :status = 'FAILED' THEN now() END
+    WHERE job_id = :job_id AND worker_id = :worker_id AND status = 'RUNNING'
+""")
+
+_RUN_SUMMARY_SQL = db.text("""
+    SELECT kind, status, count(*) AS units, COALESCE(sum(items), 0) AS items,
+           max(month) AS month, min(started_at) AS started, max(finished_at) AS finished,
+           CAST(now() AS timestamp) AS db_now
+    FROM payroll_jobs
+    WHERE run_id = :run_id
+    GROUP BY kind, status
+""")
+
+
+def enqueue_run(month: date, unit: str = "manager", send: bool = False) -> tuple[str, int]:
+    """
+    pune in payroll_jobs unitatile unei rulari pt toti managerii activi:
+    un CSV per manager + PDF-uri per manager (unit='manager') sau per angajat (unit='employee');
+    cu send=True fiecare unitate PDF terminata programeaza trimiterea (SEND) pe acelasi scope.
+    Intoarce (run_id, numar de unitati)
+    """
+    run_id = uuid.uuid4().hex
+    manager_ids = [
+        emp_id for (emp_id,) in db.session.query(Employee.emp_id)
+        .filter_by(role="MANAGER", is_active=True)
+        .order_by(Employee.emp_id)
+    ]
+
+    units = [{"kind": "CSV", "manager_id": m, "emp_id": None, "send_after": False} for m in manager_ids]
+    if unit == "employee":
+        team = (
+            db.session.query(Employee.manager_id, Employee.emp_id)
+            .filter(Employee.manager_id.in_(manager_ids), Employee.is_active.is_(True))
+            .order_by(Employee.manager_id, Employee.emp_id)
+        ) if manager_ids else []
+        units += [{"kind": "PDF", "manager_id": m, "emp_id": e, "send_after": send} for m, e in team]
+    else:
+        units += [{"kind": "PDF", "manager_id": m, "emp_id": None, "send_after": send} for m in manager_ids]
+
+    if units:
+        db.session.execute(db.insert(PayrollJob), [
+            u | {"run_id": run_id, "month": month, "status": "PENDING", "attempts": 0, "items": 0}
+            for u in units
+        ])
+        db.session.commit()
+    log.info("payroll_run_enqueued", run_id=run_id, month=month.isoformat(), unit=unit,
+             send=send, units=len(units))
+    return run_id, len(units)
+
+
+def active_run(month: date) -> str | None:
+    """run_id-ul unei rulari din coada, inca neterminate, pt luna data"""
+    return (
+        db.session.query(PayrollJob.run_id)
+        .filter(PayrollJob.month == month, PayrollJob.status.in_(("PENDING", "RUNNING")))
+        .limit(1)
+        .scalar()
+    )
+
+
+def run_summary(run_id: str) -> dict | None:
+    """progresul unei rulari din coada, agregat din payroll_jobs"""
+    rows = db.session.execute(_RUN_SUMMARY_SQL, {"run_id": run_id}).fetchall()
+    if not rows:
+        return None
+
+    counts: dict[str, dict[str, int]] = {}
+    items: dict[str, int] = {}
+    by_status: dict[str, int] = {}
+    for r in rows:
+        counts.setdefault(r.kind, {})[r.status] = r.units
+        items[r.kind] = items.get(r.kind, 0) + int(r.items)
+        by_status[r.status] = by_status.get(r.status, 0) + r.units
+
+    total = sum(by_status.values())
+    open_units = by_status.get("PENDING", 0) + by_status.get("RUNNING", 0)
+    started = min((r.started for r in rows if r.started), default=None)
+    finished = max((r.finished for r in rows if r.finished), default=None)
+    end = finished if not open_units and finished else rows[0].db_now
+    elapsed = (end - started).total_seconds() if started else 0.0
+
+    failures = (
+        db.session.query(PayrollJob.kind, PayrollJob.manager_id, PayrollJob.emp_id,
+                         PayrollJob.attempts, PayrollJob.last_error)
+        .filter_by(run_id=run_id, status="FAILED")
+        .order_by(PayrollJob.job_id)
+        .limit(100)
+    )
+    workers = [
+        w for (w,) in db.session.query(PayrollJob.worker_id)
+        .filter_by(run_id=run_id, status="RUNNING").distinct()
+    ]
+
+    return {
+        "run_id": run_id,
+        "month": max(r.month for r in rows).strftime("%Y-%m"),
+        "status": "DONE" if not open_units else ("RUNNING" if started else "QUEUED"),
+        "units_total": total,
+        "units_finished": total - open_units,
+        "counts": counts,
+        "csv_generated": items.get("CSV", 0),
+        "pdfs_generated": items.get("PDF", 0),
+        "emails_sent": items.get("SEND", 0),
+        "elapsed_sec": round(elapsed, 2),
+        "throughput": {
+            "units_per_sec": round((total - open_units) / elapsed, 2) if elapsed else None,
+            "payslips_per_sec": round(items.get("PDF", 0) / elapsed, 1) if elapsed else None,
+        },
+        "workers": workers,
+        "failures": [
+            {"kind": f.kind, "manager_id": f.manager_id, "emp_id": f.emp_id,
+             "attempts": f.attempts, "error": f.last_error}
+            for f in failures
+        ],
+    }
+
+
+def execute_unit(unit, pdf_workers: int = 1) -> tuple[int, dict]:
+    """executa o unitate revendicata; intoarce (items, rezultat)"""
+    emp_ids = {unit.emp_id} if unit.emp_id is not None else None
+
+    if unit.kind == "CSV":
+        result = generate_manager_month(unit.manager_id, unit.month, csv=True, pdfs=False)
+        return int(result["csv"] == "generated"), result
+
+    if unit.kind == "PDF":
+        result = generate_manager_month(unit.manager_id, unit.month, pdf_workers,
+                                        emp_ids=emp_ids, csv=False)
+        return result["pdfs_generated"], result
+
+    if unit.kind == "SEND":
+        # trimiterea merge tot prin outbox, dar e livrata de workerul care a revendicat unitatea
+        messages, skipped = payslip_messages(unit.manager_id, unit.month, emp_ids)
+        email_job_id = enqueue(unit.manager_id, messages)
+        if messages:
+            dispatcher().dispatch_job(email_job_id)
+        summary = job_summary(email_job_id, unit.manager_id) or {"counts": {}}
+        counts = summary["counts"]
+        sent = counts.get("SENT", 0)
+        return sent, {"email_job_id": email_job_id, "queued": len(messages), "sent": sent,
+                      "failed": counts.get("FAILED", 0),
+                      "pending": counts.get("PENDING", 0) + counts.get("SENDING", 0),
+                      "skipped": len(skipped)}
+
+    raise ValueError(f"unknown payroll job kind: {unit.kind}")
+
+
+class PayrollWorker:
+    """
+    worker pt payroll_jobs (`flask payroll worker`), pornit pe oricate noduri:
+      - revendica unitati cu FOR UPDATE SKIP LOCKED, cel mult `concurrency` simultan
+      - un thread de heartbeat prelungeste lease-ul (PAYROLL_JOB_LEASE_SEC) cat timp lucreaza
+      - lease expirat (worker mort) -> unitatea revine PENDING si o preia alt worker
+      - erorile se reincearca cu backoff exponential, pana la PAYROLL_JOB_MAX_ATTEMPTS
+    """
+
+    def __init__(self, app, concurrency: int | None = None, worker_id: str | None = None):
+        cfg = app.config
+        self.app = app
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.concurrency = concurrency or cfg["PAYROLL_WORKER_CONCURRENCY"]
+        self.lease = cfg["PAYROLL_JOB_LEASE_SEC"]
+        self.max_attempts = cfg["PAYROLL_JOB_MAX_ATTEMPTS"]
+        self.retry_base = cfg["PAYROLL_JOB_RETRY_SEC"]
+        self.poll = cfg["PAYROLL_WORKER_POLL_SEC"]
+        self.pdf_workers = cfg["PAYSLIP_WORKERS"]
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="payroll-worker")
+        self._inflight: set[int] = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    def run(self, exit_when_idle: bool = False):
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="payroll-heartbeat", daemon=True)
+        heartbeat.start()
+        log.info("payroll_worker_started", worker_id=self.worker_id, concurrency=self.concurrency,
+                 lease_sec=self.lease)
+        try:
+            while not self._stop.is_set():
+                with self._lock:
+                    free = self.concurrency - len(self._inflight)
+
+                claimed = self._claim(free) if free > 0 else []
+                for unit in claimed:
+                    with self._lock:
+                        self._inflight.add(unit.job_id)
+                    self._executor.submit(self._run_unit, unit)
+                if claimed:
+                    continue
+
+                with self._lock:
+                    idle = not self._inflight
+                if idle and exit_when_idle:
+                    break
+                self._wake.wait(self.poll)
+                self._wake.clear()
+        finally:
+            self._stop.set()
+            self._executor.shutdown(wait=True)
+            log.info("payroll_worker_stopped", worker_id=self.worker_id)
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _claim(self, limit: int) -> list:
+        with self.app.app_context():
+            try:
+                for r in db.session.execute(_RECOVER_SQL, {"max_attempts": self.max_attempts}):
+                    log.warning("payroll_unit_requeued", job_id=r.job_id, kind=r.kind,
+                                manager_id=r.manager_id, emp_id=r.emp_id)
+                units = db.session.execute(
+                    _CLAIM_SQL, {"worker_id": self.worker_id, "lease": self.lease, "limit": limit}
+                ).fetchall()
+                db.session.commit()
+                return units
+            except Exception:
+                db.session.rollback()
+                log.exception("payroll_worker_error", worker_id=self.worker_id)
+                return []
+            finally:
+                db.session.remove()
+
+    def _run_unit(self, unit):
+        t0 = time.perf_counter()
+        with self.app.app_context():
+            try:
+                items, result = execute_unit(unit, self.pdf_workers)
+            except Exception as e:
+                db.session.rollback()
+                self._fail(unit, e)
+            else:
+                self._complete(unit, items, result, round((time.perf_counter() - t0) * 1000, 1))
+            finally:
+                db.session.remove()
+                with self._lock:
+                    self._inflight.discard(unit.job_id)
+                self._wake.set()
+
+    def _complete(self, unit, items: int, result: dict, elapsed_ms: float):
+        done = db.session.execute(_COMPLETE_SQL, {
+            "job_id": unit.job_id, "worker_id": self.worker_id,
+            "items": items, "result": json.dumps(result),
+        }).rowcount
+        if not done:
+            # lease pierdut intre timp; unitatea a fost (sau va fi) refacuta de alt worker
+            db.session.rollback()
+            log.warning("payroll_lease_lost", job_id=unit.job_id, worker_id=self.worker_id)
+            return
+
+        if unit.kind == "PDF" and unit.send_after:
+            db.session.execute(db.insert(PayrollJob).values(
+                run_id=unit.run_id, kind="SEND", manager_id=unit.manager_id, emp_id=unit.emp_id,
+                month=unit.month, send_after=False, status="PENDING", attempts=0, items=0,
+            ))
+        db.session.commit()
+        log.info("payroll_unit_done", job_id=unit.job_id, kind=unit.kind, manager_id=unit.manager_id,
+                 emp_id=unit.emp_id, items=items, elapsed_ms=elapsed_ms)
+
+    def _fail(self, unit, error: Exception):
+        final = unit.attempts >= self.max_attempts
+        db.session.execute(_FAIL_SQL, {
+            "job_id": unit.job_id, "worker_id": self.worker_id,
+            "status": "FAILED" if final else "PENDING",
+            "error": str(error)[:1000],
+            "delay": self.retry_base * 2 ** (unit.attempts - 1),
+        })
+        db.session.commit()
+        log.warning("payroll_unit_failed", job_id=unit.job_id, kind=unit.kind, manager_id=unit.manager_id,
+                    emp_id=unit.emp_id, attempts=unit.attempts, final=final, error=str(error))
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.lease / 3):
+            with self._lock:
+                job_ids = list(self._inflight)
+            if not job_ids:
+                continue
+            with self.app.app_context():
+                try:
+                    kept = {r.job_id for r in db.session.execute(_HEARTBEAT_SQL, {
+                        "job_ids": job_ids, "worker_id": self.worker_id, "lease": self.lease,
+                    })}
+                    db.session.commit()
+                    for job_id in set(job_ids) - kept:
+                        log.warning("payroll_lease_lost", job_id=job_id, worker_id=self.worker_id)
+                except Exception:
+                    db.session.rollback()
+                    log.exception("payroll_heartbeat_error", worker_id=self.worker_id)
+                finally:
+                    db.session.remove()
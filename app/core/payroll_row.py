@@ -0,0 +1,24 @@
+from datetime import date
+from typing import NamedTuple
+
+# fara dependinte de Flask / ORM: randurile sunt trimise (pickle) in procesele din pool-ul
+# de randare, care importa doar payslip_pdf
+
+
+class PayrollRow(NamedTuple):
+    """un rand agregat pe luna pt un angajat (fara obiect ORM)"""
+    emp_id: int
+    first_name: str
+    last_name: str
+    cnp: str
+    email: str
+    grade: str | None
+    hire_date: date
+    base_salary: float
+    bonus_total: float
+    vacation_days: int
+    working_days: int
+
+    @property
+    def salary_to_pay(self) -> float:
+        return self.base_salary + self.bonus_total
@@ -0,0 +1,241 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date
+
+from flask import current_app
+
+from app import db
+from app.core.archive import latest_csv_fingerprint
+from app.core.generation import (csv_fingerprint, plan_payslips, render_failures, render_team_payslips, team_csv,
+                                 write_team_csv)
+from app.core.logging import get_logger
+from app.core.payroll import team_month_rows
+from app.database.models import Employee
+
+log = get_logger("payroll_run")
+
+# cate rulari terminate raman in memorie pt GET /admin/payrollRuns/<run_id>
+_KEEP_RUNS = 50
+
+# advisory lock (RUN_START_LOCK, luna) tinut cat se verifica / porneste o rulare din coada
+RUN_START_LOCK = 7302
+_RUN_START_LOCK_SQL = db.text(f"SELECT pg_advisory_xact_lock({RUN_START_LOCK}, :month_key)")
+
+
+def generate_manager_month(manager_id: int, month: date, pdf_workers: int = 1,
+                           emp_ids: set[int] | None = None, csv: bool = True, pdfs: bool = True) -> dict:
+    """
+    CSV-ul si/sau payslip-urile unui manager pt o luna, doar daca input-urile s-au schimbat
+    fata de ce e in arhiva (amprenta continutului CSV, respectiv a fiecarui payslip);
+    emp_ids limiteaza payslip-urile la anumiti angajati
+    """
+    # CSV-ul are nevoie de toata echipa; o unitate doar cu PDF-uri citeste doar angajatii ei
+    only = sorted(emp_ids) if emp_ids is not None and not csv else None
+    rows = team_month_rows(manager_id, month, only)
+
+    result = {"csv": None, "pdfs_generated": 0, "pdfs_skipped": 0}
+    if csv:
+        # si un CSV deja trimis se refece daca datele s-au corectat intre timp
+        content = team_csv(month, rows)
+        unchanged = latest_csv_fingerprint(manager_id, month) == csv_fingerprint(content)
+        if not unchanged:
+            write_team_csv(manager_id, month, rows, content)
+        result["csv"] = "skipped" if unchanged else "generated"
+    if pdfs:
+        if emp_ids is not None and only is None:
+            rows = [r for r in rows if r.emp_id in emp_ids]
+        todo, unchanged = plan_payslips(manager_id, month, rows)
+        failed = render_failures(*render_team_payslips(manager_id, month, todo, pdf_workers)) if todo else []
+        result["pdfs_generated"] = len(todo) - len(failed)
+        result["pdfs_skipped"] = len(unchanged)
+        if failed:
+            # cele reusite sunt deja indexate; o noua incercare le reface doar pe cele esuate
+            raise RuntimeError(f"{len(failed)} payslips failed, first: emp_id {failed[0]['emp_id']}: "
+                               f"{failed[0]['error']}")
+    return result
+
+
+class PayrollRun:
+    """
+    o rulare de payroll pt toata compania, pe o luna: cate o unitate (CSV + PDF-uri) per manager.
+    Progresul e tinut in memorie si citit cu summary().
+    """
+
+    def __init__(self, month: date, manager_ids: list[int]):
+        self.run_id = uuid.uuid4().hex
+        self.month = month
+        self.status = "QUEUED"  # QUEUED | RUNNING | DONE
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self._lock = threading.Lock()
+        self.managers = {
+            manager_id: {
+                "manager_id": manager_id,
+                "status": "PENDING",  # PENDING | RUNNING | DONE | SKIPPED | FAILED
+                "csv": None,          # generated | skipped
+                "pdfs_generated": 0,
+                "pdfs_skipped": 0,
+                "elapsed_ms": None,
+                "error": None,
+            }
+            for manager_id in manager_ids
+        }
+
+    def update(self, manager_id: int, **fields):
+        with self._lock:
+            self.managers[manager_id].update(fields)
+
+    def summary(self, with_managers: bool = True) -> dict:
+        with self._lock:
+            managers = [dict(m) for m in self.managers.values()]
+            status = self.status
+            started, finished = self.started_at, self.finished_at
+
+        counts = {}
+        for m in managers:
+            counts[m["status"]] = counts.get(m["status"], 0) + 1
+        generated = sum(m["pdfs_generated"] for m in managers)
+        finished_units = len(managers) - counts.get("PENDING", 0) - counts.get("RUNNING", 0)
+
+        elapsed = ((finished or time.time()) - started) if started else 0.0
+        summary = {
+            "run_id": self.run_id,
+            "month": self.month.strftime("%Y-%m"),
+            "status": status,
+            "managers_total": len(managers),
+            "managers_finished": finished_units,
+            "counts": counts,
+            "csv_generated": sum(1 for m in managers if m["csv"] == "generated"),
+            "pdfs_generated": generated,
+            "pdfs_skipped": sum(m["pdfs_skipped"] for m in managers),
+            "elapsed_sec": round(elapsed, 2),
+            "throughput": {
+                "managers_per_sec": round(finished_units / elapsed, 2) if elapsed else None,
+                "payslips_per_sec": round(generated / elapsed, 1) if elapsed else None,
+            },
+            "failures": [
+                {"manager_id": m["manager_id"], "error": m["error"]}
+                for m in managers if m["status"] == "FAILED"
+            ],
+        }
+        if with_managers:
+            summary["managers"] = managers
+        return summary
+
+
+class PayrollScheduler:
+    """
+    ruleaza PayrollRun-uri: managerii sunt procesati in paralel pe un pool de thread-uri
+    (PAYROLL_RUN_CONCURRENCY); randarea PDF-urilor fiecarui manager merge pe pool-ul de
+    procese din payslip_pdf (PAYSLIP_WORKERS). La o noua rulare nu se refac CSV-ul deja
+    indexat si payslip-urile cu input-uri neschimbate.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.concurrency = app.config["PAYROLL_RUN_CONCURRENCY"]
+        self.pdf_workers = app.config["PAYSLIP_WORKERS"]
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="payroll-run")
+        self._runs: OrderedDict[str, PayrollRun] = OrderedDict()
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+
+    def get(self, run_id: str) -> PayrollRun | None:
+        with self._lock:
+            return self._runs.get(run_id)
+
+    def active(self, month: date) -> PayrollRun | None:
+        with self._lock:
+            for run in self._runs.values():
+                if run.month == month and run.status != "DONE":
+                    return run
+        return None
+
+    @contextmanager
+    def starting(self, month: date):
+        """
+        verificarea rularilor active + crearea celei noi, atomic. Lock-ul scheduler-ului
+        serializeaza thread-urile procesului; advisory lock-ul pe luna (pana la commit)
+        serializeaza procesele / nodurile doar pt rularile din coada (payroll_jobs, vizibile
+        tuturor). Rularile locale (mode=local|sync) exista doar in memoria procesului care le-a
+        pornit, deci sunt unice per proces, nu si intre workerii serverului
+        """
+        with self._start_lock:
+            db.session.execute(_RUN_START_LOCK_SQL, {"month_key": month.year * 12 + month.month})
+            try:
+                yield
+            except BaseException:
+                db.session.rollback()
+                raise
+            db.session.commit()
+
+    def create(self, month: date) -> PayrollRun:
+        """inregistreaza o rulare noua cu toti managerii activi (din contextul aplicatiei)"""
+        manager_ids = [
+            emp_id for (emp_id,) in db.session.query(Employee.emp_id)
+            .filter_by(role="MANAGER", is_active=True)
+            .order_by(Employee.emp_id)
+        ]
+        run = PayrollRun(month, manager_ids)
+        with self._lock:
+            self._runs[run.run_id] = run
+            while len(self._runs) > _KEEP_RUNS:
+                oldest = next(iter(self._runs.values()))
+                if oldest.status != "DONE":
+                    break
+                self._runs.popitem(last=False)
+        return run
+
+    def start(self, run: PayrollRun):
+        """ruleaza in fundal"""
+        threading.Thread(target=self.execute, args=(run,), name=f"payroll-run-{run.run_id[:8]}",
+                         daemon=True).start()
+
+    def execute(self, run: PayrollRun) -> PayrollRun:
+        """ruleaza (blocant) toate unitatile rularii"""
+        run.status, run.started_at = "RUNNING", time.time()
+        log.info("payroll_run_started", run_id=run.run_id, month=run.month.isoformat(),
+                 managers=len(run.managers), concurrency=self.concurrency)
+
+        list(self._executor.map(lambda manager_id: self._run_manager(run, manager_id), run.managers))
+
+        run.status, run.finished_at = "DONE", time.time()
+        summary = run.summary(with_managers=False)
+        log.info("payroll_run_finished", run_id=run.run_id, month=summary["month"],
+                 counts=summary["counts"], pdfs_generated=summary["pdfs_generated"],
+                 elapsed_sec=summary["elapsed_sec"])
+        return run
+
+    def _run_manager(self, run: PayrollRun, manager_id: int):
+        t0 = time.perf_counter()
+        run.update(manager_id, status="RUNNING")
+        with self.app.app_context():
+            try:
+                result = generate_manager_month(manager_id, run.month, self.pdf_workers)
+                nothing_new = result["csv"] != "generated" and not result["pdfs_generated"]
+                run.update(
+                    manager_id,
+                    status="SKIPPED" if nothing_new else "DONE",
+                    elapsed_ms=round((time.perf_counter() - t0) * 1000, 1),
+                    **result,
+                )
+            except Exception as e:
+                db.session.rollback()
+                log.exception("payroll_run_manager_failed", run_id=run.run_id, manager_id=manager_id)
+                run.update(manager_id, status="FAILED", error=str(e),
+                           elapsed_ms=round((time.perf_counter() - t0) * 1000, 1))
+            finally:
+                db.session.remove()
+
+
+def init_payroll_runs(app):
+    app.extensions["payroll_scheduler"] = PayrollScheduler(app)
+
+
+def scheduler() -> PayrollScheduler:
+    return current_app.extensions["payroll_scheduler"]
@@ -0,0 +1,75 @@
+import os
+from datetime import date
+
+from app import db
+from app.core.archive import pending_pdfs
+from app.core.outbox import OutboxMessage
+from app.database.models import Employee, EmailOutbox
+
+
+def payslip_messages(manager_id: int, month: date | None = None,
+                     emp_ids: set[int] | None = None) -> tuple[list[OutboxMessage], list[dict]]:
+    """
+    cate un email (cu pdf-ul) pt fiecare payslip netrimis al managerului (optional doar
+    pt o luna / anumiti angajati); intoarce (mesaje, fisiere sarite + motiv)
+    """
+    # PDF-urile generate si netrimise (din indexul arhivei)
+    pdf_files = pending_pdfs(manager_id, month)
+    if emp_ids is not None:
+        pdf_files = [(path, emp_id) for path, emp_id in pdf_files if emp_id in emp_ids]
+
+    # fisierele deja in coada (din cereri anterioare) nu se mai adauga o data
+    in_flight = {
+        path for (path,) in db.session.query(EmailOutbox.attachment_path).filter(
+            EmailOutbox.manager_id == manager_id,
+            EmailOutbox.status.in_(("PENDING", "SENDING")),
+        )
+    }
+
+    # toti destinatarii dintr-un singur query (emp_id din manifest, nu din numele fisierului)
+    recipient_ids = {emp_id for _, emp_id in pdf_files if emp_id is not None}
+    employees = {
+        e.emp_id: e
+        for e in Employee.query.filter(
+            Employee.emp_id.in_(recipient_ids),
+            Employee.manager_id == manager_id,
+            Employee.is_active.is_(True),
+        )
+    } if recipient_ids else {}
+
+    messages = []
+    skipped = []
+    subject = f"Payslip - {month or date.today():%B %Y}"
+
+    for pdf_path, emp_id in pdf_files:
+        base = os.path.basename(pdf_path)
+        if pdf_path in in_flight:
+            skipped.append({"file": base, "reason": "already_queued"})
+            continue
+
+        if emp_id is None:
+            skipped.append({"file": base, "reason": "not_in_manifest"})
+            continue
+
+        emp = employees.get(emp_id)
+        if not emp or not emp.email:
+            skipped.append({"file": base, "reason": "employee_not_found_or_no_email"})
+            continue
+
+        body_text = (
+            f"Hello {emp.first_name},\n\n"
+            f"Please find attached your payslip for the current month.\n"
+            f"The PDF is password-protected with your CNP.\n\n"
+            f"Best regards,\n"
+            f"Slip Salary App"
+        )
+
+        messages.append(OutboxMessage(
+            to_email=emp.email,
+            subject=subject,
+            body_text=body_text,
+            attachment_path=pdf_path,
+            emp_id=emp.emp_id,
+        ))
+
+    return messages, skipped
@@ -0,0 +1,294 @@
+import atexit
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator
+from io import BytesIO
+
+import pikepdf
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfgen import canvas
+
+from app.core.logging import get_logger
+from app.core.metrics import PAYSLIPS_GENERATED, observe_stage
+from app.core.payroll_row import PayrollRow
+from app.core.payslip_zip import file_crc32
+
+log = get_logger("payslip_pdf")
+
+# pool-ul de procese e creat la prima cerere si refolosit (per proces web);
+# _pool_lock: request-urile si thread-urile din fundal nu creeaza / inchid pool-uri in paralel
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+_pool_users = 0
+_pool_lock = threading.Condition()
+
+
+# versiunea layout-ului static; se schimba la orice modificare a template-ului
+TEMPLATE_VERSION = 1
+
+_FONT = "Helvetica"
+_FONT_SIZE = 12
+_X = 50
+
+# campurile variabile: (eticheta statica, y relativ la y0, valoare)
+_FIELDS = (
+    ("Employee Name: ", 0, lambda e, v: f"{e.first_name} {e.last_name}"),
+    ("CNP: ", 20, lambda e, v: f"{e.cnp}"),
+    ("Email: ", 40, lambda e, v: f"{e.email}"),
+    ("Grade: ", 60, lambda e, v: f"{e.grade}"),
+    ("Data angajării: ", 80, lambda e, v: f"{e.hire_date}"),
+    ("Salariu de bază: ", 140, lambda e, v: f"{e.base_salary:.2f} RON"),
+    ("Bonusuri (luna curentă): ", 160, lambda e, v: f"{v['bonuses']:.2f} RON"),
+    ("Zile concediu: ", 180, lambda e, v: f"{v['vacation_days']}"),
+    ("Salariu total de plată: ", 200, lambda e, v: f"{v['salary']:.2f} RON"),
+)
+
+# template-ul (pagina statica) e deschis o data per thread; per payslip se rescrie
+# doar stream-ul cu valorile, apoi se salveaza criptat
+_tls = threading.local()
+
+
+@lru_cache(maxsize=1)
+def _template_bytes() -> bytes:
+    """ layout-ul static al payslip-ului (titlu, sectiuni, etichete), randat o singura data """
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+
+    # title
+    c.setFont("Helvetica-Bold", 18)
+    c.drawString(_X, height - 80, "Payslip - current monthh")
+
+    # section
+    y = height - 120
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(_X, y - 120, "Detalii salariale")
+
+    # etichete
+    c.setFont(_FONT, _FONT_SIZE)
+    for label, dy, _ in _FIELDS:
+        c.drawString(_X, y - dy, label)
+
+    c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def _value_fonts() -> list:
+    font = pdfmetrics.getFont(_FONT)
+    return [font] + font.substitutionFonts
+
+
+def _font_resource(font) -> pikepdf.Dictionary:
+    res = pikepdf.Dictionary(Type=pikepdf.Name.Font, Subtype=pikepdf.Name.Type1,
+                             BaseFont=pikepdf.Name("/" + font.fontName))
+    if font.fontName == _FONT:
+        res.Encoding = pikepdf.Name.WinAnsiEncoding
+    return res
+
+
+def _template() -> tuple[pikepdf.Pdf, pikepdf.Stream, dict]:
+    template = getattr(_tls, "template", None)
+    if template is None:
+        pdf = pikepdf.open(BytesIO(_template_bytes()))
+        page = pdf.pages[0].obj
+
+        # refolosesc fonturile deja declarate de reportlab (F1, F2...), adaug doar ce lipseste
+        fonts = page.Resources.Font
+        by_base = {str(f.BaseFont)[1:]: name for name, f in fonts.items()}
+        font_names = {}
+        for font in _value_fonts():
+            name = by_base.get(font.fontName)
+            if name is None:
+                name = "/V" + font.fontName
+                fonts[name] = _font_resource(font)
+            font_names[font.fontName] = pikepdf.Name(name)
+
+        values = pdf.make_stream(b"")
+        static = page.Contents
+        static = list(static) if isinstance(static, pikepdf.Array) else [static]
+        page.Contents = pikepdf.Array(static + [values])
+
+        template = _tls.template = (pdf, values, font_names)
+    return template
+
+
+def _values_stream(employee: PayrollRow, values: dict, font_names: dict) -> bytes:
+    """ operatorii PDF care scriu valorile dupa etichetele din template """
+    fonts = _value_fonts()
+    y0 = A4[1] - 120
+    ops = []
+    for label, dy, fmt in _FIELDS:
+        x = _X + pdfmetrics.stringWidth(label, _FONT, _FONT_SIZE)
+        ops.append(([], pikepdf.Operator("BT")))
+        ops.append(([1, 0, 0, 1, x, y0 - dy], pikepdf.Operator("Tm")))
+        # ca reportlab: caracterele din afara WinAnsi trec pe fonturile de substitutie
+        for font, chunk in pdfmetrics.unicode2T1(fmt(employee, values), fonts):
+            ops.append(([font_names[font.fontName], _FONT_SIZE], pikepdf.Operator("Tf")))
+            ops.append(([pikepdf.String(chunk)], pikepdf.Operator("Tj")))
+        ops.append(([], pikepdf.Operator("ET")))
+    return pikepdf.unparse_content_stream(ops)
+
+
+def _fill_template(employee: PayrollRow, salary: float, bonuses: float, vacation_days: int) -> pikepdf.Pdf:
+    """ template-ul static cu valorile angajatului (in memorie, necriptat) """
+    pdf, values, font_names = _template()
+    values.write(_values_stream(employee, {
+        "salary": salary, "bonuses": bonuses, "vacation_days": vacation_days,
+    }, font_names))
+    return pdf
+
+
+def _save_encrypted(pdf: pikepdf.Pdf, employee: PayrollRow, output_path: str):
+    # parola PDF cu CNP - criptez direct din memorie, PDF-ul necriptat nu ajunge pe disc
+    _atomic_save(
+        pdf,
+        output_path,
+        encryption=pikepdf.Encryption(
+            owner=employee.cnp,
+            user=employee.cnp,
+            R=4  # AES-128 encryption
+        ),
+        object_stream_mode=pikepdf.ObjectStreamMode.generate,
+    )
+
+
+def generate_payslip_pdf(employee: PayrollRow, salary: float, bonuses: float, vacation_days: int, output_path: str):
+    """ Genereaza PDF-ul criptat cu CNP-ul angajatului in output_path, pe baza template-ului static """
+    _save_encrypted(_fill_template(employee, salary, bonuses, vacation_days), employee, output_path)
+
+
+def payslip_fingerprint(row: PayrollRow) -> str:
+    """amprenta tuturor input-urilor care ajung in PDF (inclusiv parola si versiunea template-ului)"""
+    payload = json.dumps([
+        TEMPLATE_VERSION, row.emp_id, row.first_name, row.last_name, row.cnp, row.email,
+        row.grade, str(row.hire_date), f"{row.base_salary:.2f}", f"{row.bonus_total:.2f}",
+        row.vacation_days,
+    ], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _atomic_save(pdf: pikepdf.Pdf, output_path: str, **save_kwargs):
+    """scrie intr-un fisier temporar din acelasi folder, apoi rename (o singura scriere)"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(output_path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pdf.save(f, **save_kwargs)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def render_payslip(row: PayrollRow, output_path: str) -> dict:
+    """
+    o unitate de lucru (ruleaza si in procesele din pool): randare + criptare + timp;
+    size/crc32 (pt arhivele ZIP) se calculeaza aici, cat fisierul e inca in page cache
+    """
+    t0 = time.perf_counter()
+    pdf = _fill_template(row, row.salary_to_pay, row.bonus_total, row.vacation_days)
+    t1 = time.perf_counter()
+    _save_encrypted(pdf, row, output_path)
+    t2 = time.perf_counter()
+    return {"file": output_path, "ms": round((t2 - t0) * 1000, 1),
+            "render_ms": round((t1 - t0) * 1000, 2), "encrypt_ms": round((t2 - t1) * 1000, 2),
+            "size": os.path.getsize(output_path), "crc32": file_crc32(output_path)}
+
+
+def _render_or_error(row: PayrollRow, output_path: str) -> dict:
+    """render_payslip, dar o eroare devine rezultatul acelui payslip (restul lotului continua)"""
+    try:
+        return render_payslip(row, output_path)
+    except Exception as e:
+        return {"file": output_path, "error": f"{type(e).__name__}: {e}"}
+
+
+@contextmanager
+def _executor(workers: int) -> Iterator[ProcessPoolExecutor]:
+    """
+    pool-ul cu `workers` procese, tinut deschis cat dureaza blocul; un alt numar de workeri
+    inlocuieste pool-ul doar dupa ce nu il mai foloseste niciun thread. Un pool stricat
+    (worker omorat: OOM, segfault) e inlocuit imediat
+    """
+    global _pool, _pool_workers, _pool_users
+    with _pool_lock:
+        while _pool is not None and _pool_workers != workers and _pool_users and not _pool._broken:
+            _pool_lock.wait()
+        if _pool is None or _pool_workers != workers or _pool._broken:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            # spawn, nu fork - serverul web e multi-threaded
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+            _pool_users = 0
+        _pool_users += 1
+        pool = _pool
+    try:
+        yield pool
+    finally:
+        with _pool_lock:
+            if pool is _pool:  # un pool inlocuit intre timp nu mai e numarat
+                _pool_users -= 1
+            _pool_lock.notify_all()
+
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+
+
+def render_payslips(jobs: list[tuple[PayrollRow, str]], workers: int = 1,
+                    progress: Callable[[int, dict], None] | None = None) -> list[dict]:
+    """
+    randeaza (row, output_path) fie serial (workers <= 1),
+    fie distribuit pe un pool de `workers` procese; ordinea rezultatelor = ordinea jobs.
+    Un payslip care esueaza are `error` in rezultat, in loc sa opreasca tot lotul.
+    progress(index, rezultat) e apelat pe masura ce payslip-urile sunt gata
+    """
+    timings: list[dict] = []
+    if workers <= 1 or len(jobs) <= 1:
+        _collect((_render_or_error(row, path) for row, path in jobs), timings, progress)
+        return timings
+
+    # pool stricat in timpul lotului -> payslip-urile ramase se reiau o data pe un pool nou
+    for attempt in (1, 2):
+        rest = jobs[len(timings):]
+        chunksize = max(1, len(rest) // (workers * 4))
+        try:
+            with _executor(workers) as pool:
+                results = pool.map(_render_or_error, [row for row, _ in rest], [path for _, path in rest],
+                                   chunksize=chunksize)
+                _collect(results, timings, progress)
+            return timings
+        except BrokenProcessPool as e:
+            error = f"BrokenProcessPool: {e}"
+            log.warning("payslip_pool_broken", attempt=attempt, done=len(timings), remaining=len(jobs) - len(timings))
+
+    _collect(({"file": path, "error": error} for _, path in jobs[len(timings):]), timings, progress)
+    return timings
+
+
+def _collect(results: Iterable[dict], timings: list[dict], progress: Callable[[int, dict], None] | None):
+    """adauga rezultatele in timings (pe masura ce sosesc - raman si daca pool-ul se strica)"""
+    for result in results:
+        i = len(timings)
+        # metricile se inregistreaza aici (procesul web), nu in procesele din pool
+        if "error" not in result:
+            observe_stage("pdf_render", result["render_ms"] / 1000)
+            observe_stage("pdf_encrypt", result["encrypt_ms"] / 1000)
+            PAYSLIPS_GENERATED.inc()
+        timings.append(result)
+        if progress is not None:
+            progress(i, result)
@@ -0,0 +1,154 @@
+import hashlib
+import io
+import os
+import struct
+import time
+import zlib
+from bisect import bisect_right
+from typing import NamedTuple
+
+# ZIP "stored" (fara compresie - PDF-urile sunt deja comprimate + criptate), construit la cerere
+# peste fisierele de pe disc: layout-ul e complet determinat de nume + dimensiuni + CRC, deci
+# arhiva are o lungime cunoscuta dinainte si orice offset poate fi citit direct (HTTP Range)
+
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_END_OF_CENTRAL_DIR = struct.Struct("<IHHHHIIH")
+_UTF8_NAMES = 0x0800
+_VERSION = 20
+
+
+class ZipEntry(NamedTuple):
+    name: str   # numele din arhiva
+    path: str   # fisierul de pe disc
+    size: int
+    crc: int
+    mtime: float
+
+
+def file_crc32(path: str) -> int:
+    crc = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def zip_entry(path: str, name: str | None = None, crc: int | None = None,
+              size: int | None = None) -> ZipEntry:
+    """intrare pt fisierul de pe disc; crc/size precalculate sunt folosite doar daca size se potriveste"""
+    st = os.stat(path)
+    if crc is None or size != st.st_size:
+        crc = file_crc32(path)
+    return ZipEntry(name or os.path.basename(path), path, st.st_size, crc, st.st_mtime)
+
+
+def _dos_datetime(ts: float) -> tuple[int, int]:
+    t = time.localtime(max(ts, 315532800))  # ZIP nu poate reprezenta date < 1980
+    return (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2), \
+        ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+
+
+class StoredZip(io.RawIOBase):
+    """
+    fisier virtual, read-only si seekable, cu arhiva ZIP a intrarilor date;
+    in memorie stau doar header-ele (~100 B per fisier), datele se citesc de pe disc la cerere
+    """
+
+    def __init__(self, entries: list[ZipEntry]):
+        super().__init__()
+        if len(entries) > 0xFFFF:
+            raise ValueError("too many files for a ZIP without ZIP64")
+
+        self._segments: list[tuple[int, int, bytes | None, str | None]] = []
+        self.size = 0
+        central = []
+        for e in entries:
+            name = e.name.encode("utf-8")
+            dos_time, dos_date = _dos_datetime(e.mtime)
+            offset = self.size
+            self._add(_LOCAL_HEADER.pack(
+                0x04034B50, _VERSION, _UTF8_NAMES, 0, dos_time, dos_date,
+                e.crc, e.size, e.size, len(name), 0,
+            ) + name)
+            self._add(None, e.path, e.size)
+            central.append(_CENTRAL_HEADER.pack(
+                0x02014B50, _VERSION, _VERSION, _UTF8_NAMES, 0, dos_time, dos_date,
+                e.crc, e.size, e.size, len(name), 0, 0, 0, 0, 0, offset,
+            ) + name)
+
+        directory = b"".join(central)
+        cd_offset = self.size
+        if cd_offset + len(directory) > 0xFFFFFFFF:
+            raise ValueError("archive too large for a ZIP without ZIP64")
+        self._add(directory)
+        self._add(_END_OF_CENTRAL_DIR.pack(
+            0x06054B50, 0, 0, len(entries), len(entries), len(directory), cd_offset, 0,
+        ))
+
+        self._starts = [s[0] for s in self._segments]
+        self.etag = hashlib.sha256(
+            b"".join(f"{e.name}\0{e.size}\0{e.crc}\0".encode() for e in entries)
+        ).hexdigest()[:32]
+        self._pos = 0
+        self._fh = None
+        self._fh_path = None
+
+    def _add(self, data: bytes | None, path: str | None = None, length: int | None = None):
+        length = len(data) if data is not None else length
+        if length:
+            self._segments.append((self.size, length, data, path))
+            self.size += length
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError("negative seek position")
+        self._pos = offset
+        return offset
+
+    def readinto(self, buffer) -> int:
+        if self._pos >= self.size:
+            return 0
+        start, length, data, path = self._segments[bisect_right(self._starts, self._pos) - 1]
+        rel = self._pos - start
+        n = min(len(buffer), length - rel)
+
+        if data is not None:
+            buffer[:n] = data[rel:rel + n]
+        else:
+            fh = self._open(path)
+            fh.seek(rel)
+            chunk = fh.read(n)
+            if len(chunk) != n:
+                raise OSError(f"{path} changed while streaming the archive")
+            buffer[:n] = chunk
+
+        self._pos += n
+        return n
+
+    def _open(self, path: str):
+        if self._fh_path != path:
+            if self._fh is not None:
+                self._fh.close()
+            self._fh = open(path, "rb")
+            self._fh_path = path
+        return self._fh
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        super().close()
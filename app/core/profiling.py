@@ -0,0 +1,151 @@
+import cProfile
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from flask import current_app, g, request
+
+from app.core.logging import get_logger
+
+log = get_logger("profiling")
+
+# profilare opt-in per request (PROFILE_ENABLED): cu header-ul X-Profile sau pt o fractiune
+# PROFILE_SAMPLE_RATE din request-uri. Header-ul e luat in seama doar daca:
+#   - X-Profile: 1 si request-ul are un Bearer token valid de ADMIN, sau
+#   - X-Profile: <PROFILE_SECRET> (daca e configurat)
+# Rezultatul ajunge in PROFILE_DIR, unde raman cel mult PROFILE_MAX_FILES fisiere (cele mai vechi
+# se sterg):
+#   cprofile -> <id>.prof (pstats: snakeviz, gprof2dot, flameprof)
+#   sample   -> <id>.collapsed (stive colapsate: flamegraph.pl, speedscope)
+# Se profileaza doar thread-ul request-ului (nu si procesele din pool-ul de PDF-uri).
+
+PROFILE_HEADER = "X-Profile"
+
+
+class CProfileSession:
+    ext = "prof"
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+
+    def write(self, path: str):
+        self._profile.dump_stats(path)
+
+
+class StackSampler:
+    """esantioneaza stiva thread-ului curent la fiecare `interval` secunde (overhead mic, fara tracing)"""
+    ext = "collapsed"
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _header_allowed(value: str) -> bool:
+    secret = current_app.config["PROFILE_SECRET"]
+    if secret and hmac.compare_digest(value.encode("utf-8"), secret.encode("utf-8")):
+        return True
+    if value.lower() not in ("1", "true", "yes"):
+        return False
+    from app.core.auth import _authenticate  # import circular la nivel de modul (app -> http_logging)
+
+    emp, _ = _authenticate()
+    return emp is not None and emp.role == "ADMIN"
+
+
+def _wanted() -> bool:
+    config = current_app.config
+    if not config["PROFILE_ENABLED"]:
+        return False
+    header = request.headers.get(PROFILE_HEADER)
+    if header and _header_allowed(header):
+        return True
+    rate = config["PROFILE_SAMPLE_RATE"]
+    return rate > 0 and random.random() < rate
+
+
+def _prune(profile_dir: str, keep: int):
+    """pastreaza doar cele mai noi `keep` profiluri din profile_dir"""
+    try:
+        files = sorted(
+            (e for e in os.scandir(profile_dir) if e.is_file() and e.name.endswith((".prof", ".collapsed"))),
+            key=lambda e: e.stat().st_mtime,
+        )
+    except OSError:
+        return
+    for entry in files[:max(len(files) - keep, 0)]:
+        try:
+            os.unlink(entry.path)
+        except OSError:
+            pass
+
+
+def start_profile():
+    """porneste profilarea request-ului curent, daca e ceruta / esantionata"""
+    if not _wanted():
+        return
+    try:
+        if current_app.config["PROFILE_MODE"] == "sample":
+            session = StackSampler(current_app.config["PROFILE_SAMPLE_INTERVAL_MS"] / 1000)
+        else:
+            session = CProfileSession()
+    except ValueError:  # alt profiler deja activ in proces (cProfile, python >= 3.12)
+        log.warning("profile_unavailable", path=request.path)
+        return
+    g._profile = session
+
+
+def finish_profile() -> str | None:
+    """opreste profilarea si scrie fisierul in PROFILE_DIR; intoarce id-ul profilului"""
+    session = g.pop("_profile", None)
+    if session is None:
+        return None
+    session.stop()
+
+    profile_dir = current_app.config["PROFILE_DIR"]
+    os.makedirs(profile_dir, exist_ok=True)
+    endpoint = (request.endpoint or "unmatched").replace(".", "_")
+    profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}_{endpoint}_{uuid.uuid4().hex[:8]}"
+    session.write(os.path.join(profile_dir, f"{profile_id}.{session.ext}"))
+    _prune(profile_dir, current_app.config["PROFILE_MAX_FILES"])
+    return profile_id
+
+
+def discard_profile():
+    """request terminat fara after_request (exceptie nepreluata) -> doar opreste profiler-ul"""
+    session = g.pop("_profile", None)
+    if session is not None:
+        session.stop()
@@ -0,0 +1,85 @@
+import time
+from collections import Counter
+
+from flask import g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# statistici per request: query-uri SQL (numar, timp, randuri raportate) + durata etapelor
+# (metrics.stage); colectate doar in thread-ul request-ului - thread-urile din fundal au alt
+# app context / alt `g`
+
+_installed = False
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.db_sec = 0.0
+        # suma cursor.rowcount, asa cum o raporteaza driver-ul: randuri afectate de DML; pt SELECT
+        # psycopg2 da randurile intoarse de un cursor client-side, altele / cursor server-side -1
+        self.rows_reported = 0
+        self.statements: Counter[str] = Counter()
+        self.spans: dict[str, float] = {}
+
+    def add_query(self, statement: str, sec: float, rowcount: int):
+        self.queries += 1
+        self.db_sec += sec
+        if rowcount > 0:  # -1 cand driver-ul nu stie (ex. cursor server-side)
+            self.rows_reported += rowcount
+        self.statements[statement] += 1
+
+    def add_span(self, name: str, sec: float):
+        self.spans[name] = self.spans.get(name, 0.0) + sec
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """query-uri identice (acelasi SQL parametrizat) rulate de >= threshold ori - semn de N+1"""
+        if threshold <= 0:
+            return []
+        return [(s, n) for s, n in self.statements.most_common() if n >= threshold]
+
+
+def current_stats() -> RequestStats | None:
+    return g.get("_request_stats") if has_request_context() else None
+
+
+def begin_request_stats() -> RequestStats:
+    g._request_stats = RequestStats()
+    return g._request_stats
+
+
+def server_timing(stats: RequestStats, total_sec: float) -> str:
+    parts = [f'db;dur={stats.db_sec * 1000:.1f};desc="{stats.queries} queries"']
+    parts += [f"{name};dur={sec * 1000:.1f}" for name, sec in stats.spans.items()]
+    parts.append(f"total;dur={total_sec * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_stats() is not None:
+        conn.info.setdefault("_query_t0", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_stats()
+    starts = conn.info.get("_query_t0")
+    if stats is None or not starts:
+        return
+    stats.add_query(statement, time.perf_counter() - starts.pop(), cursor.rowcount)
+
+
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get("_query_t0") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def install_sql_stats():
+    """asculta toate engine-urile (o singura data per proces)"""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    _installed = True
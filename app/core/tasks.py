@@ -0,0 +1,140 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from flask import current_app
+
+from app import db
+from app.core.logging import get_logger
+
+log = get_logger("tasks")
+
+# cate task-uri terminate raman in memorie pt /jobs/<job_id>
+_KEEP_TASKS = 200
+
+
+def progress_stats(total: int, done: int, elapsed: float) -> dict:
+    """procent, throughput (items/s) si ETA pt `done` din `total`, dupa `elapsed` secunde"""
+    rate = done / elapsed if elapsed > 0 and done else None
+    return {
+        "total": total,
+        "done": done,
+        "percent": round(done * 100 / total, 1) if total else 100.0,
+        "elapsed_sec": round(elapsed, 2),
+        "items_per_sec": round(rate, 2) if rate else None,
+        "eta_sec": round((total - done) / rate, 1) if rate and done < total else None,
+    }
+
+
+class Task:
+    """
+    o operatie lunga rulata in fundal (ex. generarea payslip-urilor unei echipe);
+    fiecare element terminat e adaugat in `events` (citite de endpoint-ul SSE)
+    """
+
+    def __init__(self, kind: str, manager_id: int, total: int):
+        self.job_id = uuid.uuid4().hex
+        self.kind = kind
+        self.manager_id = manager_id
+        self.total = total
+        self.status = "QUEUED"  # QUEUED | RUNNING | DONE | FAILED
+        self.failed = 0
+        self.events: list[dict] = []
+        self.result: dict | None = None
+        self.error: str | None = None
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self._cond = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("DONE", "FAILED")
+
+    def start(self):
+        with self._cond:
+            self.status, self.started_at = "RUNNING", time.time()
+            self._cond.notify_all()
+
+    def item(self, ok: bool = True, **data):
+        """un element terminat (ex. payslip-ul unui angajat)"""
+        with self._cond:
+            if not ok:
+                self.failed += 1
+            self.events.append(data | {"ok": ok})
+            self._cond.notify_all()
+
+    def finish(self, result: dict | None = None, error: str | None = None):
+        with self._cond:
+            self.status = "FAILED" if error else "DONE"
+            self.result, self.error = result, error
+            self.finished_at = time.time()
+            self._cond.notify_all()
+
+    def wait(self, cursor: int, timeout: float) -> bool:
+        """asteapta elemente dupa `cursor` sau terminarea task-ului; False la timeout"""
+        with self._cond:
+            return self._cond.wait_for(lambda: len(self.events) > cursor or self.finished, timeout)
+
+    def progress(self) -> dict:
+        with self._cond:
+            elapsed = ((self.finished_at or time.time()) - self.started_at) if self.started_at else 0.0
+            return {"job_id": self.job_id, "kind": self.kind, "status": self.status,
+                    "failed": self.failed} | progress_stats(self.total, len(self.events), elapsed)
+
+    def summary(self) -> dict:
+        summary = self.progress()
+        with self._cond:
+            summary |= {"manager_id": self.manager_id, "result": self.result, "error": self.error,
+                        "items": list(self.events)}
+        return summary
+
+
+class TaskRunner:
+    """task-urile procesului: rulate pe un pool mic de thread-uri (TASK_CONCURRENCY), in app context"""
+
+    def __init__(self, app):
+        self.app = app
+        self._executor = ThreadPoolExecutor(max_workers=app.config["TASK_CONCURRENCY"], thread_name_prefix="task")
+        self._tasks: OrderedDict[str, Task] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, task: Task, fn: Callable[[Task], dict | None]) -> Task:
+        with self._lock:
+            self._tasks[task.job_id] = task
+            while len(self._tasks) > _KEEP_TASKS:
+                oldest = next(iter(self._tasks.values()))
+                if not oldest.finished:
+                    break
+                self._tasks.popitem(last=False)
+        self._executor.submit(self._run, task, fn)
+        return task
+
+    def get(self, job_id: str) -> Task | None:
+        with self._lock:
+            return self._tasks.get(job_id)
+
+    def _run(self, task: Task, fn):
+        with self.app.app_context():
+            task.start()
+            try:
+                task.finish(result=fn(task))
+                log.info("task_done", job_id=task.job_id, kind=task.kind, manager_id=task.manager_id,
+                         total=task.total, failed=task.failed)
+            except Exception as e:
+                db.session.rollback()
+                log.exception("task_failed", job_id=task.job_id, kind=task.kind, manager_id=task.manager_id)
+                task.finish(error=str(e))
+            finally:
+                db.session.remove()
+
+
+def init_tasks(app):
+    app.extensions["tasks"] = TaskRunner(app)
+
+
+def tasks() -> TaskRunner:
+    return current_app.extensions["tasks"]
@@ -0,0 +1,117 @@
+import os
+import time
+from datetime import date, timedelta
+from typing import NamedTuple
+
+from sqlalchemy.dialects.postgresql import insert
+
+from app import db
+from app.core.cache import TTLCache
+from app.database.models import Holiday
+
+# calendarul de lucru: pt fiecare luna, un bitmap cu zilele lucratoare (bitul i = ziua i+1,
+# luni - vineri, fara zilele din tabela holidays). Bitmap-ul e calculat o data per luna
+# (cache in proces) si trimis ca parametru query-urilor de payroll, care numara zilele de
+# concediu lucratoare cu un AND intre bitmap si intervalul concediului.
+
+CALENDAR_CACHE_SEC = int(os.getenv("CALENDAR_CACHE_SEC", "300"))
+
+_cache = TTLCache(max_size=240)
+
+
+def orthodox_easter(year: int) -> date:
+    """Pastele ortodox (algoritmul Meeus pt calendarul iulian, convertit in gregorian; 1900-2099)"""
+    a, b, c = year % 4, year % 7, year % 19
+    d = (19 * c + 15) % 30
+    e = (2 * a + 4 * b - d + 34) % 7
+    month, day = divmod(d + e + 114, 31)
+    return date(year, month, day + 1) + timedelta(days=13)
+
+
+def romanian_holidays(year: int) -> dict[date, str]:
+    """zilele de sarbatoare legala din Codul muncii (art. 139), pt anul dat"""
+    easter = orthodox_easter(year)
+    days = {
+        date(year, 1, 1): "Anul Nou",
+        date(year, 1, 2): "Anul Nou",
+        easter: "Paștele",
+        easter + timedelta(days=1): "Paștele",
+        date(year, 5, 1): "Ziua Muncii",
+        easter + timedelta(days=49): "Rusaliile",
+        easter + timedelta(days=50): "Rusaliile",
+        date(year, 8, 15): "Adormirea Maicii Domnului",
+        date(year, 12, 1): "Ziua Națională",
+        date(year, 12, 25): "Crăciunul",
+        date(year, 12, 26): "Crăciunul",
+    }
+    if year >= 2012:
+        days[date(year, 11, 30)] = "Sfântul Andrei"
+    if year >= 2017:
+        days[date(year, 1, 24)] = "Ziua Unirii Principatelor Române"
+        days[date(year, 6, 1)] = "Ziua Copilului"
+    if year >= 2018:
+        days[easter - timedelta(days=2)] = "Vinerea Mare"
+    if year >= 2024:
+        days[date(year, 1, 6)] = "Boboteaza"
+        days[date(year, 1, 7)] = "Sfântul Ioan Botezătorul"
+    return dict(sorted(days.items()))
+
+
+def _month_days(m0: date) -> int:
+    return ((m0.replace(day=28) + timedelta(days=4)).replace(day=1) - m0).days
+
+
+def business_day_mask(d: date, holidays: set[date] | frozenset[date] = frozenset()) -> int:
+    """bitmap-ul zilelor lucratoare din luna lui d: bitul i setat <=> ziua i+1 e lucratoare"""
+    m0 = d.replace(day=1)
+    first_weekday = m0.weekday()
+    mask = 0
+    for i in range(_month_days(m0)):
+        if (first_weekday + i) % 7 < 5:  # 0 = luni, 4 = vineri
+            mask |= 1 << i
+    for h in holidays:
+        if h.year == m0.year and h.month == m0.month:
+            mask &= ~(1 << (h.day - 1))
+    return mask
+
+
+class MonthCalendar(NamedTuple):
+    month: date  # prima zi din luna
+    days: int
+    mask: int
+    holidays: frozenset[date]
+
+    @property
+    def working_days(self) -> int:
+        return self.mask.bit_count()
+
+
+def month_calendar(d: date) -> MonthCalendar:
+    """calendarul lunii lui d, cu sarbatorile din tabela holidays (cache CALENDAR_CACHE_SEC)"""
+    m0 = d.replace(day=1)
+    cal = _cache.get(m0)
+    if cal is None:
+        days = _month_days(m0)
+        holidays = frozenset(db.session.execute(
+            db.select(Holiday.day).where(Holiday.day.between(m0, m0 + timedelta(days=days - 1)))
+        ).scalars())
+        cal = MonthCalendar(m0, days, business_day_mask(m0, holidays), holidays)
+        _cache.put(m0, cal, expires_at=time.time() + CALENDAR_CACHE_SEC)
+    return cal
+
+
+def clear_calendar_cache(d: date | None = None):
+    """uita calendarul lunii lui d (None = toate lunile); urmatoarea citire reciteste holidays"""
+    if d is None:
+        _cache.clear()
+    else:
+        _cache.invalidate(d.replace(day=1))
+
+
+def seed_holidays(years: range) -> int:
+    """adauga sarbatorile legale din Romania pt anii dati (cele existente raman neschimbate)"""
+    rows = [{"day": day, "name": name} for y in years for day, name in romanian_holidays(y).items()]
+    result = db.session.execute(insert(Holiday).values(rows).on_conflict_do_nothing(index_elements=["day"]))
+    db.session.commit()
+    clear_calendar_cache()
+    return result.rowcount
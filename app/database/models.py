@@ -18,6 +18,11 @@ class Employee(orm.Model):
 
     manager = orm.relationship("Employee", remote_side=[emp_id], backref="reports")
 
+    __table_args__ = (
+        orm.Index("ix_employees_manager_active", manager_id, emp_id,
+                  postgresql_where=is_active),
+    )
+
 class Bonus(orm.Model):
     __tablename__ = "bonuses"
 
@@ -30,6 +35,11 @@ class Bonus(orm.Model):
 
     employee = orm.relationship("Employee", backref="bonuses")
 
+    __table_args__ = (
+        orm.Index("ix_bonuses_emp_month", emp_id, effective_month,
+                  postgresql_include=["amount"]),
+    )
+
 class Vacation(orm.Model):
     __tablename__ = "vacations"
 
@@ -41,3 +51,110 @@ class Vacation(orm.Model):
     created_at = orm.Column(orm.DateTime, nullable=False, server_default=orm.func.now())
 
     employee = orm.relationship("Employee", backref="vacations")
+
+    __table_args__ = (
+        orm.Index("ix_vacations_emp_period", emp_id,
+                  orm.func.daterange(start_date, end_date, orm.literal_column("'[]'")),
+                  postgresql_using="gist"),
+    )
+
+class Holiday(orm.Model):
+    """zile nelucratoare (sarbatori legale + eventual zile libere ale firmei) - calendarul de payroll"""
+    __tablename__ = "holidays"
+
+    day = orm.Column(orm.Date, primary_key=True)
+    name = orm.Column(orm.String(100), nullable=False)
+
+class PayrollMonthSnapshot(orm.Model):
+    """agregatul lunar pt un angajat; randurile sunt invalidate de triggere la modificari"""
+    __tablename__ = "payroll_month_snapshot"
+
+    emp_id = orm.Column(orm.Integer, orm.ForeignKey("employees.emp_id", ondelete="CASCADE"), primary_key=True)
+    month = orm.Column(orm.Date, primary_key=True)  # prima zi din luna
+    base_salary = orm.Column(orm.Numeric(12, 2), nullable=False)
+    bonus_total = orm.Column(orm.Numeric(12, 2), nullable=False, default=0)
+    vacation_days = orm.Column(orm.Integer, nullable=False, default=0)
+    working_days = orm.Column(orm.Integer, nullable=False)
+    refreshed_at = orm.Column(orm.DateTime, nullable=False, server_default=orm.func.now())
+
+class EmailOutbox(orm.Model):
+    """mesaj de trimis; dispatcher-ul il marcheaza SENT inainte de a muta fisierul in sent/"""
+    __tablename__ = "email_outbox"
+
+    msg_id = orm.Column(orm.Integer, primary_key=True)
+    job_id = orm.Column(orm.String(32), nullable=False, index=True)
+    manager_id = orm.Column(orm.Integer, orm.ForeignKey("employees.emp_id", ondelete="CASCADE"), nullable=False)
+    emp_id = orm.Column(orm.Integer, orm.ForeignKey("employees.emp_id", ondelete="SET NULL"), nullable=True)
+    to_email = orm.Column(orm.String(120), nullable=False)
+    subject = orm.Column(orm.String(200), nullable=False)
+    body = orm.Column(orm.Text, nullable=False)
+    attachment_path = orm.Column(orm.String(500), nullable=False)
+    maintype = orm.Column(orm.String(32), nullable=False, default="application")
+    subtype = orm.Column(orm.String(32), nullable=False, default="pdf")
+    status = orm.Column(orm.String(12), nullable=False, default="PENDING")  # 'PENDING' | 'SENDING' | 'SENT' | 'FAILED'
+    attempts = orm.Column(orm.Integer, nullable=False, default=0)
+    next_attempt_at = orm.Column(orm.DateTime, nullable=False, server_default=orm.func.now())
+    locked_at = orm.Column(orm.DateTime)
+    last_error = orm.Column(orm.Text)
+    sent_at = orm.Column(orm.DateTime)
+    archived_to = orm.Column(orm.String(500))
+    created_at = orm.Column(orm.DateTime, nullable=False, server_default=orm.func.now())
+
+    __table_args__ = (
+        orm.Index("ix_email_outbox_due", next_attempt_at, msg_id,
+                  postgresql_where=(status == "PENDING")),
+    )
+
+class ArchiveFile(orm.Model):
+    """indexul fisierelor din archive/ (CSV-uri si PDF-uri), actualizat la generare si la trimitere"""
+    __tablename__ = "archive_files"
+
+    file_id = orm.Column(orm.Integer, primary_key=True)
+    manager_id = orm.Column(orm.Integer, orm.ForeignKey("employees.emp_id", ondelete="CASCADE"), nullable=False)
+    month = orm.Column(orm.Date, nullable=False)  # prima zi din luna
+    kind = orm.Column(orm.String(8), nullable=False)  # 'CSV' | 'PDF'
+    path = orm.Column(orm.String(500), nullable=False, unique=True)
+    emp_id = orm.Column(orm.Integer, orm.ForeignKey("employees.emp_id", ondelete="SET NULL"), nullable=True)
+    status = orm.Column(orm.String(8), nullable=False, default="PENDING")  # 'PENDING' | 'SENT'
+    fingerprint = orm.Column(orm.String(64))  # PDF: sha256 al input-urilor payslip-ului
+    created_at = orm.Column(orm.DateTime, nullable=False, server_default=orm.func.now())
+    sent_at = orm.Column(orm.DateTime)
+
+    __table_args__ = (
+        orm.Index("ix_archive_files_pending", manager_id, kind, month, created_at,
+                  postgresql_where=(status == "PENDING")),
+    )
+
+
+class PayrollJob(orm.Model):
+    """
+    unitati de lucru pt workerii `flask payroll worker` (pe orice nod):
+    CSV / PDF / SEND, per manager (emp_id NULL) sau per angajat, pt o luna
+    """
+    __tablename__ = "payroll_jobs"
+
+    job_id = orm.Column(orm.Integer, primary_key=True)
+    run_id = orm.Column(orm.String(32), nullable=False, index=True)
+    kind = orm.Column(orm.String(8), nullable=False)  # 'CSV' | 'PDF' | 'SEND'
+    manager_id = orm.Column(orm.Integer, orm.ForeignKey("employees.emp_id", ondelete="CASCADE"), nullable=False)
+    emp_id = orm.Column(orm.Integer, orm.ForeignKey("employees.emp_id", ondelete="CASCADE"), nullable=True)
+    month = orm.Column(orm.Date, nullable=False)  # prima zi din luna
+    send_after = orm.Column(orm.Boolean, nullable=False, default=False)  # PDF -> SEND la final
+    status = orm.Column(orm.String(8), nullable=False, default="PENDING")  # 'PENDING' | 'RUNNING' | 'DONE' | 'FAILED'
+    attempts = orm.Column(orm.Integer, nullable=False, default=0)
+    next_attempt_at = orm.Column(orm.DateTime, nullable=False, server_default=orm.func.now())
+    worker_id = orm.Column(orm.String(100))
+    lease_until = orm.Column(orm.DateTime)
+    heartbeat_at = orm.Column(orm.DateTime)
+    items = orm.Column(orm.Integer, nullable=False, default=0)  # PDF-uri generate / emailuri trimise
+    result = orm.Column(orm.Text)  # JSON
+    last_error = orm.Column(orm.Text)
+    created_at = orm.Column(orm.DateTime, nullable=False, server_default=orm.func.now())
+    started_at = orm.Column(orm.DateTime)
+    finished_at = orm.Column(orm.DateTime)
+
+    __table_args__ = (
+        orm.Index("ix_payroll_jobs_due", next_attempt_at, job_id, postgresql_where=(status == "PENDING")),
+        orm.Index("ix_payroll_jobs_lease", lease_until, postgresql_where=(status == "RUNNING")),
+        orm.Index("ix_payroll_jobs_month_active", month, postgresql_where=status.in_(("PENDING", "RUNNING"))),
+    )
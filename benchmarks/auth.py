@@ -0,0 +1,69 @@
+"""
+Costul autentificarii per request (manager_required): fara cache (jwt.decode + query
+Employee la fiecare request) vs cu token_cache + principal_cache calde.
+
+    python -m benchmarks.auth -n 5000
+
+Implicit foloseste o baza SQLite in memorie (doar tabela employees);
+cu DATABASE_URL setat masoara pe baza reala (managerul --emp-id trebuie sa existe).
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=5000)
+    parser.add_argument("--emp-id", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    in_memory = not os.getenv("DATABASE_URL")
+    if in_memory:
+        os.environ["DATABASE_URL"] = "sqlite://"
+
+    from app import create_app, db
+    from app.core.auth import generate_token, manager_required, principal_cache, token_cache
+    from app.database.models import Employee
+
+    app = create_app()
+    with app.app_context():
+        if in_memory:
+            Employee.__table__.create(db.engine)
+            db.session.add(Employee(emp_id=args.emp_id, first_name="Bench", last_name="Manager",
+                                    cnp="1900101000000", email="bench@example.com",
+                                    role="MANAGER", base_salary=0))
+            db.session.commit()
+        token = generate_token(db.session.get(Employee, args.emp_id))
+
+    view = manager_required()(lambda: "ok")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def measure(cold: bool) -> dict:
+        timings = []
+        with app.test_request_context("/", headers=headers):
+            for _ in range(args.n):
+                if cold:
+                    token_cache.clear()
+                    principal_cache.clear()
+                t0 = time.perf_counter()
+                assert view() == "ok"
+                timings.append((time.perf_counter() - t0) * 1e6)
+        return {
+            "mean_us": round(statistics.mean(timings), 1),
+            "p50_us": round(statistics.median(timings), 1),
+            "p95_us": round(statistics.quantiles(timings, n=20)[-1], 1),
+        }
+
+    results = {"uncached": measure(cold=True), "cached": measure(cold=False)}
+    results["token_cache"] = token_cache.stats()
+    results["principal_cache"] = principal_cache.stats()
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
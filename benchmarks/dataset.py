@@ -0,0 +1,134 @@
+"""
+Generator de date sintetice (deterministe) pt o baza Postgres SCRATCH: `managers` manageri,
+fiecare cu `reports` subordonati, plus `years` ani de bonusuri si concedii pana in luna curenta.
+
+    DATABASE_URL=postgresql://.../payroll_bench python -m benchmarks.dataset --managers 50 --reports 40 --years 3 --reset
+
+Schema trebuie sa existe (flask db upgrade). Managerul i are emp_id = i, subordonatii lui
+sunt emp_id = managers + (i - 1) * reports + 1 .. managers + i * reports; login cu
+email = mgr<i>@bench.local, cnp = lpad(i, 13, '0').
+"""
+import argparse
+import json
+import sys
+from datetime import date
+
+from app import db
+
+# tabelele golite de --reset (ordinea nu conteaza - TRUNCATE ... CASCADE)
+TABLES = ("payroll_jobs", "email_outbox", "archive_files", "payroll_month_snapshot",
+          "bonuses", "vacations", "employees")
+
+
+def manager_login(manager_id: int) -> dict:
+    return {"email": f"mgr{manager_id}@bench.local", "cnp": str(manager_id).zfill(13)}
+
+
+def first_month(years: int, until: date | None = None) -> date:
+    """prima luna din istoric: `years` ani care se termina cu luna lui until (implicit luna curenta)"""
+    until = until or date.today()
+    months = until.year * 12 + until.month - 1 - (years * 12 - 1)
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def reset():
+    db.session.execute(db.text(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE"))
+    db.session.commit()
+
+
+def seed(managers: int, reports: int, years: int = 3, bonuses_per_year: int = 4,
+         vacations_per_year: int = 3, until: date | None = None):
+    """genereaza compania direct in Postgres (generate_series), fara randomness -> reproductibil"""
+    if not 0 <= bonuses_per_year <= 12 or not 0 <= vacations_per_year <= 11:
+        raise ValueError("bonuses_per_year must be 0..12 and vacations_per_year 0..11")
+    params = {
+        "managers": managers,
+        "reports": reports,
+        "employees": managers * (reports + 1),
+        "start": first_month(years, until),
+        "months": years * 12,
+        "years": years,
+        "bonuses": bonuses_per_year,
+        "vacations": vacations_per_year,
+        # concediile unui an nu se suprapun: cate unul la fiecare `spacing` zile, max 10 zile
+        "spacing": 365 // max(vacations_per_year, 1),
+    }
+    stmts = [
+        """
+        INSERT INTO employees (emp_id, first_name, last_name, cnp, email, role, grade,
+                               base_salary, manager_id, hire_date, is_active)
+        SELECT g, 'Mgr' || g, 'Bench', lpad(g::text, 13, '0'), 'mgr' || g || '@bench.local',
+               'MANAGER', 'M1', 9000, NULL, DATE '2015-01-01', TRUE
+        FROM generate_series(1, :managers) g
+        """,
+        """
+        INSERT INTO employees (emp_id, first_name, last_name, cnp, email, role, grade,
+                               base_salary, manager_id, hire_date, is_active)
+        SELECT g, 'Emp' || g, 'Bench', lpad(g::text, 13, '0'), 'emp' || g || '@bench.local',
+               'EMPLOYEE', 'E' || (1 + g % 4), 3000 + (g % 50) * 100,
+               1 + (g - :managers - 1) / :reports, DATE '2016-01-01' + (g % 2000), g % 25 <> 0
+        FROM generate_series(:managers + 1, :employees) g
+        """,
+        """
+        INSERT INTO bonuses (emp_id, name, amount, effective_month)
+        SELECT e, 'bench', 100 + (e * 31 + m * 17) % 900 + 0.5,
+               (CAST(:start AS date) + make_interval(months => m))::date
+        FROM generate_series(:managers + 1, :employees) e, generate_series(0, :months - 1) m
+        WHERE (e + m) % 12 < :bonuses
+        """,
+        """
+        INSERT INTO vacations (emp_id, start_date, end_date, type)
+        SELECT e, d, d + (e + k) % 10, CASE WHEN (e + k) % 7 = 0 THEN 'UNPAID' ELSE 'PAID' END
+        FROM generate_series(:managers + 1, :employees) e,
+             generate_series(0, :years - 1) y,
+             generate_series(0, :vacations - 1) k,
+             LATERAL (SELECT (CAST(:start AS date) + make_interval(years => y)
+                              + (k * :spacing + e % (:spacing - 10)))::date AS d) s
+        """,
+        "SELECT setval(pg_get_serial_sequence('employees', 'emp_id'), (SELECT max(emp_id) FROM employees))",
+    ]
+    for sql in stmts:
+        db.session.execute(db.text(sql), params)
+    db.session.commit()
+    for table in ("employees", "bonuses", "vacations"):
+        db.session.execute(db.text(f"ANALYZE {table}"))
+    db.session.commit()
+
+
+def describe() -> dict:
+    """dimensiunea setului de date curent (intra in rezultatele benchmark-urilor)"""
+    counts = {
+        table: db.session.execute(db.text(f"SELECT count(*) FROM {table}")).scalar()
+        for table in ("employees", "bonuses", "vacations")
+    }
+    counts["managers"] = db.session.execute(
+        db.text("SELECT count(*) FROM employees WHERE role = 'MANAGER'")
+    ).scalar()
+    return counts
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--managers", type=int, default=50)
+    parser.add_argument("--reports", type=int, default=40)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--bonuses-per-year", type=int, default=4)
+    parser.add_argument("--vacations-per-year", type=int, default=3)
+    parser.add_argument("--reset", action="store_true", help="goleste intai tabelele (doar pe o baza scratch!)")
+    args = parser.parse_args(argv)
+
+    from app import create_app
+    app = create_app()
+    with app.app_context():
+        if args.reset:
+            reset()
+        elif db.session.execute(db.text("SELECT EXISTS (SELECT 1 FROM employees)")).scalar():
+            print("employees is not empty - use --reset on a scratch database", file=sys.stderr)
+            return 1
+        seed(args.managers, args.reports, args.years, args.bonuses_per_year, args.vacations_per_year)
+        print(json.dumps(describe(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Verifica planurile de executie pt query-urile lunare de payroll.
+
+    DATABASE_URL=postgresql://.../payroll_scratch python -m benchmarks.explain_payroll --seed
+
+--seed populeaza o baza de date GOALA (scratch) cu ~1M bonusuri si ~1M concedii,
+apoi ruleaza EXPLAIN si esueaza (exit 1) daca vreun tabel de payroll e citit
+cu Seq Scan in loc de index.
+"""
+import argparse
+import sys
+from datetime import date
+
+from app import create_app, db
+from app.core.payroll import _SNAPSHOT_FILL_SQL, _SNAPSHOT_MISSING_SQL, _TEAM_MONTH_SQL, _month_params
+from app.database.models import Employee
+from benchmarks.dataset import seed
+
+PAYROLL_TABLES = {"employees", "bonuses", "vacations", "payroll_month_snapshot"}
+
+
+def _scans(plan: dict):
+    """(node type, relatie) pt fiecare nod din plan"""
+    if "Relation Name" in plan:
+        yield plan["Node Type"], plan["Relation Name"]
+    for child in plan.get("Plans", []):
+        yield from _scans(child)
+
+
+def explain(sql, params: dict) -> list[tuple[str, str]]:
+    explain_sql = db.text("EXPLAIN (FORMAT JSON) " + str(sql))
+    plan = db.session.execute(explain_sql, params).scalar()
+    return list(_scans(plan[0]["Plan"]))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seed", action="store_true", help="populeaza baza de date scratch")
+    parser.add_argument("--managers", type=int, default=1000)
+    parser.add_argument("--reports", type=int, default=20)
+    parser.add_argument("--years", type=int, default=7)
+    parser.add_argument("--per-year", type=int, default=7, help="bonusuri si concedii per angajat pe an")
+    parser.add_argument("--month", type=date.fromisoformat, default=date(2024, 6, 1))
+    args = parser.parse_args(argv)
+
+    app = create_app()
+    with app.app_context():
+        if args.seed:
+            seed(args.managers, args.reports, args.years, args.per_year, args.per_year, until=args.month)
+
+        params = _month_params(args.month) | {"manager_id": 1, "emp_ids": None}
+        team = db.session.execute(
+            db.select(Employee.emp_id).where(Employee.manager_id == 1, Employee.is_active)
+        ).scalars().all()
+        # refill-ul snapshot-ului (citeste bonuses/vacations) + citirea echipei
+        scans = (explain(_SNAPSHOT_MISSING_SQL, params)
+                 + explain(_SNAPSHOT_FILL_SQL, params | {"emp_ids": team})
+                 + explain(_TEAM_MONTH_SQL, params))
+        db.session.rollback()
+
+    failed = False
+    for node, rel in scans:
+        ok = node != "Seq Scan"
+        failed |= rel in PAYROLL_TABLES and not ok
+        print(f"{'ok ' if ok else 'BAD'} {node:<20} {rel}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
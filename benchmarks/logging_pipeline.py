@@ -0,0 +1,145 @@
+"""
+Cost logare pe request: LOG_FORMAT=console (ConsoleRenderer colorat, scris sincron din
+thread-ul request-ului) vs LOG_FORMAT=json (evenimentul pus intr-o coada, JSON serializat si
+scris in loturi de un thread separat). Fiecare format ruleaza intr-un proces separat, cu
+stdout redirectat in <log-dir>/<format>.log.
+
+    python -m benchmarks.logging_pipeline --requests 2000 --events 50 --concurrency 4
+
+Scenarii:
+  synthetic (implicit) - o ruta care emite --events linii ca `email_sent` per request (fara DB)
+  send                 - POST /sendPdfToEmployees?mode=sync pe baza reala (DATABASE_URL) si un
+                         sink SMTP local (aiosmtpd), cu managerul --emp-id; inainte de fiecare
+                         trimitere payslip-urile sunt regenerate (?force=1, netemporizat)
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+FORMATS = ("console", "json")
+
+
+def _synthetic_client(events: int):
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+    from app import create_app
+    from app.core.logging import get_logger
+
+    app = create_app()
+    log = get_logger("outbox")
+
+    @app.route("/bench/log")
+    def bench_log():
+        for i in range(events):
+            log.info("email_sent", msg_id=i, to=f"emp{i}@example.com", file=f"Emp_{i}_2026_01.pdf")
+        return "ok"
+
+    client = app.test_client()
+    return lambda: client.get("/bench/log")
+
+
+def _send_client(emp_id: int, smtp_port: int):
+    os.environ.update(SMTP_HOST="127.0.0.1", SMTP_PORT=str(smtp_port), SMTP_USE_TLS="false",
+                      SMTP_USERNAME="", FROM_EMAIL="payroll@example.com", EMAIL_RATE_PER_SEC="0")
+    from app import create_app, db
+    from app.core.auth import generate_token
+    from app.database.models import Employee
+
+    app = create_app()
+    with app.app_context():
+        token = generate_token(db.session.get(Employee, emp_id))
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def send():
+        client.post("/createPdfForEmployees?force=1&background=0", headers=headers)
+        t0 = time.perf_counter()
+        rv = client.post("/sendPdfToEmployees?mode=sync", headers=headers)
+        assert rv.status_code == 200, rv.get_json()
+        return time.perf_counter() - t0
+
+    return send
+
+
+def child(args) -> dict:
+    os.environ["LOG_FORMAT"] = args.child
+    controller = None
+    if args.scenario == "send":
+        from benchmarks.smtp_sink import start_sink
+        controller, _ = start_sink(port=args.smtp_port)
+        request = _send_client(args.emp_id, args.smtp_port)
+    else:
+        request = _synthetic_client(args.events)
+
+    def timed(_):
+        t0 = time.perf_counter()
+        measured = request()
+        # scenariul send intoarce doar durata trimiterii (fara regenerare)
+        return measured if isinstance(measured, float) else time.perf_counter() - t0
+
+    timed(0)  # incalzire
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as ex:
+        timings = list(ex.map(timed, range(args.requests)))
+    wall = time.perf_counter() - t0
+
+    from app.core.logging import _stop_writer
+    t_flush = time.perf_counter()
+    _stop_writer()  # json: cat dureaza golirea cozii dupa ultimul request
+    flush = time.perf_counter() - t_flush
+    if controller is not None:
+        controller.stop()
+
+    timings_ms = [t * 1000 for t in timings]
+    return {
+        "requests": args.requests,
+        "req_per_s": round(args.requests / wall, 1) if args.scenario == "synthetic" else None,
+        "mean_ms": round(statistics.mean(timings_ms), 2),
+        "p50_ms": round(statistics.median(timings_ms), 2),
+        "p95_ms": round(statistics.quantiles(timings_ms, n=20)[-1], 2),
+        "queue_drain_ms": round(flush * 1000, 1),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=("synthetic", "send"), default="synthetic")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=50, help="linii de log per request (synthetic)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--emp-id", type=int, default=1, help="managerul (send)")
+    parser.add_argument("--smtp-port", type=int, default=8025)
+    parser.add_argument("--log-dir", default=None, help="unde raman log-urile (implicit temporar)")
+    parser.add_argument("--child", choices=FORMATS, help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        with open(args.result, "w") as f:
+            json.dump(child(args), f)
+        return 0
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in FORMATS:
+            sink = os.path.join(args.log_dir or tmp, f"{fmt}.log")
+            result = os.path.join(tmp, f"{fmt}.json")
+            cmd = [sys.executable, "-m", "benchmarks.logging_pipeline", "--child", fmt, "--result", result,
+                   "--scenario", args.scenario, "--requests", str(args.requests), "--events", str(args.events),
+                   "--concurrency", str(args.concurrency), "--emp-id", str(args.emp_id),
+                   "--smtp-port", str(args.smtp_port)]
+            with open(sink, "w") as out:
+                subprocess.run(cmd, stdout=out, stderr=subprocess.STDOUT, check=True)
+            with open(result) as f:
+                results[fmt] = json.load(f) | {"log_bytes": os.path.getsize(sink)}
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Compara generarea unui payslip:
+  - legacy: randare reportlab completa, scriere PDF necriptat, redeschidere, rescriere criptata
+  - single_pass: randare reportlab completa, criptare din memorie + o singura scriere atomica
+  - current: template static cache-uit + stream cu valori, criptare din memorie, scriere atomica
+
+    python -m benchmarks.payslip_pdf -n 500
+
+Raporteaza latenta per payslip (ms) si bytes scrisi pe disc per payslip
+(din /proc/self/io pe Linux, altfel din dimensiunea fisierelor).
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+from io import BytesIO
+
+import pikepdf
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from app.core.payroll_row import PayrollRow
+from app.core.payslip_pdf import _atomic_save, generate_payslip_pdf
+
+
+def sample_row(i: int) -> PayrollRow:
+    return PayrollRow(
+        emp_id=i, first_name="Ana", last_name=f"Popescu{i}", cnp=f"{2900101000000 + i}",
+        email=f"ana{i}@example.com", grade="SENIOR", hire_date=date(2020, 3, 1),
+        base_salary=7500.0, bonus_total=1250.5, vacation_days=3, working_days=21,
+    )
+
+
+def full_render(e: PayrollRow) -> BytesIO:
+    """randarea reportlab completa, pagina cu pagina (inainte de template)"""
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+    c.setFont("Helvetica-Bold", 18)
+    c.drawString(50, height - 80, "Payslip - current monthh")
+    c.setFont("Helvetica", 12)
+    y = height - 120
+    c.drawString(50, y, f"Employee Name: {e.first_name} {e.last_name}")
+    c.drawString(50, y - 20, f"CNP: {e.cnp}")
+    c.drawString(50, y - 40, f"Email: {e.email}")
+    c.drawString(50, y - 60, f"Grade: {e.grade}")
+    c.drawString(50, y - 80, f"Data angajării: {e.hire_date}")
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(50, y - 120, "Detalii salariale")
+    c.setFont("Helvetica", 12)
+    c.drawString(50, y - 140, f"Salariu de bază: {e.base_salary:.2f} RON")
+    c.drawString(50, y - 160, f"Bonusuri (luna curentă): {e.bonus_total:.2f} RON")
+    c.drawString(50, y - 180, f"Zile concediu: {e.vacation_days}")
+    c.drawString(50, y - 200, f"Salariu total de plată: {e.salary_to_pay:.2f} RON")
+    c.showPage()
+    c.save()
+    buffer.seek(0)
+    return buffer
+
+
+def legacy_generate(row: PayrollRow, output_path: str):
+    """pipeline-ul vechi: write -> pikepdf.open(allow_overwriting_input) -> save"""
+    buffer = full_render(row)
+    with open(output_path, "wb") as f:
+        f.write(buffer.getvalue())
+    with pikepdf.open(output_path, allow_overwriting_input=True) as pdf:
+        pdf.save(output_path, encryption=pikepdf.Encryption(owner=row.cnp, user=row.cnp, R=4))
+
+
+def single_pass_generate(row: PayrollRow, output_path: str):
+    with pikepdf.open(full_render(row)) as pdf:
+        _atomic_save(pdf, output_path, encryption=pikepdf.Encryption(owner=row.cnp, user=row.cnp, R=4))
+
+
+def current_generate(row: PayrollRow, output_path: str):
+    generate_payslip_pdf(row, row.salary_to_pay, row.bonus_total, row.vacation_days, output_path)
+
+
+def _bytes_written() -> int | None:
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def run(fn, n: int, out_dir: str) -> dict:
+    rows = [sample_row(i) for i in range(n)]
+    fn(rows[0], os.path.join(out_dir, "warmup.pdf"))
+
+    latencies = []
+    w0 = _bytes_written()
+    for row in rows:
+        path = os.path.join(out_dir, f"{row.emp_id}.pdf")
+        t0 = time.perf_counter()
+        fn(row, path)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    w1 = _bytes_written()
+
+    if w0 is not None and w1 is not None:
+        written = (w1 - w0) / n
+    else:
+        written = None
+
+    return {
+        "n": n,
+        "mean_ms": round(statistics.mean(latencies), 3),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(statistics.quantiles(latencies, n=20)[-1], 3),
+        "bytes_written_per_payslip": round(written) if written is not None else None,
+        "file_size": os.path.getsize(os.path.join(out_dir, f"{rows[-1].emp_id}.pdf")),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=200, help="numar de payslip-uri per varianta")
+    args = parser.parse_args(argv)
+
+    results = {}
+    variants = (
+        ("legacy", legacy_generate),
+        ("single_pass", single_pass_generate),
+        ("current", current_generate),
+    )
+    for name, fn in variants:
+        with tempfile.TemporaryDirectory() as out_dir:
+            results[name] = run(fn, args.n, out_dir)
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Throughput trimitere payslip-uri: o conexiune SMTP noua per mesaj (ca inainte)
+vs sesiuni refolosite din SmtpPool, pe un sink aiosmtpd local.
+
+    python -m benchmarks.smtp_pool -n 500 --concurrency 4
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.mailer import SmtpPool, SmtpSettings, build_message
+from benchmarks.smtp_sink import start_sink
+
+
+def run(settings: SmtpSettings, attachment: str, n: int, concurrency: int) -> dict:
+    pool = SmtpPool(settings)
+
+    def send(i: int):
+        msg = build_message(f"emp{i}@example.com", "Payslip", "Hello", attachment,
+                            settings.from_email, "application", "pdf")
+        pool.send(msg)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        list(ex.map(send, range(n)))
+    elapsed = time.perf_counter() - t0
+    pool.close()
+    return {
+        "messages": n,
+        "connections": pool.connects,
+        "elapsed_s": round(elapsed, 3),
+        "msg_per_s": round(n / elapsed, 1),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8025)
+    args = parser.parse_args(argv)
+
+    controller, handler = start_sink(port=args.port)
+    base = dict(host="127.0.0.1", port=args.port, username=None, password=None,
+                from_email="payroll@example.com", use_tls=False, use_ssl=False,
+                pool_size=args.concurrency)
+    try:
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+            f.write(os.urandom(2048))
+        results = {
+            # max 1 mesaj per conexiune = comportamentul vechi (connect + login per mesaj)
+            "per_message_connection": run(SmtpSettings(**base, max_messages_per_conn=1),
+                                          f.name, args.n, args.concurrency),
+            "pooled": run(SmtpSettings(**base, max_messages_per_conn=100),
+                          f.name, args.n, args.concurrency),
+        }
+        results["sink_received"] = handler.messages
+        print(json.dumps(results, indent=2))
+    finally:
+        os.unlink(f.name)
+        controller.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
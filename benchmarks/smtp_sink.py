@@ -0,0 +1,56 @@
+"""
+Server SMTP local care accepta si numara mesajele (pt masuratori offline).
+Necesita aiosmtpd (pip install -r benchmarks/requirements.txt).
+
+    python -m benchmarks.smtp_sink --port 8025
+
+apoi SMTP_HOST=127.0.0.1 SMTP_PORT=8025 SMTP_USE_TLS=false pt aplicatie.
+"""
+import argparse
+import threading
+import time
+
+
+class CountingHandler:
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    async def handle_DATA(self, server, session, envelope):
+        with self._lock:
+            self.messages += 1
+            self.bytes += len(envelope.content or b"")
+        return "250 OK"
+
+
+def start_sink(host: str = "127.0.0.1", port: int = 8025):
+    """porneste sink-ul intr-un thread; intoarce (controller, handler)"""
+    from aiosmtpd.controller import Controller
+
+    handler = CountingHandler()
+    controller = Controller(handler, hostname=host, port=port)
+    controller.start()
+    return controller, handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    args = parser.parse_args(argv)
+
+    controller, handler = start_sink(args.host, args.port)
+    print(f"smtp sink on {args.host}:{args.port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"messages={handler.messages} bytes={handler.bytes}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        controller.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Scenarii temporizate pe aplicatia reala (create_app + test client, fara server HTTP), pe o baza
+populata cu benchmarks.dataset. Rezultatele se scriu ca JSON, comparabile intre rulari.
+
+    DATABASE_URL=postgresql://.../payroll_bench python -m benchmarks.suite --out results/base.json
+    DATABASE_URL=... python -m benchmarks.suite --out results/new.json --compare results/base.json
+
+Scenarii (--scenarios, implicit toate):
+  login - POST /auth/login (email + cnp) pt managerii alesi
+  csv   - POST /createAggregatedEmployeeData (agregare SQL + CSV)
+  pdf   - POST /createPdfForEmployees?force=1&background=0 (toata echipa regenerata)
+  send  - POST /sendPdfToEmployees?mode=sync catre un sink SMTP local (aiosmtpd);
+          payslip-urile sunt regenerate inainte de fiecare trimitere (netemporizat)
+
+Arhiva (archive/...) e scrisa intr-un folder temporar, nu in directorul curent.
+--compare iese cu 1 daca p50-ul vreunui scenariu a crescut cu mai mult de --max-regression.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+SCENARIOS = ("login", "csv", "pdf", "send")
+
+
+def _stats(timings: list[float], items: int) -> dict:
+    ms = [t * 1000 for t in timings]
+    total = sum(timings)
+    return {
+        "runs": len(ms),
+        "items": items,
+        "mean_ms": round(statistics.mean(ms), 2),
+        "p50_ms": round(statistics.median(ms), 2),
+        "p95_ms": round(statistics.quantiles(ms, n=20)[-1], 2) if len(ms) > 1 else round(ms[0], 2),
+        "max_ms": round(max(ms), 2),
+        "items_per_sec": round(items / total, 1) if total else None,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Suite:
+    def __init__(self, app, managers: list[int], repeat: int):
+        self.app = app
+        self.client = app.test_client()
+        self.managers = managers
+        self.repeat = repeat
+        self._tokens: dict[int, str] = {}
+
+    def _post(self, url: str, manager_id: int | None = None, **kw):
+        headers = {"Authorization": f"Bearer {self._tokens[manager_id]}"} if manager_id else {}
+        t0 = time.perf_counter()
+        rv = self.client.post(url, headers=headers, **kw)
+        elapsed = time.perf_counter() - t0
+        if rv.status_code >= 400:
+            raise RuntimeError(f"{url} -> {rv.status_code}: {rv.get_data(as_text=True)[:300]}")
+        return rv, elapsed
+
+    def login(self) -> dict:
+        from benchmarks.dataset import manager_login
+
+        timings = []
+        for _ in range(self.repeat):
+            for m in self.managers:
+                rv, elapsed = self._post("/auth/login", json=manager_login(m))
+                self._tokens[m] = rv.get_json()["access_token"]
+                timings.append(elapsed)
+        return _stats(timings, len(timings))
+
+    def csv(self) -> dict:
+        timings, rows = [], 0
+        for _ in range(self.repeat):
+            for m in self.managers:
+                rv, elapsed = self._post("/createAggregatedEmployeeData", m)
+                timings.append(elapsed)
+                rows += rv.get_json()["rows"]
+        return _stats(timings, rows)
+
+    def pdf(self) -> dict:
+        timings, generated = [], 0
+        for _ in range(self.repeat):
+            for m in self.managers:
+                rv, elapsed = self._post("/createPdfForEmployees?force=1&background=0", m)
+                timings.append(elapsed)
+                generated += rv.get_json()["generated"]
+        return _stats(timings, generated)
+
+    def send(self) -> dict:
+        timings, sent = [], 0
+        for _ in range(self.repeat):
+            for m in self.managers:
+                self._post("/createPdfForEmployees?force=1&background=0", m)
+                rv, elapsed = self._post("/sendPdfToEmployees?mode=sync", m)
+                timings.append(elapsed)
+                sent += len(rv.get_json()["sent_to"])
+        return _stats(timings, sent)
+
+    def run(self, scenarios: list[str]) -> dict:
+        results = {}
+        # login-ul produce token-urile folosite de celelalte scenarii
+        for name in ["login"] + [s for s in scenarios if s != "login"]:
+            results[name] = getattr(self, name)()
+        return {name: results[name] for name in scenarios}
+
+
+def compare(current: dict, baseline: dict, max_regression: float) -> bool:
+    """tabel p50 curent vs baseline; True daca vreun scenariu e mai lent decat pragul"""
+    regressed = False
+    for name, stats in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        ratio = stats["p50_ms"] / base["p50_ms"] if base["p50_ms"] else 1.0
+        bad = ratio > 1 + max_regression
+        regressed |= bad
+        print(f"{'REGRESSION' if bad else 'ok':<10} {name:<6} p50 {base['p50_ms']:>9.2f} -> "
+              f"{stats['p50_ms']:>9.2f} ms ({ratio:.2f}x)", file=sys.stderr)
+    return regressed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--managers", type=int, default=5, help="cati manageri (emp_id 1..n) participa")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--smtp-port", type=int, default=8025)
+    parser.add_argument("--out", default=None, help="fisierul JSON cu rezultatele (implicit stdout)")
+    parser.add_argument("--compare", default=None, help="rezultate anterioare (JSON) de comparat")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    if not os.getenv("DATABASE_URL"):
+        parser.error("DATABASE_URL must point to a database seeded with benchmarks.dataset")
+
+    controller = None
+    if "send" in scenarios:
+        from benchmarks.smtp_sink import start_sink
+        controller, _ = start_sink(port=args.smtp_port)
+        os.environ.update(SMTP_HOST="127.0.0.1", SMTP_PORT=str(args.smtp_port), SMTP_USE_TLS="false",
+                          SMTP_USERNAME="", FROM_EMAIL="payroll@bench.local", EMAIL_RATE_PER_SEC="0")
+
+    from app import create_app
+    from benchmarks.dataset import describe
+
+    out_path = os.path.abspath(args.out) if args.out else None
+    cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory() as work:
+            os.chdir(work)  # archive/ se creeaza relativ la cwd
+            app = create_app()
+            with app.app_context():
+                dataset = describe()
+            results = Suite(app, list(range(1, args.managers + 1)), args.repeat).run(scenarios)
+    finally:
+        os.chdir(cwd)
+        if controller is not None:
+            controller.stop()
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "config": {"managers": args.managers, "repeat": args.repeat,
+                   "payslip_mode": app.config["PAYSLIP_MODE"], "payslip_workers": app.config["PAYSLIP_WORKERS"]},
+        "dataset": dataset,
+        "scenarios": results,
+    }
+    text = json.dumps(report, indent=2)
+    if out_path:
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        with open(out_path, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            if compare(report, json.load(f), args.max_regression):
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+"""
+Configuratia gunicorn (productie):
+
+    PROMETHEUS_MULTIPROC_DIR=/var/run/payroll-metrics gunicorn -c gunicorn.conf.py "app:create_app()"
+
+Cu PROMETHEUS_MULTIPROC_DIR setat, fiecare worker scrie metricile in fisiere mmap din folder si
+/metrics le agrega (app.core.metrics). Folderul e golit la pornirea master-ului, iar pt un worker
+oprit / omorat se apeleaza mark_process_dead (altfel valorile lui live ar fi raportate in continuare).
+"""
+import glob
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+
+def on_starting(server):
+    # fisierele ramase de la rularea anterioara ar fi agregate ca metrici ale workerilor noi
+    path = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        os.makedirs(path, exist_ok=True)
+        for f in glob.glob(os.path.join(path, "*.db")):
+            os.unlink(f)
+
+
+def child_exit(server, worker):
+    from app.core.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
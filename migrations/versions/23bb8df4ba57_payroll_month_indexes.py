@@ -0,0 +1,50 @@
+"""payroll month indexes
+
+Revision ID: 23bb8df4ba57
+Revises: 48260491c2b0
+Create Date: 2026-10-17 09:12:04.118233
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '23bb8df4ba57'
+down_revision = '48260491c2b0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # btree_gist - pt index GiST compus (emp_id, daterange)
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+
+    # filter_by(manager_id=..., is_active=True) ORDER BY emp_id
+    op.create_index(
+        'ix_employees_manager_active', 'employees', ['manager_id', 'emp_id'],
+        unique=False,
+        postgresql_where=sa.text('is_active'),
+    )
+
+    # emp_id = :e AND effective_month = :m0 -> SUM(amount) direct din index
+    op.create_index(
+        'ix_bonuses_emp_month', 'bonuses', ['emp_id', 'effective_month'],
+        unique=False,
+        postgresql_include=['amount'],
+    )
+
+    # emp_id = :e AND daterange(start_date, end_date, '[]') && daterange(:m0, :m1, '[]')
+    op.create_index(
+        'ix_vacations_emp_period', 'vacations',
+        ['emp_id', sa.text("daterange(start_date, end_date, '[]')")],
+        unique=False,
+        postgresql_using='gist',
+    )
+
+
+def downgrade():
+    op.drop_index('ix_vacations_emp_period', table_name='vacations')
+    op.drop_index('ix_bonuses_emp_month', table_name='bonuses')
+    op.drop_index('ix_employees_manager_active', table_name='employees',
+                  postgresql_where=sa.text('is_active'))
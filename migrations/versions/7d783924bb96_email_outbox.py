@@ -0,0 +1,55 @@
+"""email outbox
+
+Revision ID: 7d783924bb96
+Revises: 84ff39d277c0
+Create Date: 2026-10-17 11:20:37.562104
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d783924bb96'
+down_revision = '84ff39d277c0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('email_outbox',
+    sa.Column('msg_id', sa.Integer(), nullable=False),
+    sa.Column('job_id', sa.String(length=32), nullable=False),
+    sa.Column('manager_id', sa.Integer(), nullable=False),
+    sa.Column('emp_id', sa.Integer(), nullable=True),
+    sa.Column('to_email', sa.String(length=120), nullable=False),
+    sa.Column('subject', sa.String(length=200), nullable=False),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.Column('attachment_path', sa.String(length=500), nullable=False),
+    sa.Column('maintype', sa.String(length=32), nullable=False),
+    sa.Column('subtype', sa.String(length=32), nullable=False),
+    sa.Column('status', sa.String(length=12), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('locked_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_to', sa.String(length=500), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['emp_id'], ['employees.emp_id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['manager_id'], ['employees.emp_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('msg_id')
+    )
+    op.create_index(op.f('ix_email_outbox_job_id'), 'email_outbox', ['job_id'], unique=False)
+    op.create_index(
+        'ix_email_outbox_due', 'email_outbox', ['next_attempt_at', 'msg_id'],
+        unique=False,
+        postgresql_where=sa.text("status = 'PENDING'"),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_email_outbox_due', table_name='email_outbox',
+                  postgresql_where=sa.text("status = 'PENDING'"))
+    op.drop_index(op.f('ix_email_outbox_job_id'), table_name='email_outbox')
+    op.drop_table('email_outbox')
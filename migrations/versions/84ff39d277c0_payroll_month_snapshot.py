@@ -0,0 +1,90 @@
+"""payroll month snapshot
+
+Revision ID: 84ff39d277c0
+Revises: 23bb8df4ba57
+Create Date: 2026-10-17 10:02:51.430917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '84ff39d277c0'
+down_revision = '23bb8df4ba57'
+branch_labels = None
+depends_on = None
+
+
+# sterge doar randurile de snapshot afectate de modificare;
+# app le recalculeaza la urmatoarea citire (refresh incremental)
+INVALIDATE_FN = """
+CREATE OR REPLACE FUNCTION payroll_snapshot_invalidate() RETURNS trigger AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'bonuses' THEN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            DELETE FROM payroll_month_snapshot
+            WHERE emp_id = OLD.emp_id AND month = date_trunc('month', OLD.effective_month)::date;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            DELETE FROM payroll_month_snapshot
+            WHERE emp_id = NEW.emp_id AND month = date_trunc('month', NEW.effective_month)::date;
+        END IF;
+    ELSIF TG_TABLE_NAME = 'vacations' THEN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            DELETE FROM payroll_month_snapshot
+            WHERE emp_id = OLD.emp_id
+              AND month BETWEEN date_trunc('month', OLD.start_date)::date AND OLD.end_date;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            DELETE FROM payroll_month_snapshot
+            WHERE emp_id = NEW.emp_id
+              AND month BETWEEN date_trunc('month', NEW.start_date)::date AND NEW.end_date;
+        END IF;
+    ELSIF TG_TABLE_NAME = 'employees' THEN
+        DELETE FROM payroll_month_snapshot WHERE emp_id = NEW.emp_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade():
+    op.create_table('payroll_month_snapshot',
+    sa.Column('emp_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('base_salary', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('bonus_total', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('vacation_days', sa.Integer(), nullable=False),
+    sa.Column('working_days', sa.Integer(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['emp_id'], ['employees.emp_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('emp_id', 'month')
+    )
+
+    op.execute(INVALIDATE_FN)
+    op.execute("""
+        CREATE TRIGGER trg_bonuses_payroll_snapshot
+        AFTER INSERT OR UPDATE OR DELETE ON bonuses
+        FOR EACH ROW EXECUTE FUNCTION payroll_snapshot_invalidate()
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_vacations_payroll_snapshot
+        AFTER INSERT OR UPDATE OR DELETE ON vacations
+        FOR EACH ROW EXECUTE FUNCTION payroll_snapshot_invalidate()
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_employees_payroll_snapshot
+        AFTER UPDATE OF base_salary ON employees
+        FOR EACH ROW WHEN (OLD.base_salary IS DISTINCT FROM NEW.base_salary)
+        EXECUTE FUNCTION payroll_snapshot_invalidate()
+    """)
+
+
+def downgrade():
+    op.execute('DROP TRIGGER IF EXISTS trg_employees_payroll_snapshot ON employees')
+    op.execute('DROP TRIGGER IF EXISTS trg_vacations_payroll_snapshot ON vacations')
+    op.execute('DROP TRIGGER IF EXISTS trg_bonuses_payroll_snapshot ON bonuses')
+    op.execute('DROP FUNCTION IF EXISTS payroll_snapshot_invalidate()')
+    op.drop_table('payroll_month_snapshot')
@@ -0,0 +1,103 @@
+"""payroll snapshot fill lock
+
+Revision ID: 9b3e5c17a4f2
+Revises: f41a21b8d8d6
+Create Date: 2026-10-17 16:12:40.218734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b3e5c17a4f2'
+down_revision = 'f41a21b8d8d6'
+branch_labels = None
+depends_on = None
+
+
+# primul argument al advisory lock-urilor pe snapshot (acelasi in app.core.payroll)
+SNAPSHOT_LOCK = 7301
+
+# invalidarea ia un advisory lock partajat pe angajat; refill-ul din app ia lock-ul exclusiv
+# inainte sa calculeze agregatul -> un refill nu mai poate scrie un rand calculat fara o
+# scriere inca necomisa (randul ar fi ramas vechi pana la urmatoarea modificare)
+INVALIDATE_FN = """
+CREATE OR REPLACE FUNCTION payroll_snapshot_invalidate() RETURNS trigger AS $$
+BEGIN
+    -- lock partajat pe angajat pana la commit: scrierile nu se blocheaza intre ele, dar un
+    -- refill al snapshot-ului (lock exclusiv) asteapta commit-ul lor si invers
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM pg_advisory_xact_lock_shared(%(lock)d, OLD.emp_id);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM pg_advisory_xact_lock_shared(%(lock)d, NEW.emp_id);
+    END IF;
+    IF TG_TABLE_NAME = 'bonuses' THEN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            DELETE FROM payroll_month_snapshot
+            WHERE emp_id = OLD.emp_id AND month = date_trunc('month', OLD.effective_month)::date;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            DELETE FROM payroll_month_snapshot
+            WHERE emp_id = NEW.emp_id AND month = date_trunc('month', NEW.effective_month)::date;
+        END IF;
+    ELSIF TG_TABLE_NAME = 'vacations' THEN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            DELETE FROM payroll_month_snapshot
+            WHERE emp_id = OLD.emp_id
+              AND month BETWEEN date_trunc('month', OLD.start_date)::date AND OLD.end_date;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            DELETE FROM payroll_month_snapshot
+            WHERE emp_id = NEW.emp_id
+              AND month BETWEEN date_trunc('month', NEW.start_date)::date AND NEW.end_date;
+        END IF;
+    ELSIF TG_TABLE_NAME = 'employees' THEN
+        DELETE FROM payroll_month_snapshot WHERE emp_id = NEW.emp_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+PREVIOUS_FN = """
+CREATE OR REPLACE FUNCTION payroll_snapshot_invalidate() RETURNS trigger AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'bonuses' THEN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            DELETE FROM payroll_month_snapshot
+            WHERE emp_id = OLD.emp_id AND month = date_trunc('month', OLD.effective_month)::date;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            DELETE FROM payroll_month_snapshot
+            WHERE emp_id = NEW.emp_id AND month = date_trunc('month', NEW.effective_month)::date;
+        END IF;
+    ELSIF TG_TABLE_NAME = 'vacations' THEN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            DELETE FROM payroll_month_snapshot
+            WHERE emp_id = OLD.emp_id
+              AND month BETWEEN date_trunc('month', OLD.start_date)::date AND OLD.end_date;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            DELETE FROM payroll_month_snapshot
+            WHERE emp_id = NEW.emp_id
+              AND month BETWEEN date_trunc('month', NEW.start_date)::date AND NEW.end_date;
+        END IF;
+    ELSIF TG_TABLE_NAME = 'employees' THEN
+        DELETE FROM payroll_month_snapshot WHERE emp_id = NEW.emp_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade():
+    op.execute(INVALIDATE_FN % {"lock": SNAPSHOT_LOCK})
+    # randurile completate inainte de lock pot fi deja vechi
+    op.execute("DELETE FROM payroll_month_snapshot")
+
+
+def downgrade():
+    op.execute(PREVIOUS_FN)
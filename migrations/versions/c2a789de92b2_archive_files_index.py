@@ -0,0 +1,45 @@
+"""archive files index
+
+Revision ID: c2a789de92b2
+Revises: 7d783924bb96
+Create Date: 2026-10-17 12:05:13.904417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2a789de92b2'
+down_revision = '7d783924bb96'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('archive_files',
+    sa.Column('file_id', sa.Integer(), nullable=False),
+    sa.Column('manager_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('kind', sa.String(length=8), nullable=False),
+    sa.Column('path', sa.String(length=500), nullable=False),
+    sa.Column('emp_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=8), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['emp_id'], ['employees.emp_id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['manager_id'], ['employees.emp_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('file_id'),
+    sa.UniqueConstraint('path')
+    )
+    op.create_index(
+        'ix_archive_files_pending', 'archive_files', ['manager_id', 'kind', 'month', 'created_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'PENDING'"),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_archive_files_pending', table_name='archive_files',
+                  postgresql_where=sa.text("status = 'PENDING'"))
+    op.drop_table('archive_files')
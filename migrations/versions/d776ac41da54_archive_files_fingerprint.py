@@ -0,0 +1,26 @@
+"""archive files fingerprint
+
+Revision ID: d776ac41da54
+Revises: d920226a3628
+Create Date: 2026-10-17 13:40:18.553120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd776ac41da54'
+down_revision = 'd920226a3628'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('archive_files', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('fingerprint', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('archive_files', schema=None) as batch_op:
+        batch_op.drop_column('fingerprint')
@@ -0,0 +1,70 @@
+"""payroll jobs
+
+Revision ID: d920226a3628
+Revises: c2a789de92b2
+Create Date: 2026-10-17 13:02:41.216087
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd920226a3628'
+down_revision = 'c2a789de92b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('payroll_jobs',
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('run_id', sa.String(length=32), nullable=False),
+    sa.Column('kind', sa.String(length=8), nullable=False),
+    sa.Column('manager_id', sa.Integer(), nullable=False),
+    sa.Column('emp_id', sa.Integer(), nullable=True),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('send_after', sa.Boolean(), nullable=False),
+    sa.Column('status', sa.String(length=8), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('worker_id', sa.String(length=100), nullable=True),
+    sa.Column('lease_until', sa.DateTime(), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+    sa.Column('items', sa.Integer(), nullable=False),
+    sa.Column('result', sa.Text(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['emp_id'], ['employees.emp_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['manager_id'], ['employees.emp_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('job_id')
+    )
+    op.create_index(op.f('ix_payroll_jobs_run_id'), 'payroll_jobs', ['run_id'], unique=False)
+    op.create_index(
+        'ix_payroll_jobs_due', 'payroll_jobs', ['next_attempt_at', 'job_id'],
+        unique=False,
+        postgresql_where=sa.text("status = 'PENDING'"),
+    )
+    op.create_index(
+        'ix_payroll_jobs_lease', 'payroll_jobs', ['lease_until'],
+        unique=False,
+        postgresql_where=sa.text("status = 'RUNNING'"),
+    )
+    op.create_index(
+        'ix_payroll_jobs_month_active', 'payroll_jobs', ['month'],
+        unique=False,
+        postgresql_where=sa.text("status IN ('PENDING', 'RUNNING')"),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_payroll_jobs_month_active', table_name='payroll_jobs',
+                  postgresql_where=sa.text("status IN ('PENDING', 'RUNNING')"))
+    op.drop_index('ix_payroll_jobs_lease', table_name='payroll_jobs',
+                  postgresql_where=sa.text("status = 'RUNNING'"))
+    op.drop_index('ix_payroll_jobs_due', table_name='payroll_jobs',
+                  postgresql_where=sa.text("status = 'PENDING'"))
+    op.drop_index(op.f('ix_payroll_jobs_run_id'), table_name='payroll_jobs')
+    op.drop_table('payroll_jobs')
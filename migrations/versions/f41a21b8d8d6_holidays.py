@@ -0,0 +1,103 @@
+"""holidays
+
+Revision ID: f41a21b8d8d6
+Revises: d776ac41da54
+Create Date: 2026-10-17 14:21:07.402315
+
+"""
+from datetime import date, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f41a21b8d8d6'
+down_revision = 'd776ac41da54'
+branch_labels = None
+depends_on = None
+
+
+# anii pt care se adauga sarbatorile legale; restul cu `flask payroll seed-holidays`
+SEED_YEARS = range(2015, 2041)
+
+
+# copie inghetata a app.core.work_calendar la data reviziei: migrarea nu importa codul
+# aplicatiei (o modificare ulterioara ar schimba ce insereaza o revizie veche)
+def _orthodox_easter(year: int) -> date:
+    a, b, c = year % 4, year % 7, year % 19
+    d = (19 * c + 15) % 30
+    e = (2 * a + 4 * b - d + 34) % 7
+    month, day = divmod(d + e + 114, 31)
+    return date(year, month, day + 1) + timedelta(days=13)
+
+
+def _romanian_holidays(year: int) -> dict[date, str]:
+    easter = _orthodox_easter(year)
+    days = {
+        date(year, 1, 1): "Anul Nou",
+        date(year, 1, 2): "Anul Nou",
+        easter: "Paștele",
+        easter + timedelta(days=1): "Paștele",
+        date(year, 5, 1): "Ziua Muncii",
+        easter + timedelta(days=49): "Rusaliile",
+        easter + timedelta(days=50): "Rusaliile",
+        date(year, 8, 15): "Adormirea Maicii Domnului",
+        date(year, 12, 1): "Ziua Națională",
+        date(year, 12, 25): "Crăciunul",
+        date(year, 12, 26): "Crăciunul",
+    }
+    if year >= 2012:
+        days[date(year, 11, 30)] = "Sfântul Andrei"
+    if year >= 2017:
+        days[date(year, 1, 24)] = "Ziua Unirii Principatelor Române"
+        days[date(year, 6, 1)] = "Ziua Copilului"
+    if year >= 2018:
+        days[easter - timedelta(days=2)] = "Vinerea Mare"
+    if year >= 2024:
+        days[date(year, 1, 6)] = "Boboteaza"
+        days[date(year, 1, 7)] = "Sfântul Ioan Botezătorul"
+    return days
+
+# o zi libera adaugata / stearsa schimba zilele lucratoare ale lunii pt toti angajatii
+INVALIDATE_FN = """
+CREATE OR REPLACE FUNCTION payroll_snapshot_invalidate_holiday() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM payroll_month_snapshot WHERE month = date_trunc('month', OLD.day)::date;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        DELETE FROM payroll_month_snapshot WHERE month = date_trunc('month', NEW.day)::date;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade():
+    holidays = op.create_table('holidays',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.bulk_insert(holidays, [
+        {"day": day, "name": name} for year in SEED_YEARS for day, name in sorted(_romanian_holidays(year).items())
+    ])
+
+    op.execute(INVALIDATE_FN)
+    op.execute("""
+        CREATE TRIGGER trg_holidays_payroll_snapshot
+        AFTER INSERT OR UPDATE OR DELETE ON holidays
+        FOR EACH ROW EXECUTE FUNCTION payroll_snapshot_invalidate_holiday()
+    """)
+
+    # zilele de concediu erau zile calendaristice, acum sunt zile lucratoare -> se recalculeaza tot
+    op.execute("DELETE FROM payroll_month_snapshot")
+
+
+def downgrade():
+    op.execute('DROP TRIGGER IF EXISTS trg_holidays_payroll_snapshot ON holidays')
+    op.execute('DROP FUNCTION IF EXISTS payroll_snapshot_invalidate_holiday()')
+    op.drop_table('holidays')
+    op.execute("DELETE FROM payroll_month_snapshot")
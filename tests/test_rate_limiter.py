@@ -0,0 +1,51 @@
+import pytest
+
+from app.core import outbox
+from app.core.outbox import RateLimiter
+
+
+class FakeClock:
+    """monotonic() + sleep() fara asteptare reala"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(outbox, "time", clock)
+    return clock
+
+
+def test_fractional_rate_spaces_messages(clock):
+    limiter = RateLimiter(0.5)
+    start = clock.now
+    for _ in range(3):
+        limiter.acquire()
+    # primul token e disponibil imediat, urmatoarele la cate 2 secunde
+    assert clock.now - start == pytest.approx(4.0)
+
+
+def test_rate_above_one_allows_burst(clock):
+    limiter = RateLimiter(5)
+    start = clock.now
+    for _ in range(5):
+        limiter.acquire()
+    assert clock.now == start
+    limiter.acquire()
+    assert clock.now - start == pytest.approx(0.2)
+
+
+@pytest.mark.parametrize("rate", [0, -1])
+def test_non_positive_rate_is_unlimited(clock, rate):
+    limiter = RateLimiter(rate)
+    for _ in range(100):
+        limiter.acquire()
+    assert clock.now == 1000.0